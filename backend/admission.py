@@ -0,0 +1,103 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class ConcurrencyLimiter:
+    # At most `limit` requests run at once; up to `queue_size` more wait up to `queue_timeout`
+    # seconds for a slot, and anything beyond that is turned away immediately
+    def __init__(self, limit=8, queue_size=32, queue_timeout=2.0):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+        # Smoothed time a request holds its slot, for Retry-After estimates
+        self._hold_time = 0.1
+        self._admitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._peak_waiting = 0
+
+    def acquire(self):
+        # True once a slot is held; False if the queue is full or the wait timed out
+        with self._cond:
+            if self._active < self.limit and not self._waiting:
+                self._active += 1
+                self._admitted += 1
+                return True
+            if self._waiting >= self.queue_size:
+                self._rejected += 1
+                return False
+            self._waiting += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self._active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self._admitted += 1
+            return True
+
+    def release(self, held_for):
+        with self._cond:
+            self._active -= 1
+            self._hold_time = 0.8 * self._hold_time + 0.2 * held_for
+            self._cond.notify()
+
+    def retry_after(self):
+        # Whole seconds until the current queue has likely drained, at least 1
+        with self._cond:
+            backlog = self._active + self._waiting
+            return max(1, math.ceil(backlog * self._hold_time / self.limit))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "queue_size": self.queue_size,
+                "active": self._active,
+                "waiting": self._waiting,
+                "peak_waiting": self._peak_waiting,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "avg_hold_time": round(self._hold_time, 4),
+            }
+
+
+class RateLimiter:
+    # Token bucket per client: `rate` requests per second on average, bursts of up to `burst`
+    def __init__(self, rate=2.0, burst=10, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, client):
+        # 0 if the request may proceed, otherwise whole seconds until a token is available
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = max(1, math.ceil((1 - tokens) / self.rate))
+            # Most recently seen clients live at the end; the least recent are evicted first
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
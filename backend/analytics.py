@@ -0,0 +1,202 @@
+import hashlib
+import itertools
+import json
+import threading
+import time
+import uuid
+
+# numpy and pandas are imported inside the functions that use them: they are most of the
+# backend's import time, and only the analytics endpoint needs them
+
+SCORE_COLUMNS = ('accuracy_score', 'relevancy_score', 'performance_score')
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+FETCH_CHUNK_SIZE = 10000
+
+# One narrow row per response; everything else is derived in NumPy/pandas
+ANALYTICS_QUERY = """
+    SELECT fs.tester_name, fr.question_id, fr.accuracy_score, fr.relevancy_score, fr.performance_score
+    FROM feedback_responses fr
+    JOIN feedback_sessions fs ON fs.id = fr.session_id
+    {where}
+"""
+
+
+def _score_arrays(cursor, chunk_size):
+    # (testers, question_ids, scores) column arrays per fetched chunk, never one dict per row
+    import numpy as np
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        tester_column, question_column, *score_columns = zip(*rows)
+        # None becomes NaN in float arrays, so missing values drop out of every statistic
+        yield (
+            np.asarray(tester_column, dtype=object),
+            np.asarray(question_column, dtype=float),
+            np.column_stack([np.asarray(column, dtype=float) for column in score_columns]),
+        )
+
+
+def load_scores(cursor, clauses, params, chunk_size=FETCH_CHUNK_SIZE, archived=()):
+    # archived: further (testers, question_ids, scores) chunks, e.g. archive.iter_score_arrays()
+    import numpy as np
+    import pandas as pd
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor.execute(ANALYTICS_QUERY.format(where=where), params)
+    testers, question_ids, scores = [], [], []
+    for tester_array, question_array, score_array in itertools.chain(archived, _score_arrays(cursor, chunk_size)):
+        testers.append(tester_array)
+        question_ids.append(question_array)
+        scores.append(score_array)
+    if not scores:
+        testers, question_ids, scores = [np.empty(0, dtype=object)], [np.empty(0)], [np.empty((0, len(SCORE_COLUMNS)))]
+    frame = pd.DataFrame(np.concatenate(scores), columns=SCORE_COLUMNS)
+    frame.insert(0, 'tester_name', pd.Categorical(np.concatenate(testers)))
+    frame.insert(1, 'question_id', pd.array(np.concatenate(question_ids), dtype='Int64'))
+    return frame
+
+
+def _number(value):
+    # NumPy scalars and NaN into JSON-friendly Python values
+    import numpy as np
+    import pandas as pd
+
+    if value is None or value is pd.NA:
+        return None
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def distribution(values):
+    import numpy as np
+
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {"count": 0}
+    levels, counts = np.unique(values, return_counts=True)
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        # Scores are small integers, so the histogram has one bucket per distinct score
+        "histogram": {f"{level:g}": int(count) for level, count in zip(levels, counts)},
+    }
+
+
+def tester_zscores(frame):
+    # Each score relative to its tester's own mean and spread, removing harsh/lenient tester bias.
+    # A tester who always gives the same score has zero spread; their z-scores are 0.
+    scores = frame[list(SCORE_COLUMNS)]
+    grouped = scores.groupby(frame['tester_name'], observed=True)
+    spread = grouped.transform('std', ddof=0)
+    zscores = (scores - grouped.transform('mean')) / spread.where(spread > 0)
+    return zscores.where(spread != 0, 0.0).where(scores.notna())
+
+
+def summarize(frame, top):
+    scores = frame[list(SCORE_COLUMNS)]
+    zscores = tester_zscores(frame)
+    overall = scores.mean()
+
+    correlations = scores.corr()
+    result = {
+        "response_count": int(len(frame)),
+        "tester_count": int(frame['tester_name'].nunique()),
+        "question_count": int(frame['question_id'].nunique()),
+        "distributions": {column: distribution(scores[column].to_numpy()) for column in SCORE_COLUMNS},
+        "correlations": {
+            row: {column: _number(correlations.at[row, column]) for column in SCORE_COLUMNS}
+            for row in SCORE_COLUMNS
+        },
+    }
+
+    by_tester = scores.groupby(frame['tester_name'], observed=True)
+    tester_table = by_tester.mean().add_prefix('mean_')
+    tester_table['response_count'] = by_tester.size()
+    tester_table = tester_table.sort_values('response_count', ascending=False).head(top)
+    result["testers"] = [
+        {
+            "tester_name": tester,
+            "response_count": int(row['response_count']),
+            **{f"mean_{column}": _number(row[f'mean_{column}']) for column in SCORE_COLUMNS},
+            # Positive bias: this tester scores higher than everyone else on average
+            **{f"bias_{column}": _number(row[f'mean_{column}'] - overall[column]) for column in SCORE_COLUMNS},
+        }
+        for tester, row in tester_table.iterrows()
+    ]
+
+    by_question = frame['question_id']
+    question_table = scores.groupby(by_question).mean().add_prefix('mean_')
+    question_table = question_table.join(zscores.groupby(by_question).mean().add_prefix('normalized_'))
+    question_table['response_count'] = scores.groupby(by_question).size()
+    question_table = question_table.sort_values('response_count', ascending=False).head(top)
+    result["questions"] = [
+        {
+            "question_id": int(question_id),
+            "response_count": int(row['response_count']),
+            **{f"mean_{column}": _number(row[f'mean_{column}']) for column in SCORE_COLUMNS},
+            # Mean tester-relative z-score: positive means testers rated it above their own norm
+            **{f"normalized_{column}": _number(row[f'normalized_{column}']) for column in SCORE_COLUMNS},
+        }
+        for question_id, row in question_table.iterrows()
+    ]
+    return result
+
+
+def attach_question_text(cursor, result):
+    ids = [question['question_id'] for question in result['questions']]
+    if not ids:
+        return result
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"SELECT id, question FROM questions WHERE id IN ({placeholders})", ids)
+    text = dict(cursor.fetchall())
+    for question in result['questions']:
+        question['question'] = text.get(question['question_id'])
+    return result
+
+
+class ResultCache:
+    # Analytics results memoized per data version. Writers call bump() after committing,
+    # which drops every cached result; until then repeated requests never recompute.
+    def __init__(self, max_entries=64, ttl=0):
+        self.max_entries = max_entries
+        # Optional expiry, for writes made by other processes that cannot bump this cache
+        self.ttl = ttl
+        self.version = 0
+        # Distinguishes this process's versions from another worker's in ETags
+        self._instance = uuid.uuid4().hex[:8]
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def etag(self, key, version):
+        digest = hashlib.md5(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return f"{self._instance}-{version}-{digest}"
+
+    def get_or_compute(self, key, compute):
+        # Returns (value, etag); compute() runs outside the lock
+        cache_key = json.dumps(key, sort_keys=True, default=str)
+        now = time.monotonic()
+        with self._lock:
+            version = self.version
+            entry = self._entries.get(cache_key)
+            if entry is not None and (not self.ttl or entry[1] > now):
+                return entry[0], self.etag(key, version)
+
+        value = compute()
+        with self._lock:
+            # A write that landed while computing makes this result stale; do not keep it
+            if self.version == version:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[cache_key] = (value, now + self.ttl)
+        return value, self.etag(key, version)
@@ -1,159 +1,611 @@
-from flask import Flask, request, jsonify
+from flask import (
+    Blueprint, Flask, Response, current_app, g, has_app_context, jsonify, request, stream_with_context
+)
 from flask_cors import CORS
-import mysql.connector
-import pandas as pd
+from werkzeug.middleware.proxy_fix import ProxyFix
+import storage
+from db_pool import ConnectionPool
+import metrics
+from app_logging import configure_logging, sampled
+from config import load_config
+import rollups
+import export
+import search
+import questions
+import analytics
+import archive
+import admission
+import compression
+import change_log
+import events
+import idempotency
+import importer
+import json_response
+import session_details
+from lookup_cache import TTLCache
+from ingest_queue import IngestQueue, start_workers
+from session_filters import (
+    parse_fields, parse_limit, parse_session_filters, parse_filter_values, session_filter_clauses,
+    select_list, join_list, keyset_clause, encode_cursor, MAX_PAGE_SIZE, MAX_STREAM_PAGE_SIZE
+)
 from datetime import datetime
+import functools
+import itertools
+from email.utils import parsedate_to_datetime
 import os
+import time
+import logging
 # No dotenv is used in this code
 import pytz
 
-app = Flask(__name__)
-CORS(app, resources={
-    r"/api/*": {
-        "origins": ["http://localhost:3000"],
-        "methods": ["GET", "POST", "PUT", "DELETE"],
-        "allow_headers": ["Content-Type"]
-    }
-})
-
-# Database configuration
-db_config = {
-    'host': 'localhost',
-    'user': 'admin',
-    'password': 'admin',
-    'database': 'genai_tests'
-}
+logger = logging.getLogger('feedback.app')
+
+# Every route and request hook; create_app() registers them on a new Flask app
+bp = Blueprint('feedback', __name__)
+
+# Process-wide services, built from the configuration by create_app()
+db_pool = None
+write_limiter = None
+rate_limiter = None
+lookup_cache = None
+analytics_cache = None
+event_hub = None
+changes = None
+# Question text -> questions.id, cached in-process; shared by the submit, edit and import paths
+question_catalog = None
+ingest_queue = None
 
 def get_db_connection():
-    return mysql.connector.connect(**db_config)
+    started = time.perf_counter()
+    conn = db_pool.acquire()
+    metrics.DB_ACQUIRE_DURATION.observe(time.perf_counter() - started, route=metrics.current_route())
+    # Track checkouts per request so teardown can return anything a handler forgot
+    if has_app_context():
+        g.setdefault('db_connections', []).append(conn)
+    return conn
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = metrics.current_route()
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - started, route=route, method=request.method)
+        metrics.REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+def too_many_requests(message, retry_after, reason):
+    metrics.ADMISSION_REJECTED.inc(route=metrics.current_route(), reason=reason)
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def admission_controlled(handler):
+    # Rate limit per client, then hold a write slot for the duration of the handler; reads pass through
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return handler(*args, **kwargs)
+        if rate_limiter is not None:
+            wait = rate_limiter.consume(request.remote_addr)
+            if wait:
+                return too_many_requests("Too many requests, slow down", wait, 'rate_limited')
+        if not write_limiter.acquire():
+            return too_many_requests("Server is busy, try again shortly", write_limiter.retry_after(), 'overloaded')
+        started = time.monotonic()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            write_limiter.release(time.monotonic() - started)
+    return wrapper
+
+@bp.after_app_request
+def compress_response(response):
+    return compression.compress_response(response, request.accept_encodings,
+                                       current_app.config['COMPRESS_MIN_SIZE'])
+
+@bp.teardown_app_request
+def release_db_connections(exc):
+    for conn in g.pop('db_connections', []):
+        conn.close()
+
+def load_lookup_table(table):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"SELECT * FROM {table}")
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+def cached_lookup_response(table, cache_control):
+    rows, etag = lookup_cache.get_or_load(table, lambda: load_lookup_table(table))
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(rows)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 # Public API endpoints
-@app.route('/api/divisions', methods=['GET'])
+@bp.route('/api/divisions', methods=['GET'])
 def get_divisions():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM divisions")
-        divisions = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(divisions), 200
+        return cached_lookup_response('divisions', f"public, max-age={lookup_cache.ttl}")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/venues', methods=['GET'])
+@bp.route('/api/venues', methods=['GET'])
 def get_venues():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM venues")
-        venues = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(venues), 200
+        return cached_lookup_response('venues', f"public, max-age={lookup_cache.ttl}")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/submit-feedback', methods=['POST'])
+def validate_score(value, field):
+    # bool is a subclass of int, so True would otherwise be stored as 1
+    low, high = importer.SCORE_RANGE
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(f"{field} must be an integer from {low} to {high}")
+
+def validate_submission(data):
+    if not data or 'tester_name' not in data or 'division_id' not in data or 'venue_id' not in data:
+        raise ValueError("Invalid data")
+    if not data.get('responses'):
+        raise ValueError("At least one response is required")
+    if not isinstance(data['responses'], list):
+        raise ValueError("responses must be a list")
+    # Checked up front: in write-behind mode a bad response would otherwise only fail in the worker
+    for response in data['responses']:
+        if not isinstance(response, dict):
+            raise ValueError("Each response must be an object")
+        missing = [field for field in ('question', 'chatbot_answer') + RESPONSE_SCORE_FIELDS if field not in response]
+        if missing:
+            raise ValueError(f"Each response needs: {', '.join(missing)}")
+        if not isinstance(response['question'], str) or not response['question'].strip():
+            raise ValueError("question must be a non-empty string")
+        for field in RESPONSE_SCORE_FIELDS:
+            validate_score(response[field], field)
+    try:
+        datetime.fromisoformat(data['session_datetime'].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
+        raise ValueError("Invalid session_datetime")
+
+# The admin list's columns: enough for a dashboard to apply an event without refetching
+EVENT_FIELDS = ['id', 'tester_name', 'division_id', 'venue_id', 'division_name', 'venue_name', 'session_datetime']
+
+def local_session_datetime(value):
+    # Convert session_datetime to GMT+8
+    local_tz = pytz.timezone('Asia/Singapore')  # GMT+8
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(local_tz)
+
+def lookup_name(table, row_id):
+    rows, _ = lookup_cache.get_or_load(table, lambda: load_lookup_table(table))
+    return next((row['name'] for row in rows if str(row['id']) == str(row_id)), None)
+
+def publish_event(cursor, event_type, data):
+    # Appended in the caller's transaction, so the event commits or rolls back with the write.
+    # Every server process reads it from the change log and publishes it (see apply_change).
+    changes.append(cursor, change_log.EVENT, event_type, json_response.dumps(data).decode())
+
+def record_invalidation(cursor, table):
+    # The other server processes clear their lookup cache when they read this from the change log
+    try:
+        changes.append(cursor, change_log.INVALIDATE, table)
+    except Exception as e:
+        logger.warning("sharing cache invalidation failed", extra={"table": table, "error": str(e)})
+
+def apply_change(change_id, kind, name, payload, own):
+    # Called by the change log follower for each row committed by this or any other process
+    if kind == change_log.EVENT:
+        event_hub.publish(change_id, name, payload.encode())
+        # Every session event also means cached analytics are stale; this process bumped its own already
+        if not own:
+            analytics_cache.bump()
+    elif not own:
+        lookup_cache.invalidate(name)
+
+def publish_created(cursor, session_id, data):
+    # Built from the submitted values, so a submit costs no extra query
+    try:
+        publish_event(cursor, 'created', {
+            'id': session_id,
+            'tester_name': data['tester_name'],
+            'division_id': data['division_id'],
+            'venue_id': data['venue_id'],
+            'division_name': lookup_name('divisions', data['division_id']),
+            'venue_name': lookup_name('venues', data['venue_id']),
+            # Stored as naive wall-clock time, and listed that way
+            'session_datetime': local_session_datetime(data['session_datetime']).replace(tzinfo=None),
+        })
+    except Exception as e:
+        logger.warning("publishing session event failed", extra={"session_id": session_id, "error": str(e)})
+
+def publish_updated(cursor, session_id):
+    # Re-read by primary key just before the commit, so the event carries what is stored
+    try:
+        cursor.execute(f"""
+            SELECT {select_list(EVENT_FIELDS)}
+            FROM feedback_sessions fs
+            {join_list(EVENT_FIELDS)}
+            WHERE fs.id = %s
+        """, (session_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            publish_event(cursor, 'updated', row if isinstance(row, dict) else dict(zip(EVENT_FIELDS, row)))
+    except Exception as e:
+        logger.warning("publishing session event failed", extra={"session_id": session_id, "error": str(e)})
+
+def insert_feedback_session(conn, cursor, data):
+    session_datetime = local_session_datetime(data['session_datetime'])
+
+    # Insert feedback session
+    session_query = """
+        INSERT INTO feedback_sessions 
+        (tester_name, division_id, venue_id, session_datetime, total_score, accuracy_score, relevancy_score, performance_score) 
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
+    # Calculate average scores
+    responses = data['responses']
+    # Resolved before anything is written, so catalog hits can be cached
+    question_ids = question_catalog.resolve(cursor, [response['question'] for response in responses], conn)
+    avg_accuracy = sum(r['accuracy_score'] for r in responses) / len(responses)
+    avg_relevancy = sum(r['relevancy_score'] for r in responses) / len(responses)
+    avg_performance = sum(r['performance_score'] for r in responses) / len(responses)
+    total_score = (avg_accuracy + avg_relevancy + avg_performance) / 3
+
+    session_values = (
+        data['tester_name'],
+        data['division_id'],
+        data['venue_id'],
+        session_datetime,
+        total_score,
+        avg_accuracy,
+        avg_relevancy,
+        avg_performance
+    )
+
+    cursor.execute(session_query, session_values)
+    session_id = cursor.lastrowid
+    rollups.apply_session(cursor, {
+        'division_id': data['division_id'],
+        'venue_id': data['venue_id'],
+        'session_datetime': session_datetime,
+        'total_score': total_score,
+        'accuracy_score': avg_accuracy,
+        'relevancy_score': avg_relevancy,
+        'performance_score': avg_performance
+    }, 1)
+
+    # Insert all feedback responses; executemany folds them into one multi-row INSERT.
+    # The question text itself lives only in the questions catalog.
+    response_query = """
+        INSERT INTO feedback_responses 
+        (session_id, question_id, chatbot_answer, accuracy_score, relevancy_score, performance_score, additional_comments)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    cursor.executemany(response_query, [
+        (
+            session_id,
+            question_id,
+            response['chatbot_answer'],
+            response['accuracy_score'],
+            response['relevancy_score'],
+            response['performance_score'],
+            response.get('additional_comments', '')
+        )
+        for response, question_id in zip(responses, question_ids)
+    ])
+    return session_id
+
+def replayed(response):
+    # Marks the answer to a retried request that was not executed again
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@bp.route('/api/submit-feedback', methods=['POST'])
+@admission_controlled
 def submit_feedback():
     try:
         data = request.json
-        print(f"Received data: {data}")
-        
-        if not data or 'tester_name' not in data or 'division_id' not in data or 'venue_id' not in data:
-            return jsonify({"error": "Invalid data"}), 400
+        if logger.isEnabledFor(logging.DEBUG) and sampled(current_app.config['PAYLOAD_LOG_SAMPLE_RATE']):
+            logger.debug("feedback payload received", extra={"payload": data})
 
-        # Convert session_datetime to GMT+8
-        local_tz = pytz.timezone('Asia/Singapore')  # GMT+8
-        session_datetime = datetime.fromisoformat(data['session_datetime'].replace('Z', '+00:00')).astimezone(local_tz)
+        try:
+            validate_submission(data)
+            idempotency_key = idempotency.parse_key(request.headers.get(idempotency.HEADER))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if ingest_queue is not None:
+            submission_id, replay = ingest_queue.enqueue(data, idempotency_key)
+            status = ingest_queue.status(submission_id)['status'] if replay else 'pending'
+            response = jsonify({"message": "Feedback queued", "submission_id": submission_id, "status": status})
+            return (replayed(response) if replay else response), 202
 
         conn = get_db_connection()
         cursor = conn.cursor()
+        if idempotency_key is not None:
+            # A retry of a submission that already committed is answered from the key alone
+            known = idempotency.lookup(cursor, [idempotency_key])
+            if idempotency_key in known:
+                return replayed(jsonify({"message": "Feedback submitted successfully",
+                                         "session_id": known[idempotency_key]})), 200
+            # End the transaction the key lookup opened (MySQL does not autocommit), so the
+            # catalog ids read next count as committed and are cached
+            conn.rollback()
+            question_catalog.lookup(cursor, [response['question'] for response in data['responses']], conn)
+            if not idempotency.claim(cursor, idempotency_key):
+                conn.rollback()
+                known = idempotency.lookup(cursor, [idempotency_key])
+                if idempotency_key in known:
+                    return replayed(jsonify({"message": "Feedback submitted successfully",
+                                             "session_id": known[idempotency_key]})), 200
+                return jsonify({"error": f"A request with this {idempotency.HEADER} is still in progress"}), 409
+        session_id = insert_feedback_session(conn, cursor, data)
+        if idempotency_key is not None:
+            idempotency.record(cursor, idempotency_key, session_id)
+        publish_created(cursor, session_id, data)
+        conn.commit()
+        analytics_cache.bump()
+        changes.notify()
+        cursor.close()
+        conn.close()
+        return jsonify({"message": "Feedback submitted successfully", "session_id": session_id}), 200
+    except Exception as e:
+        logger.exception("submit_feedback failed")
+        return jsonify({"error": str(e)}), 500
 
-        # Insert feedback session
-        session_query = """
-            INSERT INTO feedback_sessions 
-            (tester_name, division_id, venue_id, session_datetime, total_score, accuracy_score, relevancy_score, performance_score) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        # Calculate average scores
-        responses = data['responses']
-        avg_accuracy = sum(r['accuracy_score'] for r in responses) / len(responses)
-        avg_relevancy = sum(r['relevancy_score'] for r in responses) / len(responses)
-        avg_performance = sum(r['performance_score'] for r in responses) / len(responses)
-        total_score = (avg_accuracy + avg_relevancy + avg_performance) / 3
-
-        session_values = (
-            data['tester_name'],
-            data['division_id'],
-            data['venue_id'],
-            session_datetime,
-            total_score,
-            avg_accuracy,
-            avg_relevancy,
-            avg_performance
-        )
-        
-        cursor.execute(session_query, session_values)
-        session_id = cursor.lastrowid
-
-        # Insert feedback responses
-        response_query = """
-            INSERT INTO feedback_responses 
-            (session_id, question, chatbot_answer, accuracy_score, relevancy_score, performance_score, additional_comments)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        for response in data['responses']:
-            response_values = (
-                session_id,
-                response['question'],
-                response['chatbot_answer'],
-                response['accuracy_score'],
-                response['relevancy_score'],
-                response['performance_score'],
-                response.get('additional_comments', '')
-            )
-            cursor.execute(response_query, response_values)
+def insert_session_chunk(conn, cursor, sessions, keys=None):
+    # Insert and commit a chunk of sessions; returns one result dict per session.
+    # keys: optional idempotency key per session; sessions already written under theirs are not repeated.
+    # Raises if the commit itself fails, after rolling the whole chunk back.
+    keys = keys or [None] * len(sessions)
+    results = [None] * len(sessions)
+    inserted = []
+    contested = []
+    known = idempotency.lookup(cursor, keys)
+    for index, key in enumerate(keys):
+        if key in known:
+            results[index] = {"session_id": known[key], "replayed": True}
+    # Warm the question cache for the whole chunk outside a transaction: the key lookup above
+    # opens one on MySQL, and ids read inside one are not cached
+    conn.rollback()
+    question_catalog.lookup(cursor, [
+        response['question']
+        for session in sessions if isinstance(session, dict) and isinstance(session.get('responses'), list)
+        for response in session['responses'] if isinstance(response, dict) and response.get('question') is not None
+    ], conn)
+    for index, session in enumerate(sessions):
+        if results[index] is not None:
+            continue
+        try:
+            validate_submission(session)
+        except ValueError as e:
+            results[index] = {"error": str(e)}
+            continue
+        # A savepoint per session lets one bad session fail without losing the chunk
+        cursor.execute("SAVEPOINT batch_session")
+        try:
+            if keys[index] is not None and not idempotency.claim(cursor, keys[index]):
+                # Written by a concurrent retry of the same batch; its session id is read after commit
+                cursor.execute("ROLLBACK TO SAVEPOINT batch_session")
+                contested.append(index)
+                continue
+            session_id = insert_feedback_session(conn, cursor, session)
+            if keys[index] is not None:
+                idempotency.record(cursor, keys[index], session_id)
+            publish_created(cursor, session_id, session)
+            cursor.execute("RELEASE SAVEPOINT batch_session")
+            inserted.append((index, session_id))
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT batch_session")
+            results[index] = {"error": str(e)}
 
+    try:
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if inserted:
+        analytics_cache.bump()
+        changes.notify()
+    for index, session_id in inserted:
+        results[index] = {"session_id": session_id}
+    if contested:
+        known = idempotency.lookup(cursor, [keys[index] for index in contested])
+        for index in contested:
+            if keys[index] in known:
+                results[index] = {"session_id": known[keys[index]], "replayed": True}
+            else:
+                results[index] = {"error": f"A request with this {idempotency.HEADER} is still in progress"}
+    return results
+
+@bp.route('/api/submit-feedback/batch', methods=['POST'])
+@admission_controlled
+def submit_feedback_batch():
+    try:
+        data = request.json
+        if not data or not isinstance(data.get('sessions'), list):
+            return jsonify({"error": "Expected a 'sessions' list"}), 400
+        chunk_size = int(data.get('chunk_size') or current_app.config['SUBMIT_BATCH_CHUNK_SIZE'])
+        if chunk_size < 1:
+            return jsonify({"error": "chunk_size must be positive"}), 400
+        try:
+            idempotency_key = idempotency.parse_key(request.headers.get(idempotency.HEADER))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        sessions = data['sessions']
+        keys = idempotency.batch_keys(idempotency_key, len(sessions))
+        results = []
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        for chunk_start in range(0, len(sessions), chunk_size):
+            chunk = sessions[chunk_start:chunk_start + chunk_size]
+            try:
+                chunk_results = insert_session_chunk(conn, cursor, chunk, keys[chunk_start:chunk_start + chunk_size])
+            except Exception as e:
+                chunk_results = [{"error": f"Chunk commit failed: {e}"} for _ in chunk]
+            for offset, result in enumerate(chunk_results):
+                results.append({"index": chunk_start + offset, **result})
+
         cursor.close()
         conn.close()
-        return jsonify({"message": "Feedback submitted successfully", "session_id": session_id}), 200
+        succeeded = sum(1 for r in results if 'session_id' in r)
+        return jsonify({
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        }), 200
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception("submit_feedback_batch failed")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/feedback-sessions', methods=['GET'])
+def write_queued_submissions(submission_ids, payloads):
+    # Keyed by submission id, so a batch redelivered after a lost completion is not written twice
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        keys = [f"ingest:{submission_id}" for submission_id in submission_ids]
+        results = insert_session_chunk(conn, cursor, payloads, keys=keys)
+        cursor.close()
+        return results
+    finally:
+        conn.close()
+
+@bp.route('/api/submit-feedback/status/<submission_id>', methods=['GET'])
+def get_submission_status(submission_id):
+    if ingest_queue is None:
+        return jsonify({"error": "Write-behind mode is not enabled"}), 404
+    status = ingest_queue.status(submission_id)
+    if status is None:
+        return jsonify({"error": "Submission not found"}), 404
+    return jsonify(status), 200
+
+# Rows fetched from the database per NDJSON chunk
+NDJSON_CHUNK_SIZE = 500
+
+def stream_session_page(conn, query, params, limit):
+    # One session per line as the cursor yields them, then a {"next_cursor": ...} line
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query, params + [limit + 1])
+        names = cursor.column_names
+        sent = 0
+        last = None
+        while sent < limit:
+            rows = cursor.fetchmany(min(NDJSON_CHUNK_SIZE, limit + 1 - sent))
+            if not rows:
+                break
+            sessions = [dict(zip(names, row)) for row in rows[:limit - sent]]
+            sent += len(rows)
+            if sessions:
+                last = sessions[-1]
+                yield json_response.ndjson(sessions)
+        # Drain the result; a row beyond the limit only tells us another page exists
+        remaining = cursor.fetchall()
+        next_cursor = None
+        if sent > limit or remaining:
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+        yield json_response.ndjson([{"next_cursor": next_cursor}])
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        conn.close()
+
+@bp.route('/api/admin/feedback-sessions', methods=['GET'])
 def get_all_feedback_sessions():
+    stream = request.args.get('format') == 'ndjson'
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        limit = parse_limit(request.args.get('limit'), maximum=MAX_STREAM_PAGE_SIZE if stream else MAX_PAGE_SIZE)
+        clauses, params = parse_session_filters(request.args)
+        if request.args.get('cursor'):
+            clause, cursor_params = keyset_clause(request.args['cursor'])
+            clauses.append(clause)
+            params.extend(cursor_params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = """
-            SELECT fs.*, d.name as division_name, v.name as venue_name,
-                   GROUP_CONCAT(fr.question) as questions,
-                   GROUP_CONCAT(fr.chatbot_answer) as answers,
-                   GROUP_CONCAT(fr.additional_comments) as comments
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"""
+            SELECT {select_list(fields)}
             FROM feedback_sessions fs
-            LEFT JOIN divisions d ON fs.division_id = d.id
-            LEFT JOIN venues v ON fs.venue_id = v.id
-            LEFT JOIN feedback_responses fr ON fs.id = fr.session_id
-            GROUP BY fs.id
-            ORDER BY fs.created_at DESC
+            {join_list(fields)}
+            {where}
+            ORDER BY fs.created_at DESC, fs.id DESC
+            LIMIT %s
         """
-        
-        cursor.execute(query)
+        if stream:
+            return Response(
+                stream_with_context(stream_session_page(conn, query, params, limit)),
+                mimetype='application/x-ndjson'
+            )
+
+        cursor = conn.cursor(dictionary=True)
+        # Fetch one extra row to know whether another page exists
+        cursor.execute(query, params + [limit + 1])
         sessions = cursor.fetchall()
-        
+
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            last = sessions[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+
         cursor.close()
         conn.close()
-        return jsonify(sessions), 200
+        return jsonify({"sessions": sessions, "next_cursor": next_cursor}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/feedback-session/<int:session_id>', methods=['GET', 'PUT'])
+@bp.route('/api/admin/feedback-sessions/details', methods=['GET'])
+def get_feedback_session_details():
+    # Many sessions with their responses in two queries. ?ids=1,2,3 fetches those sessions;
+    # without ids, the list's filters, limit and cursor select a page, and next_cursor lets a
+    # reviewer's client prefetch the following page while the current one is being read.
+    try:
+        if request.args.get('ids'):
+            ids = session_details.parse_ids(request.args['ids'])
+        else:
+            ids = None
+            limit = parse_limit(request.args.get('limit'), maximum=session_details.MAX_DETAIL_IDS)
+            clauses, params = parse_session_filters(request.args)
+            if request.args.get('cursor'):
+                clause, cursor_params = keyset_clause(request.args['cursor'])
+                clauses.append(clause)
+                params.extend(cursor_params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        if ids is not None:
+            sessions, missing = session_details.details_by_ids(conn, ids)
+            body = {"sessions": sessions, "missing": missing}
+        else:
+            sessions, next_cursor = session_details.details_page(conn, clauses, params, limit)
+            body = {"sessions": sessions, "next_cursor": next_cursor}
+        conn.close()
+        return jsonify(body), 200
+    except Exception as e:
+        logger.exception("get_feedback_session_details failed")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/feedback-session/<int:session_id>', methods=['GET', 'PUT'])
+@admission_controlled
 def manage_feedback_session(session_id):
     try:
         conn = get_db_connection()
@@ -163,13 +615,14 @@ def manage_feedback_session(session_id):
             # Get session details with responses
             query = """
                 SELECT fs.*, d.name as division_name, v.name as venue_name,
-                       fr.id as response_id, fr.question, fr.chatbot_answer,
+                       fr.id as response_id, q.question, fr.chatbot_answer,
                        fr.accuracy_score, fr.relevancy_score, fr.performance_score,
                        fr.additional_comments
                 FROM feedback_sessions fs
                 LEFT JOIN divisions d ON fs.division_id = d.id
                 LEFT JOIN venues v ON fs.venue_id = v.id
                 LEFT JOIN feedback_responses fr ON fs.id = fr.session_id
+                LEFT JOIN questions q ON q.id = fr.question_id
                 WHERE fs.id = %s
             """
             cursor.execute(query, (session_id,))
@@ -198,36 +651,37 @@ def manage_feedback_session(session_id):
             
         elif request.method == 'PUT':
             data = request.json
+            before = rollups.snapshot(cursor, session_id, for_update=True)
             
             # Update session
             update_query = """
                 UPDATE feedback_sessions
                 SET tester_name = %s, division_id = %s, venue_id = %s,
-                    session_datetime = %s, total_score = %s
+                    session_datetime = %s, version = version + 1
                 WHERE id = %s
             """
             cursor.execute(update_query, (
                 data['tester_name'],
                 data['division_id'],
                 data['venue_id'],
-                datetime.fromisoformat(data['session_datetime'].replace('Z', '+00:00')),
-                data['total_score'],
+                parse_session_datetime(data['session_datetime']),
                 session_id
             ))
             
             # Update responses
-            for response in data['responses']:
+            question_ids = question_catalog.resolve(cursor, [response['question'] for response in data['responses']], conn)
+            for response, question_id in zip(data['responses'], question_ids):
                 if 'id' in response:
                     # Update existing response
                     update_response_query = """
                         UPDATE feedback_responses
-                        SET question = %s, chatbot_answer = %s,
+                        SET question_id = %s, chatbot_answer = %s,
                             accuracy_score = %s, relevancy_score = %s,
                             performance_score = %s, additional_comments = %s
                         WHERE id = %s AND session_id = %s
                     """
                     cursor.execute(update_response_query, (
-                        response['question'],
+                        question_id,
                         response['chatbot_answer'],
                         response['accuracy_score'],
                         response['relevancy_score'],
@@ -240,13 +694,13 @@ def manage_feedback_session(session_id):
                     # Insert new response
                     insert_response_query = """
                         INSERT INTO feedback_responses
-                        (session_id, question, chatbot_answer, accuracy_score,
+                        (session_id, question_id, chatbot_answer, accuracy_score,
                          relevancy_score, performance_score, additional_comments)
                         VALUES (%s, %s, %s, %s, %s, %s, %s)
                     """
                     cursor.execute(insert_response_query, (
                         session_id,
-                        response['question'],
+                        question_id,
                         response['chatbot_answer'],
                         response['accuracy_score'],
                         response['relevancy_score'],
@@ -254,72 +708,67 @@ def manage_feedback_session(session_id):
                         response.get('additional_comments', '')
                     ))
             
+            recompute_session_scores(cursor, session_id)
+            rollups.apply_change(cursor, before, rollups.snapshot(cursor, session_id))
+            publish_updated(cursor, session_id)
             conn.commit()
+            analytics_cache.bump()
+            changes.notify()
             return jsonify({"message": "Session updated successfully"}), 200
             
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception("manage_feedback_session failed")
         return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # Admin API endpoints
-@app.route('/api/admin/division', methods=['POST'])
+@bp.route('/api/admin/division', methods=['POST'])
 def add_division():
     try:
         data = request.json
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("INSERT INTO divisions (name) VALUES (%s)", (data['name'],))
+        record_invalidation(cursor, 'divisions')
         conn.commit()
+        lookup_cache.invalidate('divisions')
         cursor.close()
         conn.close()
         return jsonify({"message": "Division added successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/venue', methods=['POST'])
+@bp.route('/api/admin/venue', methods=['POST'])
 def add_venue():
     try:
         data = request.json
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("INSERT INTO venues (name) VALUES (%s)", (data['name'],))
+        record_invalidation(cursor, 'venues')
         conn.commit()
+        lookup_cache.invalidate('venues')
         cursor.close()
         conn.close()
         return jsonify({"message": "Venue added successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/divisions', methods=['GET'])
+# Admin pages revalidate on every load so edits show up immediately
+@bp.route('/api/admin/divisions', methods=['GET'])
 def get_all_divisions():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM divisions")
-        divisions = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(divisions), 200
+        return cached_lookup_response('divisions', "no-cache")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/venues', methods=['GET'])
+@bp.route('/api/admin/venues', methods=['GET'])
 def get_all_venues():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM venues")
-        venues = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(venues), 200
+        return cached_lookup_response('venues', "no-cache")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/division/<int:division_id>', methods=['DELETE'])
+@bp.route('/api/admin/division/<int:division_id>', methods=['DELETE'])
 def delete_division(division_id):
     try:
         conn = get_db_connection()
@@ -331,14 +780,16 @@ def delete_division(division_id):
             return jsonify({"error": "Cannot delete division as it is being used in feedback sessions"}), 400
         
         cursor.execute("DELETE FROM divisions WHERE id = %s", (division_id,))
+        record_invalidation(cursor, 'divisions')
         conn.commit()
+        lookup_cache.invalidate('divisions')
         cursor.close()
         conn.close()
         return jsonify({"message": "Division deleted successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/venue/<int:venue_id>', methods=['DELETE'])
+@bp.route('/api/admin/venue/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
     try:
         conn = get_db_connection()
@@ -350,67 +801,341 @@ def delete_venue(venue_id):
             return jsonify({"error": "Cannot delete venue as it is being used in feedback sessions"}), 400
         
         cursor.execute("DELETE FROM venues WHERE id = %s", (venue_id,))
+        record_invalidation(cursor, 'venues')
         conn.commit()
+        lookup_cache.invalidate('venues')
         cursor.close()
         conn.close()
         return jsonify({"message": "Venue deleted successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/venue/<int:venue_id>', methods=['PUT'])
+@bp.route('/api/admin/venue/<int:venue_id>', methods=['PUT'])
 def update_venue(venue_id):
     try:
         data = request.json
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("UPDATE venues SET name = %s WHERE id = %s", (data['name'], venue_id))
+        record_invalidation(cursor, 'venues')
         conn.commit()
+        lookup_cache.invalidate('venues')
         cursor.close()
         conn.close()
         return jsonify({"message": "Venue updated successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/division/<int:division_id>', methods=['PUT'])
+@bp.route('/api/admin/division/<int:division_id>', methods=['PUT'])
 def update_division(division_id):
     try:
         data = request.json
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("UPDATE divisions SET name = %s WHERE id = %s", (data['name'], division_id))
+        record_invalidation(cursor, 'divisions')
         conn.commit()
+        lookup_cache.invalidate('divisions')
         cursor.close()
         conn.close()
         return jsonify({"message": "Division updated successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.errorhandler(Exception)
+def flag(args, name, default=False):
+    # A yes/no query parameter; present without a value means yes
+    value = args.get(name)
+    if value is None:
+        return default
+    return value.lower() not in ('false', '0', 'no')
+
+def include_archive(args):
+    # Export and analytics read archived sessions too unless include_archive=false
+    return flag(args, 'include_archive', default=True)
+
+@bp.route('/api/admin/export', methods=['GET'])
+def export_feedback():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in export.EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(export.EXPORT_FORMATS)}"}), 400
+    try:
+        filters = parse_filter_values(request.args)
+        clauses, params = session_filter_clauses(filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        chunks = export.iter_row_chunks(conn, clauses, params)
+        if include_archive(request.args):
+            # Archived months are older than anything still in the database, so they come first
+            chunks = itertools.chain(archive.iter_export_chunks(filters), chunks)
+        mimetype, extension = export.EXPORT_FORMATS[fmt]
+        filename = f"feedback-{datetime.now():%Y%m%d-%H%M%S}.{extension}"
+        return Response(
+            stream_with_context(export.stream_export(fmt, chunks)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/import', methods=['POST'])
+def import_feedback():
+    # Streams NDJSON progress, one line per committed batch and a final summary line.
+    # Not admission controlled: an import holds one connection for minutes, and its
+    # batches are large transactions rather than a burst of small ones.
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({"error": "Expected a multipart 'file' upload"}), 400
+    fmt = request.args.get('format') or os.path.splitext(upload.filename)[1].lstrip('.').lower()
+    if fmt not in importer.IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(importer.IMPORT_FORMATS)}"}), 400
+    dry_run = flag(request.args, 'dry_run')
+    try:
+        batch_size = int(request.args.get('batch_size') or current_app.config['IMPORT_BATCH_SIZE'])
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        rows = importer.read_rows(upload.stream, fmt)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("The file is empty")
+        importer.parse_header(header[1])
+        rows.close()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        import_id = request.args.get('import_id') or importer.file_fingerprint(upload.stream)
+        # Start over from the header now that it has been checked
+        upload.stream.seek(0)
+        rows = importer.read_rows(upload.stream, fmt)
+        if flag(request.args, 'restart') and not dry_run:
+            importer.reset_checkpoint(conn, import_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        try:
+            for progress in importer.import_rows(conn, rows, import_id, dry_run,
+                                                 flag(request.args, 'create_missing'), batch_size,
+                                                 question_catalog):
+                if progress.get('done'):
+                    if not dry_run:
+                        # Too many sessions for individual events; dashboards reload instead
+                        try:
+                            importer.announce(conn, progress, changes)
+                            changes.notify()
+                        except Exception as e:
+                            logger.warning("announcing import failed", extra={"import_id": import_id, "error": str(e)})
+                    if progress['created_divisions']:
+                        lookup_cache.invalidate('divisions')
+                    if progress['created_venues']:
+                        lookup_cache.invalidate('venues')
+                elif progress['sessions_imported'] and not dry_run:
+                    analytics_cache.bump()
+                yield json_response.ndjson([progress])
+        except Exception as e:
+            logger.exception("import_feedback failed")
+            yield json_response.ndjson([{"error": str(e)}])
+        finally:
+            conn.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+SEARCH_MAX_OFFSET = 10000
+
+@bp.route('/api/admin/search', methods=['GET'])
+def search_feedback():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        clauses, params = parse_session_filters(request.args)
+        limit = parse_limit(request.args.get('limit'), default=20, maximum=100)
+        offset = int(request.args.get('offset', 0))
+        if offset < 0 or offset > SEARCH_MAX_OFFSET:
+            raise ValueError(f"offset must be between 0 and {SEARCH_MAX_OFFSET}")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        hits, next_offset = search.search(
+            cursor, query, request.args.get('mode') == 'boolean', clauses, params, limit, offset
+        )
+        cursor.close()
+        conn.close()
+        return jsonify({"hits": hits, "next_offset": next_offset}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/stats', methods=['GET'])
+def get_stats():
+    granularity = request.args.get('granularity', 'day')
+    dimension = request.args.get('dimension', 'division')
+    if granularity not in rollups.GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of {', '.join(rollups.GRANULARITIES)}"}), 400
+    if dimension not in rollups.DIMENSIONS:
+        return jsonify({"error": f"dimension must be one of {', '.join(rollups.DIMENSIONS)}"}), 400
+    try:
+        dimension_id = request.args.get('dimension_id', type=int)
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        date_from = datetime.fromisoformat(date_from).date() if date_from else None
+        date_to = datetime.fromisoformat(date_to).date() if date_to else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        stats = rollups.query_stats(cursor, granularity, dimension, dimension_id, date_from, date_to)
+        cursor.close()
+        conn.close()
+        return jsonify(stats), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/questions/<int:question_id>/stats', methods=['GET'])
+def get_question_stats(question_id):
+    try:
+        clauses, params = parse_session_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        stats = questions.question_stats(cursor, question_id, clauses, params)
+        cursor.close()
+        conn.close()
+        if stats is None:
+            return jsonify({"error": "Question not found"}), 404
+        return jsonify(stats), 200
+    except Exception as e:
+        logger.exception("get_question_stats failed", extra={"question_id": question_id})
+        return jsonify({"error": str(e)}), 500
+
+ANALYTICS_TOP = 50
+
+@bp.route('/api/admin/analytics', methods=['GET'])
+def get_analytics():
+    try:
+        filters = parse_filter_values(request.args)
+        clauses, params = session_filter_clauses(filters)
+        top = parse_limit(request.args.get('top'), default=ANALYTICS_TOP)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with_archive = include_archive(request.args)
+
+    def compute():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            archived = archive.iter_score_arrays(filters, analytics.FETCH_CHUNK_SIZE) if with_archive else ()
+            frame = analytics.load_scores(cursor, clauses, params, archived=archived)
+            return analytics.attach_question_text(cursor, analytics.summarize(frame, top))
+        finally:
+            cursor.close()
+            conn.close()
+
+    try:
+        key = {"filters": request.args.to_dict(), "top": top,
+               # The archiver runs in another process, so a new archive file must change the key
+               "archive": archive.version() if with_archive else None}
+        result, etag = analytics_cache.get_or_compute(key, compute)
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(result)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        logger.exception("get_analytics failed")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    pool = db_pool.stats()
+    gauges = [
+        ('feedback_db_pool_size', "Configured pool size", pool['size']),
+        ('feedback_db_pool_in_use', "Connections currently checked out", pool['in_use']),
+        ('feedback_db_pool_idle', "Idle pooled connections", pool['idle']),
+        ('feedback_db_pool_wait_seconds_total', "Total time spent waiting for a connection", pool['wait_time_total']),
+        ('feedback_db_pool_timeouts_total', "Checkouts that timed out", pool['timeouts']),
+    ]
+    writes = write_limiter.stats()
+    gauges.extend([
+        ('feedback_write_slots_in_use', "Write requests currently running", writes['active']),
+        ('feedback_write_queue_depth', "Write requests waiting for a slot", writes['waiting']),
+    ])
+    subscribers = event_hub.stats()
+    gauges.extend([
+        ('feedback_event_subscribers', "Connected /api/admin/events clients", subscribers['subscribers']),
+        ('feedback_events_published_total', "Session events published", subscribers['published']),
+        ('feedback_event_overflows_total', "Subscribers reset after falling behind", subscribers['overflows']),
+    ])
+    if ingest_queue is not None:
+        gauges.append(('feedback_ingest_queue_depth', "Queued submissions not yet written", ingest_queue.depth()))
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/api/admin/events', methods=['GET'])
+def stream_events():
+    # EventSource resends the last id it saw in Last-Event-ID when it reconnects;
+    # last_event_id lets a page that kept the id itself resume on its first connection
+    subscription = event_hub.subscribe(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    if subscription is None:
+        response = jsonify({"error": "Too many event subscribers"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(events.RETRY_MS // 1000)
+        return response
+    return Response(
+        event_hub.stream(subscription, current_app.config['EVENTS_HEARTBEAT_INTERVAL']),
+        mimetype='text/event-stream',
+        # Proxies such as nginx must pass each event on as soon as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@bp.route('/api/admin/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    return jsonify(db_pool.stats()), 200
+
+@bp.route('/api/admin/admission', methods=['GET'])
+def get_admission_stats():
+    return jsonify(write_limiter.stats()), 200
+
+@bp.app_errorhandler(Exception)
 def handle_error(error):
-    print(f"Error: {str(error)}")
+    logger.error("unhandled error", exc_info=error)
     response = {"error": str(error)}
     if hasattr(error, 'code'):
         return jsonify(response), error.code
     return jsonify(response), 500
 
-@app.route('/api/admin/feedback-session/<int:session_id>', methods=['PUT'])
+@bp.route('/api/admin/feedback-session/<int:session_id>', methods=['PUT'])
+@admission_controlled
 def update_feedback_session(session_id):
     try:
         data = request.json
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Log the incoming data for debugging
-        print(f"Updating session {session_id} with data: {data}")
+        if logger.isEnabledFor(logging.DEBUG) and sampled(current_app.config['PAYLOAD_LOG_SAMPLE_RATE']):
+            logger.debug("session update payload received", extra={"session_id": session_id, "payload": data})
 
         # Convert session_datetime to a valid format
         session_datetime = datetime.strptime(data['session_datetime'], '%a, %d %b %Y %H:%M:%S %Z')
+        before = rollups.snapshot(cursor, session_id, for_update=True)
 
         # Update the feedback session
         update_query = """
             UPDATE feedback_sessions
             SET tester_name = %s, division_id = %s, venue_id = %s,
-                session_datetime = %s
+                session_datetime = %s, version = version + 1
             WHERE id = %s
         """
         cursor.execute(update_query, (
@@ -422,18 +1147,19 @@ def update_feedback_session(session_id):
         ))
 
         # Update responses
-        for response in data['responses']:
+        question_ids = question_catalog.resolve(cursor, [response['question'] for response in data['responses']], conn)
+        for response, question_id in zip(data['responses'], question_ids):
             if 'id' in response:
                 # Update existing response
                 update_response_query = """
                     UPDATE feedback_responses
-                    SET question = %s, chatbot_answer = %s,
+                    SET question_id = %s, chatbot_answer = %s,
                         accuracy_score = %s, relevancy_score = %s,
                         performance_score = %s, additional_comments = %s
                     WHERE id = %s AND session_id = %s
                 """
                 cursor.execute(update_response_query, (
-                    response['question'],
+                    question_id,
                     response['chatbot_answer'],
                     response['accuracy_score'],
                     response['relevancy_score'],
@@ -446,13 +1172,13 @@ def update_feedback_session(session_id):
                 # Insert new response
                 insert_response_query = """
                     INSERT INTO feedback_responses
-                    (session_id, question, chatbot_answer, accuracy_score,
+                    (session_id, question_id, chatbot_answer, accuracy_score,
                      relevancy_score, performance_score, additional_comments)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """
                 cursor.execute(insert_response_query, (
                     session_id,
-                    response['question'],
+                    question_id,
                     response['chatbot_answer'],
                     response['accuracy_score'],
                     response['relevancy_score'],
@@ -460,35 +1186,316 @@ def update_feedback_session(session_id):
                     response.get('additional_comments', '')
                 ))
 
+        recompute_session_scores(cursor, session_id)
+        rollups.apply_change(cursor, before, rollups.snapshot(cursor, session_id))
+        publish_updated(cursor, session_id)
         conn.commit()
+        analytics_cache.bump()
+        changes.notify()
         cursor.close()
         conn.close()
         return jsonify({"message": "Session updated successfully"}), 200
     except Exception as e:
-        print(f"Error updating session: {e}")  # Log the error
+        logger.exception("updating session failed", extra={"session_id": session_id})
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/admin/feedback-session/<int:session_id>', methods=['DELETE'])
+SESSION_PATCH_FIELDS = ('tester_name', 'division_id', 'venue_id', 'session_datetime')
+RESPONSE_FIELDS = ('question', 'chatbot_answer', 'accuracy_score', 'relevancy_score',
+                   'performance_score', 'additional_comments')
+RESPONSE_SCORE_FIELDS = ('accuracy_score', 'relevancy_score', 'performance_score')
+# Stored response columns: question text is kept once, in the catalog, and referenced by question_id
+RESPONSE_COLUMNS = ('question_id',) + RESPONSE_FIELDS[1:]
+
+def parse_session_datetime(value):
+    # The edit page sends back either ISO strings or the RFC 1123 form jsonify produces
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return parsedate_to_datetime(value)
+
+def recompute_session_scores(cursor, session_id):
+    # Derive the session aggregates from its responses rather than trusting the client
+    cursor.execute("""
+        UPDATE feedback_sessions SET
+            accuracy_score = (SELECT AVG(accuracy_score) FROM feedback_responses WHERE session_id = %s),
+            relevancy_score = (SELECT AVG(relevancy_score) FROM feedback_responses WHERE session_id = %s),
+            performance_score = (SELECT AVG(performance_score) FROM feedback_responses WHERE session_id = %s),
+            total_score = (
+                SELECT (AVG(accuracy_score) + AVG(relevancy_score) + AVG(performance_score)) / 3
+                FROM feedback_responses WHERE session_id = %s
+            )
+        WHERE id = %s
+    """, (session_id,) * 5)
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def validate_session_patch(data):
+    if not isinstance(data, dict) or 'version' not in data:
+        raise ValueError("version is required")
+    if not is_id(data['version']):
+        raise ValueError("version must be an integer")
+    unknown = set(data) - set(SESSION_PATCH_FIELDS) - {'version', 'responses', 'deleted_responses'}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not isinstance(data.get('responses', []), list):
+        raise ValueError("responses must be a list")
+    for response in data.get('responses', []):
+        if not isinstance(response, dict):
+            raise ValueError("Each response must be an object")
+        unknown = set(response) - set(RESPONSE_FIELDS) - {'id'}
+        if unknown:
+            raise ValueError(f"Unknown response fields: {', '.join(sorted(unknown))}")
+        if 'id' not in response:
+            missing = [f for f in RESPONSE_FIELDS if f not in response and f != 'additional_comments']
+            if missing:
+                raise ValueError(f"New responses need: {', '.join(missing)}")
+        elif not is_id(response['id']):
+            raise ValueError("Response id must be an integer")
+        for field in RESPONSE_SCORE_FIELDS:
+            if field in response:
+                validate_score(response[field], field)
+    deleted = data.get('deleted_responses', [])
+    if not isinstance(deleted, list) or not all(is_id(response_id) for response_id in deleted):
+        raise ValueError("deleted_responses must be a list of response ids")
+
+@bp.route('/api/admin/feedback-session/<int:session_id>', methods=['PATCH'])
+@admission_controlled
+def patch_feedback_session(session_id):
+    data = request.json
+    try:
+        validate_session_patch(data)
+        session_changes = {field: data[field] for field in SESSION_PATCH_FIELDS if field in data}
+        if 'session_datetime' in session_changes:
+            session_changes['session_datetime'] = parse_session_datetime(session_changes['session_datetime'])
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        before = rollups.snapshot(cursor, session_id)
+
+        # Optimistic concurrency: the update only applies to the version the client edited
+        assignments = ''.join(f"{field} = %s, " for field in session_changes)
+        cursor.execute(
+            f"UPDATE feedback_sessions SET {assignments}version = version + 1 WHERE id = %s AND version = %s",
+            (*session_changes.values(), session_id, data['version'])
+        )
+        if cursor.rowcount == 0:
+            conn.rollback()
+            cursor.execute("SELECT version FROM feedback_sessions WHERE id = %s", (session_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return jsonify({"error": "Session not found"}), 404
+            return jsonify({"error": "Session was modified by someone else", "version": row[0]}), 409
+
+        updates = [r for r in data.get('responses', []) if 'id' in r]
+        creates = [r for r in data.get('responses', []) if 'id' not in r]
+        deletes = data.get('deleted_responses', [])
+
+        referenced = {r['id'] for r in updates} | set(deletes)
+        if referenced:
+            placeholders = ', '.join(['%s'] * len(referenced))
+            cursor.execute(
+                f"SELECT id FROM feedback_responses WHERE session_id = %s AND id IN ({placeholders})",
+                (session_id, *referenced)
+            )
+            unknown = referenced - {row[0] for row in cursor.fetchall()}
+            if unknown:
+                conn.rollback()
+                return jsonify({"error": f"Unknown response ids: {sorted(unknown)}"}), 400
+
+        if deletes:
+            placeholders = ', '.join(['%s'] * len(deletes))
+            cursor.execute(
+                f"DELETE FROM feedback_responses WHERE session_id = %s AND id IN ({placeholders})",
+                (session_id, *deletes)
+            )
+
+        # New or edited question text also moves the response to its catalog entry
+        questioned = [r for r in updates + creates if 'question' in r]
+        question_ids = question_catalog.resolve(cursor, [r['question'] for r in questioned], conn)
+        for response, question_id in zip(questioned, question_ids):
+            response['question_id'] = question_id
+
+        # Group partial updates by the set of columns they touch; one executemany per group
+        groups = {}
+        for response in updates:
+            columns = tuple(field for field in RESPONSE_COLUMNS if field in response)
+            if columns:
+                groups.setdefault(columns, []).append(response)
+        for columns, responses in groups.items():
+            assignments = ', '.join(f"{column} = %s" for column in columns)
+            cursor.executemany(
+                f"UPDATE feedback_responses SET {assignments} WHERE id = %s AND session_id = %s",
+                [(*(r[column] for column in columns), r['id'], session_id) for r in responses]
+            )
+
+        if creates:
+            cursor.executemany("""
+                INSERT INTO feedback_responses
+                (session_id, question_id, chatbot_answer, accuracy_score,
+                 relevancy_score, performance_score, additional_comments)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (session_id, r['question_id'], r['chatbot_answer'], r['accuracy_score'],
+                 r['relevancy_score'], r['performance_score'], r.get('additional_comments', ''))
+                for r in creates
+            ])
+
+        if deletes or creates or any(set(r) & set(RESPONSE_SCORE_FIELDS) for r in updates):
+            recompute_session_scores(cursor, session_id)
+        after = rollups.snapshot(cursor, session_id)
+        rollups.apply_change(cursor, before, after)
+        publish_updated(cursor, session_id)
+        conn.commit()
+        analytics_cache.bump()
+        changes.notify()
+
+        cursor.execute(
+            "SELECT version, total_score, accuracy_score, relevancy_score, performance_score "
+            "FROM feedback_sessions WHERE id = %s", (session_id,)
+        )
+        version, total, accuracy, relevancy, performance = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        return jsonify({
+            "message": "Session updated successfully",
+            "version": version,
+            "total_score": total,
+            "accuracy_score": accuracy,
+            "relevancy_score": relevancy,
+            "performance_score": performance
+        }), 200
+    except Exception as e:
+        logger.exception("patch_feedback_session failed", extra={"session_id": session_id})
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin/feedback-session/<int:session_id>', methods=['DELETE'])
+@admission_controlled
 def delete_feedback_session(session_id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # Check if the feedback session exists
-        cursor.execute("SELECT COUNT(*) FROM feedback_sessions WHERE id = %s", (session_id,))
-        count = cursor.fetchone()[0]
-        if count == 0:
+        before = rollups.snapshot(cursor, session_id, for_update=True)
+        if before is None:
             return jsonify({"error": "Feedback session not found"}), 404
         
-        # Delete the feedback session
+        # Delete the responses first: there is no cascading foreign key on the partitioned tables
+        cursor.execute("DELETE FROM feedback_responses WHERE session_id = %s", (session_id,))
         cursor.execute("DELETE FROM feedback_sessions WHERE id = %s", (session_id,))
+        rollups.apply_session(cursor, before, -1)
+        try:
+            publish_event(cursor, 'deleted', {'id': session_id})
+        except Exception as e:
+            logger.warning("publishing session event failed", extra={"session_id": session_id, "error": str(e)})
         conn.commit()
+        analytics_cache.bump()
+        changes.notify()
         
         cursor.close()
         conn.close()
         return jsonify({"message": "Feedback session deleted successfully"}), 200
     except Exception as e:
+        logger.exception("delete_feedback_session failed", extra={"session_id": session_id})
         return jsonify({"error": str(e)}), 500
 
+def create_app(config=None):
+    # Builds the app and this process's services from load_config() plus any overrides in config.
+    # The services are module-wide, so a process runs one app; serve.py calls this once per worker.
+    global db_pool, write_limiter, rate_limiter, lookup_cache, analytics_cache, event_hub, changes
+    global question_catalog, ingest_queue
+    config = load_config(overrides=config)
+    configure_logging(config['LOG_LEVEL'])
+    metrics.InstrumentedCursor.slow_query_threshold = config['SLOW_QUERY_MS'] / 1000
+    # Module-level settings default to config.current(); overrides passed here replace them
+    idempotency.KEY_TTL = config['IDEMPOTENCY_KEY_TTL']
+    export.EXPORT_CHUNK_SIZE = config['EXPORT_CHUNK_SIZE']
+    archive.ARCHIVE_DIR = config['ARCHIVE_DIR']
+    importer.IMPORT_BATCH_SIZE = config['IMPORT_BATCH_SIZE']
+
+    # Database backend: MySQL by default, embedded SQLite with DB_BACKEND=sqlite (see storage.py)
+    storage.backend = storage.from_env(config)
+    db_pool = ConnectionPool(
+        storage.backend.connect,
+        size=config['DB_POOL_SIZE'],
+        timeout=config['DB_POOL_TIMEOUT'],
+        max_idle=config['DB_POOL_MAX_IDLE'],
+        ping_interval=config['DB_POOL_PING_INTERVAL'],
+        cursor_wrapper=metrics.InstrumentedCursor,
+    )
+    # Write endpoints run at most WRITE_CONCURRENCY at a time; bursts wait in a bounded queue
+    # and are answered 429 + Retry-After when it is full, instead of piling onto the database
+    write_limiter = admission.ConcurrencyLimiter(
+        limit=config['WRITE_CONCURRENCY'],
+        queue_size=config['WRITE_QUEUE_SIZE'],
+        # Well under the frontend's 5s request timeout
+        queue_timeout=config['WRITE_QUEUE_TIMEOUT'],
+    )
+    rate_limiter = admission.RateLimiter(
+        rate=config['RATE_LIMIT_PER_SECOND'],
+        burst=config['RATE_LIMIT_BURST'],
+    ) if config['RATE_LIMIT_PER_SECOND'] > 0 else None
+    # Divisions and venues change rarely, so they are served from an in-process cache
+    lookup_cache = TTLCache(config['LOOKUP_CACHE_TTL'])
+    question_catalog = questions.QuestionCatalog()
+    # Analytics results are memoized until the next committed submit, edit or delete
+    analytics_cache = analytics.ResultCache(ttl=config['ANALYTICS_CACHE_TTL'])
+    # Session changes fanned out to /api/admin/events subscribers as they are read from the change log
+    event_hub = events.EventHub(
+        history_size=config['EVENTS_HISTORY_SIZE'],
+        buffer_size=config['EVENTS_BUFFER_SIZE'],
+        max_subscribers=config['EVENTS_MAX_SUBSCRIBERS'],
+    )
+    # Events and lookup invalidations go through the change_log table, so that every server process
+    # (serve.py workers, command-line imports) sees the same events under the same ids. The follower
+    # keeps a connection of its own rather than holding one of the pool's.
+    changes = change_log.ChangeLog(
+        storage.backend.connect,
+        poll_interval=config['CHANGE_LOG_POLL_INTERVAL'],
+        retention=config['CHANGE_LOG_RETENTION'],
+    )
+    changes.start(event_hub.start_at, apply_change)
+
+    app = Flask(__name__)
+    app.config.update(config)
+    # orjson-backed jsonify with the same output as Flask's default provider
+    app.json = json_response.OrjsonProvider(app)
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": [origin.strip() for origin in config['CORS_ORIGINS'].split(',') if origin.strip()],
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE"],
+            "allow_headers": ["Content-Type", "Idempotency-Key"],
+            "expose_headers": ["Retry-After", "Idempotent-Replayed"]
+        }
+    })
+    # Behind the Next.js rewrite proxy every request comes from the proxy; trusting its
+    # X-Forwarded-For hop makes remote_addr the real client again for rate limiting
+    if config['TRUSTED_PROXIES']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config['TRUSTED_PROXIES'])
+    app.register_blueprint(bp)
+
+    # Expired idempotency keys are deleted in the background every IDEMPOTENCY_PURGE_INTERVAL seconds
+    if config['IDEMPOTENCY_PURGE_INTERVAL'] > 0:
+        idempotency.start_purger(storage.backend.connect, config['IDEMPOTENCY_KEY_TTL'], config['IDEMPOTENCY_PURGE_INTERVAL'])
+
+    # Optional write-behind mode: submissions are acknowledged once they are in the
+    # local queue and written to the database in batches by background workers
+    ingest_queue = None
+    if config['SUBMIT_MODE'] == 'write-behind':
+        ingest_queue = IngestQueue(config['INGEST_QUEUE_PATH'])
+        start_workers(
+            ingest_queue,
+            write_queued_submissions,
+            count=config['INGEST_WORKERS'],
+            batch_size=config['INGEST_BATCH_SIZE']
+        )
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000) 
\ No newline at end of file
+    # Development server with the reloader; production runs through serve.py
+    dev_app = create_app()
+    dev_app.run(debug=True, port=dev_app.config['PORT']) 
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+from datetime import date, datetime, time
+
+import config
+import export
+from partitions import add_months, month_start
+
+# Sessions older than the retention window are moved out of the database into
+# zstd-compressed Parquet files, one directory per month of session_datetime:
+#   ARCHIVE_DIR/month=YYYY-MM/part-<first session id>-<last session id>.parquet
+ARCHIVE_DIR = config.current()['ARCHIVE_DIR']
+ARCHIVE_BATCH_SIZE = 500
+# Replaced after every committed batch, so its identity is the archive's version. The leading
+# underscore keeps dataset readers from taking it for data.
+VERSION_FILE = '_version'
+
+# The export columns, plus the ids the session filters and analytics need
+ARCHIVE_COLUMNS = export.EXPORT_COLUMNS + ['division_id', 'venue_id', 'question_id']
+
+ARCHIVE_QUERY = """
+    SELECT fs.id AS session_id, fs.tester_name, d.name AS division_name, v.name AS venue_name,
+           fs.session_datetime, fs.created_at, fs.total_score,
+           fs.accuracy_score AS session_accuracy_score,
+           fs.relevancy_score AS session_relevancy_score,
+           fs.performance_score AS session_performance_score,
+           fr.id AS response_id, q.question, fr.chatbot_answer,
+           fr.accuracy_score, fr.relevancy_score, fr.performance_score, fr.additional_comments,
+           fs.division_id, fs.venue_id, fr.question_id
+    FROM feedback_sessions fs
+    LEFT JOIN divisions d ON fs.division_id = d.id
+    LEFT JOIN venues v ON fs.venue_id = v.id
+    LEFT JOIN feedback_responses fr ON fs.id = fr.session_id
+    LEFT JOIN questions q ON q.id = fr.question_id
+    WHERE fs.id IN ({ids})
+    ORDER BY fs.id, fr.id
+"""
+
+
+def archive_schema():
+    import pyarrow as pa
+
+    schema = export.parquet_schema()
+    for name in ('division_id', 'venue_id', 'question_id'):
+        schema = schema.append(pa.field(name, pa.int64()))
+    return schema
+
+
+def archive_cutoff(older_than_months, today=None):
+    # Whole months only: everything before the first day of the month older_than_months ago
+    return datetime.combine(add_months(month_start(today or date.today()), -older_than_months), time())
+
+
+def _fsync_directory(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_month(root, month, rows):
+    # Rows are one month's sessions in session id order. Written to a dot-file (which
+    # dataset readers skip) and renamed into place only once it is safely on disk.
+    import pyarrow.parquet as pq
+
+    directory = os.path.join(root, f"month={month:%Y-%m}")
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{rows[0][0]:010d}-{rows[-1][0]:010d}.parquet"
+    temporary = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(export.rows_to_table(rows, archive_schema()), temporary, compression='zstd')
+    with open(temporary, 'rb') as handle:
+        os.fsync(handle.fileno())
+    os.replace(temporary, os.path.join(directory, name))
+    _fsync_directory(directory)
+
+
+def archive_sessions(conn, older_than_months, batch_size=ARCHIVE_BATCH_SIZE, root=None, today=None):
+    # Moves sessions (and their responses) dated before the cutoff into the archive, one
+    # transaction per batch. Files are written before the rows are deleted; if the delete
+    # never commits, the next run rewrites the same batch under the same file name.
+    # Score rollups are left alone, so /api/admin/stats still covers archived months.
+    root = root or ARCHIVE_DIR
+    cutoff = archive_cutoff(older_than_months, today)
+    cursor = conn.cursor()
+    archived = 0
+    try:
+        while True:
+            conn.start_transaction()
+            cursor.execute("""
+                SELECT id FROM feedback_sessions
+                WHERE session_datetime < %s
+                ORDER BY session_datetime, id LIMIT %s FOR UPDATE
+            """, (cutoff, batch_size))
+            ids = sorted(row[0] for row in cursor.fetchall())
+            if not ids:
+                conn.rollback()
+                break
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(ARCHIVE_QUERY.format(ids=placeholders), ids)
+            by_month = {}
+            for row in cursor.fetchall():
+                by_month.setdefault(month_start(row[4]), []).append(row)
+            for month, rows in by_month.items():
+                write_month(root, month, rows)
+            cursor.execute(f"DELETE FROM feedback_responses WHERE session_id IN ({placeholders})", ids)
+            cursor.execute(f"DELETE FROM feedback_sessions WHERE id IN ({placeholders})", ids)
+            conn.commit()
+            bump_version(root)
+            archived += len(ids)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return archived
+
+
+def dataset(root=None):
+    # The whole archive as one pyarrow dataset, or None if nothing has been archived yet
+    root = root or ARCHIVE_DIR
+    if not os.path.isdir(root):
+        return None
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive')
+    return ds.dataset(root, format='parquet', schema=archive_schema().append(pa.field('month', pa.string())),
+                      partitioning=partitioning)
+
+
+def _naive(value):
+    # Stored datetimes are wall-clock values, as the database drivers write them
+    return value.replace(tzinfo=None)
+
+
+def filter_expression(values):
+    # The session filters (session_filters.parse_filter_values output) as a dataset filter.
+    # Date bounds also prune whole month directories.
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    expressions = []
+    if 'division_id' in values:
+        expressions.append(ds.field('division_id') == values['division_id'])
+    if 'venue_id' in values:
+        expressions.append(ds.field('venue_id') == values['venue_id'])
+    if 'tester' in values:
+        # Case-insensitive, like LIKE under the databases' default collations
+        expressions.append(pc.starts_with(ds.field('tester_name'), pattern=values['tester'], ignore_case=True))
+    if 'date_from' in values:
+        date_from = _naive(values['date_from'])
+        expressions.append(ds.field('month') >= f"{date_from:%Y-%m}")
+        expressions.append(ds.field('session_datetime') >= date_from)
+    if 'date_to' in values:
+        date_to = _naive(values['date_to'])
+        expressions.append(ds.field('month') <= f"{date_to:%Y-%m}")
+        expressions.append(ds.field('session_datetime') < date_to)
+    expression = None
+    for part in expressions:
+        expression = part if expression is None else expression & part
+    return expression
+
+
+def iter_batches(columns, values=None, extra_filter=None, chunk_size=None, root=None):
+    data = dataset(root)
+    if data is None:
+        return
+    expression = filter_expression(values or {})
+    if extra_filter is not None:
+        expression = extra_filter if expression is None else expression & extra_filter
+    for batch in data.to_batches(columns=columns, filter=expression, batch_size=chunk_size or export.EXPORT_CHUNK_SIZE):
+        if batch.num_rows:
+            yield batch
+
+
+def iter_export_chunks(values, chunk_size=None, root=None):
+    # Archived rows as export.iter_row_chunks yields them; division and venue names are as archived
+    for batch in iter_batches(export.EXPORT_COLUMNS, values, chunk_size=chunk_size, root=root):
+        yield list(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+def iter_score_arrays(values, chunk_size, root=None):
+    # (testers, question_ids, scores) NumPy chunks of archived responses, for analytics.load_scores
+    import numpy as np
+    import pyarrow.dataset as ds
+
+    columns = ['tester_name', 'question_id', 'accuracy_score', 'relevancy_score', 'performance_score']
+    for batch in iter_batches(columns, values, ds.field('response_id').is_valid(), chunk_size, root):
+        tester_column, question_column, *score_columns = (
+            column.to_numpy(zero_copy_only=False) for column in batch.columns
+        )
+        yield (
+            tester_column.astype(object),
+            question_column.astype(float),
+            np.column_stack([column.astype(float) for column in score_columns]),
+        )
+
+
+def iter_sessions(root=None):
+    # One dict per archived session with the columns rollups.apply_session reads
+    columns = ['session_id', 'division_id', 'venue_id', 'session_datetime', 'total_score',
+               'session_accuracy_score', 'session_relevancy_score', 'session_performance_score']
+    last_id = None
+    for batch in iter_batches(columns, root=root):
+        for row in zip(*(column.to_pylist() for column in batch.columns)):
+            # A session's responses are adjacent rows of the same file
+            if row[0] == last_id:
+                continue
+            last_id = row[0]
+            yield {
+                'division_id': row[1],
+                'venue_id': row[2],
+                'session_datetime': row[3],
+                'total_score': row[4],
+                'accuracy_score': row[5],
+                'relevancy_score': row[6],
+                'performance_score': row[7],
+            }
+
+
+def bump_version(root):
+    path = os.path.join(root, VERSION_FILE)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as handle:
+        handle.write(datetime.now().isoformat())
+    # A new inode each time, so version() changes even within the clock's resolution
+    os.replace(temporary, path)
+
+
+def version(root=None):
+    # Part of analytics cache keys, read on every /api/admin/analytics request: one stat of the
+    # version file rather than a walk of the archive. None until something has been archived.
+    try:
+        stat = os.stat(os.path.join(root or ARCHIVE_DIR, VERSION_FILE))
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_ino:x}-{stat.st_mtime_ns:x}"
@@ -0,0 +1,525 @@
+import argparse
+import csv
+import http.client
+import io
+import json
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlsplit
+
+import questions
+import rollups
+import setup_db
+import storage
+
+QUESTIONS = [f"Standard prompt {n}: how do I reset my password for system {n}?" for n in range(40)]
+# Full-text queries matching question text, answer text, comments, or nothing
+SEARCH_TERMS = ["password", "reset password", "chatbot answer", "comment", "unmatched"]
+# Sessions per uploaded import file
+IMPORT_SESSIONS = 20
+
+
+# --- Seeding -----------------------------------------------------------------
+
+def seed(sessions, responses_per_session, divisions, venues, days, chunk_size, rng_seed):
+    rng = random.Random(rng_seed)
+    setup_db.create_database()
+    setup_db.create_tables()
+    setup_db.migrate()
+
+    conn = storage.backend.connect()
+    cursor = conn.cursor()
+    started = time.perf_counter()
+
+    cursor.executemany("INSERT INTO divisions (name) VALUES (%s)", [(f"Division {n}",) for n in range(divisions)])
+    cursor.executemany("INSERT INTO venues (name) VALUES (%s)", [(f"Venue {n}",) for n in range(venues)])
+    conn.commit()
+    cursor.execute("SELECT id FROM divisions")
+    division_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT id FROM venues")
+    venue_ids = [row[0] for row in cursor.fetchall()]
+    question_ids = questions.QuestionCatalog().resolve(cursor, QUESTIONS)
+    conn.commit()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM feedback_sessions")
+    next_id = cursor.fetchone()[0] + 1
+
+    now = datetime.now().replace(microsecond=0)
+    for chunk_start in range(0, sessions, chunk_size):
+        session_rows = []
+        response_rows = []
+        for session_id in range(next_id + chunk_start, next_id + min(chunk_start + chunk_size, sessions)):
+            scores = [(rng.randint(1, 5), rng.randint(1, 5), rng.randint(1, 5)) for _ in range(responses_per_session)]
+            accuracy = sum(s[0] for s in scores) / len(scores)
+            relevancy = sum(s[1] for s in scores) / len(scores)
+            performance = sum(s[2] for s in scores) / len(scores)
+            session_datetime = now - timedelta(seconds=rng.randint(0, days * 86400))
+            session_rows.append((
+                session_id, f"tester{rng.randint(1, 500)}", rng.choice(division_ids), rng.choice(venue_ids),
+                session_datetime, session_datetime, (accuracy + relevancy + performance) / 3,
+                accuracy, relevancy, performance
+            ))
+            for accuracy_score, relevancy_score, performance_score in scores:
+                response_rows.append((
+                    session_id, rng.choice(question_ids), "Chatbot answer " * rng.randint(5, 40),
+                    accuracy_score, relevancy_score, performance_score,
+                    "" if rng.random() < 0.7 else "Additional comment about the answer"
+                ))
+        cursor.executemany("""
+            INSERT INTO feedback_sessions
+            (id, tester_name, division_id, venue_id, session_datetime, created_at,
+             total_score, accuracy_score, relevancy_score, performance_score)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, session_rows)
+        cursor.executemany("""
+            INSERT INTO feedback_responses
+            (session_id, question_id, chatbot_answer, accuracy_score, relevancy_score, performance_score, additional_comments)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, response_rows)
+        conn.commit()
+        print(f"Seeded {min(chunk_start + chunk_size, sessions)}/{sessions} sessions")
+
+    rollups.rebuild(cursor)
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print(f"Seeding finished in {time.perf_counter() - started:.1f}s")
+
+
+# --- Load generation ---------------------------------------------------------
+
+# A request body sent as it is, rather than encoded as JSON
+RawBody = namedtuple('RawBody', ['content_type', 'data'])
+
+
+def multipart_file(field, filename, data):
+    boundary = uuid.uuid4().hex
+    payload = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+               f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return RawBody(f"multipart/form-data; boundary={boundary}", payload)
+
+
+class Client:
+    # One keep-alive HTTP connection per worker thread
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        if isinstance(body, RawBody):
+            headers, payload = {'Content-Type': body.content_type}, body.data
+        else:
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            payload = json.dumps(body) if body is not None else None
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            return response.status, data
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def first_chunk(self, path):
+        # For event streams, which never end: the status and the first bytes, on a connection
+        # of its own that is closed straight after
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            return response.status, response.read1(65536) if response.status == 200 else response.read()
+        finally:
+            conn.close()
+
+
+def submission(rng, state):
+    return {
+        "tester_name": f"bench{rng.randint(1, 500)}",
+        "division_id": rng.choice(state['division_ids']),
+        "venue_id": rng.choice(state['venue_ids']),
+        "session_datetime": datetime.utcnow().isoformat() + "Z",
+        "responses": [
+            {
+                "question": rng.choice(QUESTIONS),
+                "chatbot_answer": "Benchmark answer",
+                "accuracy_score": rng.randint(1, 5),
+                "relevancy_score": rng.randint(1, 5),
+                "performance_score": rng.randint(1, 5),
+                "additional_comments": ""
+            }
+            for _ in range(state['responses_per_session'])
+        ]
+    }
+
+
+def load_state(client, responses_per_session):
+    _, divisions = client.request('GET', '/api/divisions')
+    _, venues = client.request('GET', '/api/venues')
+    _, sessions = client.request('GET', '/api/admin/feedback-sessions?fields=id&limit=500')
+    page = json.loads(sessions)
+    # The sessions PATCH edits, at their current versions
+    _, details = client.request('GET', '/api/admin/feedback-sessions/details?limit=50')
+    versions = {session['id']: session['version'] for session in json.loads(details)['sessions']}
+    return {
+        'division_ids': [d['id'] for d in json.loads(divisions)],
+        'venue_ids': [v['id'] for v in json.loads(venues)],
+        'division_names': [d['name'] for d in json.loads(divisions)],
+        'venue_names': [v['name'] for v in json.loads(venues)],
+        'session_ids': [s['id'] for s in page['sessions']],
+        'next_cursor': page['next_cursor'],
+        'created_session_ids': [],
+        'patch_ids': list(versions),
+        # Session id -> version, updated from every PATCH answer
+        'versions': versions,
+        'lock': threading.Lock(),
+        'responses_per_session': responses_per_session,
+    }
+
+
+def pop_created_session(state):
+    with state['lock']:
+        return state['created_session_ids'].pop() if state['created_session_ids'] else 2 ** 31 - 1
+
+
+def import_upload(rng, state):
+    # An export-shaped CSV under an import id of its own, so every request imports its
+    # sessions instead of finding the file already completed
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['session_id', 'tester_name', 'division_name', 'venue_name', 'session_datetime', 'question',
+                     'chatbot_answer', 'accuracy_score', 'relevancy_score', 'performance_score',
+                     'additional_comments'])
+    session_datetime = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for session in range(IMPORT_SESSIONS):
+        division, venue = rng.choice(state['division_names']), rng.choice(state['venue_names'])
+        for _ in range(state['responses_per_session']):
+            writer.writerow([session + 1, f"bench-import{rng.randint(1, 500)}", division, venue, session_datetime,
+                             rng.choice(QUESTIONS), "Synthetic chatbot answer", rng.randint(1, 5),
+                             rng.randint(1, 5), rng.randint(1, 5), ""])
+    return ('POST', f"/api/admin/import?import_id=bench-{uuid.uuid4().hex}",
+            multipart_file('file', 'bench.csv', out.getvalue().encode()))
+
+
+def session_patch(rng, state):
+    # A small edit at the version last seen; concurrent edits of one session answer 409
+    session_id = rng.choice(state['patch_ids'])
+    with state['lock']:
+        version = state['versions'][session_id]
+    return ('PATCH', f"/api/admin/feedback-session/{session_id}", {
+        "version": version,
+        "tester_name": f"bench-patch{rng.randint(1, 500)}",
+    })
+
+
+def record_version(state, path, data):
+    # Both a successful PATCH and a 409 carry the session's current version
+    try:
+        version = json.loads(data)['version']
+    except (ValueError, KeyError):
+        return
+    with state['lock']:
+        state['versions'][int(path.rsplit('/', 1)[1])] = version
+
+
+# Every route in app.py as (name, function(rng, state) -> (method, path, body)); body is
+# JSON-encoded unless it is a RawBody.
+# Order matters: submit-feedback runs before the delete scenario that removes what it created.
+SCENARIOS = [
+    ("GET /api/divisions", lambda rng, s: ('GET', '/api/divisions', None)),
+    ("GET /api/venues", lambda rng, s: ('GET', '/api/venues', None)),
+    ("GET /api/admin/divisions", lambda rng, s: ('GET', '/api/admin/divisions', None)),
+    ("GET /api/admin/venues", lambda rng, s: ('GET', '/api/admin/venues', None)),
+    ("GET /api/admin/feedback-sessions", lambda rng, s: (
+        'GET', '/api/admin/feedback-sessions', None)),
+    ("GET /api/admin/feedback-sessions (next page)", lambda rng, s: (
+        'GET', f"/api/admin/feedback-sessions?cursor={s['next_cursor'] or ''}", None)),
+    ("GET /api/admin/feedback-sessions (filtered)", lambda rng, s: (
+        'GET', f"/api/admin/feedback-sessions?division_id={rng.choice(s['division_ids'])}"
+               f"&date_from={(datetime.now() - timedelta(days=30)).date()}", None)),
+    ("GET /api/admin/feedback-sessions (NDJSON)", lambda rng, s: (
+        'GET', '/api/admin/feedback-sessions?format=ndjson&limit=5000', None)),
+    ("GET /api/admin/feedback-session/<id>", lambda rng, s: (
+        'GET', f"/api/admin/feedback-session/{rng.choice(s['session_ids'])}", None)),
+    ("GET /api/admin/feedback-sessions/details (ids)", lambda rng, s: (
+        'GET', f"/api/admin/feedback-sessions/details?ids="
+               f"{','.join(str(i) for i in rng.sample(s['session_ids'], min(20, len(s['session_ids']))))}", None)),
+    ("GET /api/admin/feedback-sessions/details (page)", lambda rng, s: (
+        'GET', '/api/admin/feedback-sessions/details?limit=20', None)),
+    ("GET /api/admin/stats", lambda rng, s: (
+        'GET', f"/api/admin/stats?granularity={rng.choice(rollups.GRANULARITIES)}"
+               f"&dimension={rng.choice(rollups.DIMENSIONS)}", None)),
+    ("GET /api/admin/analytics", lambda rng, s: ('GET', '/api/admin/analytics', None)),
+    ("GET /api/admin/questions/<id>/stats", lambda rng, s: (
+        'GET', f"/api/admin/questions/{rng.randint(1, len(QUESTIONS))}/stats", None)),
+    ("GET /api/admin/export", lambda rng, s: (
+        'GET', f"/api/admin/export?format=csv&division_id={rng.choice(s['division_ids'])}"
+               f"&date_from={(datetime.now() - timedelta(days=1)).date()}", None)),
+    ("GET /api/admin/search", lambda rng, s: (
+        'GET', f"/api/admin/search?q={quote(rng.choice(SEARCH_TERMS))}", None)),
+    ("GET /api/admin/db-pool", lambda rng, s: ('GET', '/api/admin/db-pool', None)),
+    ("GET /api/admin/admission", lambda rng, s: ('GET', '/api/admin/admission', None)),
+    ("GET /metrics", lambda rng, s: ('GET', '/metrics', None)),
+    ("GET /api/admin/events", lambda rng, s: ('GET', '/api/admin/events', None)),
+    ("POST /api/submit-feedback", lambda rng, s: ('POST', '/api/submit-feedback', submission(rng, s))),
+    ("POST /api/submit-feedback/batch", lambda rng, s: (
+        'POST', '/api/submit-feedback/batch', {"sessions": [submission(rng, s) for _ in range(10)]})),
+    ("GET /api/submit-feedback/status/<id>", lambda rng, s: (
+        'GET', '/api/submit-feedback/status/unknown', None)),
+    ("POST /api/admin/import", import_upload),
+    ("PUT /api/admin/feedback-session/<id>", lambda rng, s: (
+        'PUT', f"/api/admin/feedback-session/{rng.choice(s['session_ids'])}", {
+            "tester_name": "bench-edit",
+            "division_id": rng.choice(s['division_ids']),
+            "venue_id": rng.choice(s['venue_ids']),
+            "session_datetime": datetime.utcnow().isoformat() + "Z",
+            "total_score": 3,
+            "responses": []
+        })),
+    ("PATCH /api/admin/feedback-session/<id>", session_patch),
+    ("DELETE /api/admin/feedback-session/<id>", lambda rng, s: (
+        'DELETE', f"/api/admin/feedback-session/{pop_created_session(s)}", None)),
+    ("POST /api/admin/division", lambda rng, s: ('POST', '/api/admin/division', {"name": "bench division"})),
+    ("PUT /api/admin/division/<id>", lambda rng, s: (
+        'PUT', f"/api/admin/division/{s['division_ids'][0]}", {"name": "Division 0"})),
+    ("DELETE /api/admin/division/<id>", lambda rng, s: ('DELETE', '/api/admin/division/2147483647', None)),
+    ("POST /api/admin/venue", lambda rng, s: ('POST', '/api/admin/venue', {"name": "bench venue"})),
+    ("PUT /api/admin/venue/<id>", lambda rng, s: (
+        'PUT', f"/api/admin/venue/{s['venue_ids'][0]}", {"name": "Venue 0"})),
+    ("DELETE /api/admin/venue/<id>", lambda rng, s: ('DELETE', '/api/admin/venue/2147483647', None)),
+]
+
+# Statuses that are the expected answer for a scenario rather than an error;
+# 409 is a PATCH that lost an optimistic-concurrency race
+EXPECTED_STATUSES = {200, 202, 304, 404, 409}
+# Event streams are timed to their first bytes (the retry line) rather than read to the end
+STREAMED_PATHS = ('/api/admin/events',)
+# A closed event stream keeps its server-side subscription until the next heartbeat, so more
+# requests than this would only measure the EVENTS_MAX_SUBSCRIBERS limit
+SCENARIO_REQUEST_LIMITS = {"GET /api/admin/events": 50}
+# Shed by admission control or the rate limiter; counted apart from errors
+REJECTED_STATUSES = {429, 503}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(client, state, build, requests_per_route, concurrency, rng_seed):
+    latencies = []
+    errors = 0
+    rejected = 0
+    lock = threading.Lock()
+
+    def one(n):
+        nonlocal errors, rejected
+        rng = random.Random(rng_seed * 1000003 + n)
+        method, path, body = build(rng, state)
+        started = time.perf_counter()
+        try:
+            if path.startswith(STREAMED_PATHS):
+                status, data = client.first_chunk(path)
+            else:
+                status, data = client.request(method, path, body)
+            ok = status in EXPECTED_STATUSES or status in REJECTED_STATUSES
+        except Exception:
+            status, data, ok = None, b'', False
+        elapsed = time.perf_counter() - started
+        if ok and path == '/api/submit-feedback' and status == 200:
+            with state['lock']:
+                state['created_session_ids'].append(json.loads(data)['session_id'])
+        if method == 'PATCH' and status in (200, 409):
+            record_version(state, path, data)
+        with lock:
+            latencies.append(elapsed)
+            errors += not ok
+            rejected += status in REJECTED_STATUSES
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_per_route)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": errors / len(latencies) if latencies else 0.0,
+        "rejected": rejected,
+        "rejected_rate": rejected / len(latencies) if latencies else 0.0,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "mean": sum(latencies) / len(latencies) * 1000,
+            "max": latencies[-1] * 1000,
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(base_url, requests_per_route, concurrency, responses_per_session, only, output, rng_seed):
+    client = Client(base_url)
+    state = load_state(client, responses_per_session)
+    results = {}
+    for name, build in SCENARIOS:
+        if only and not any(fragment in name for fragment in only):
+            continue
+        requests = min(requests_per_route, SCENARIO_REQUEST_LIMITS.get(name, requests_per_route))
+        results[name] = run_scenario(client, state, build, requests, concurrency, rng_seed)
+        stats = results[name]
+        print(f"{name:50s} p50 {stats['latency_ms']['p50']:8.1f}ms  p95 {stats['latency_ms']['p95']:8.1f}ms  "
+              f"p99 {stats['latency_ms']['p99']:8.1f}ms  {stats['throughput_rps']:8.1f} req/s  "
+              f"errors {stats['error_rate']:.1%}  rejected {stats['rejected_rate']:.1%}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "base_url": base_url,
+            "requests_per_route": requests_per_route,
+            "concurrency": concurrency,
+            "responses_per_session": responses_per_session,
+            "seed": rng_seed,
+        },
+        "routes": results,
+    }
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {output}")
+
+
+# --- Startup ------------------------------------------------------------------
+
+# Run in a fresh interpreter per measurement so nothing is already imported or cached.
+# Falls back to the module-level app of trees from before create_app() for before/after numbers.
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app() if hasattr(app, 'create_app') else app.app
+created = time.perf_counter()
+status = flask_app.test_client().get('/api/divisions').status_code
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (finished - created) * 1000,
+    "first_request_status": status,
+    "modules": len(sys.modules),
+    "heavy_modules": [name for name in ('numpy', 'pandas', 'openpyxl', 'pyarrow') if name in sys.modules],
+}))
+"""
+STARTUP_METRICS = ('process_ms', 'import_ms', 'create_app_ms', 'first_request_ms')
+
+
+def startup(runs, output):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', STARTUP_PROBE], capture_output=True, text=True, check=True)
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['process_ms'] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+
+    medians = {metric: statistics.median(sample[metric] for sample in samples) for metric in STARTUP_METRICS}
+    for metric in STARTUP_METRICS:
+        print(f"{metric:20s} {medians[metric]:8.1f}ms")
+    print(f"{'modules loaded':20s} {samples[-1]['modules']:8d}  heavy: {', '.join(samples[-1]['heavy_modules']) or 'none'}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "config": {"runs": runs, "python": sys.version.split()[0]},
+        "startup": dict(medians, modules=samples[-1]['modules'], heavy_modules=samples[-1]['heavy_modules']),
+    }
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {output}")
+
+
+def compare(baseline_path, candidate_path, threshold):
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    with open(candidate_path) as handle:
+        candidate = json.load(handle)
+
+    regressions = 0
+    print(f"{'route':50s} {'p95 before':>11s} {'p95 after':>11s} {'change':>8s} {'rps change':>11s}")
+    for name, after in candidate['routes'].items():
+        before = baseline['routes'].get(name)
+        if before is None:
+            continue
+        p95_change = after['latency_ms']['p95'] / before['latency_ms']['p95'] - 1
+        rps_change = after['throughput_rps'] / before['throughput_rps'] - 1 if before['throughput_rps'] else 0.0
+        regressed = (p95_change > threshold or after['error_rate'] > before['error_rate']
+                     or after.get('rejected_rate', 0.0) > before.get('rejected_rate', 0.0))
+        regressions += regressed
+        print(f"{name:50s} {before['latency_ms']['p95']:10.1f}ms {after['latency_ms']['p95']:10.1f}ms "
+              f"{p95_change:+8.1%} {rps_change:+11.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a throwaway database and benchmark every backend route")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help="fill the configured database with synthetic feedback")
+    seed_parser.add_argument('--sessions', type=int, default=100000)
+    seed_parser.add_argument('--responses', type=int, default=20, help="responses per session")
+    seed_parser.add_argument('--divisions', type=int, default=20)
+    seed_parser.add_argument('--venues', type=int, default=50)
+    seed_parser.add_argument('--days', type=int, default=730, help="spread sessions over this many past days")
+    seed_parser.add_argument('--chunk-size', type=int, default=1000)
+    seed_parser.add_argument('--seed', type=int, default=42)
+
+    run_parser = commands.add_parser('run', help="drive every route against a running server")
+    run_parser.add_argument('--base-url', default='http://localhost:5000')
+    run_parser.add_argument('--requests', type=int, default=500, help="requests per route")
+    run_parser.add_argument('--concurrency', type=int, default=16)
+    run_parser.add_argument('--responses', type=int, default=20, help="responses per submitted session")
+    run_parser.add_argument('--only', nargs='*', help="only run routes whose name contains one of these")
+    run_parser.add_argument('--output', default='benchmark-results.json')
+    run_parser.add_argument('--seed', type=int, default=42)
+
+    startup_parser = commands.add_parser('startup', help="time importing the app, create_app() and the first request")
+    startup_parser.add_argument('--runs', type=int, default=10)
+    startup_parser.add_argument('--output', default='startup-results.json')
+
+    compare_parser = commands.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="allowed p95 slowdown (0.10 = 10%%)")
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        seed(args.sessions, args.responses, args.divisions, args.venues, args.days, args.chunk_size, args.seed)
+    elif args.command == 'run':
+        run(args.base_url, args.requests, args.concurrency, args.responses, args.only, args.output, args.seed)
+    elif args.command == 'startup':
+        startup(args.runs, args.output)
+    else:
+        raise SystemExit(1 if compare(args.baseline, args.candidate, args.threshold) else 0)
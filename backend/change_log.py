@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+logger = logging.getLogger('feedback.change_log')
+
+# Row kinds: a session event for /api/admin/events, or a cache every process should clear
+EVENT = 'event'
+INVALIDATE = 'invalidate'
+
+POLL_BATCH_SIZE = 500
+# On MySQL an auto-increment id is taken before its transaction commits, so a lower id can
+# become visible just after a higher one. Skipped ids are looked for again for this many seconds.
+SETTLE_SECONDS = 5.0
+MAX_MISSING = 1000
+PURGE_INTERVAL = 60.0
+
+
+class ChangeLog:
+    # Cross-process feed of session events and cache invalidations, kept in the change_log table.
+    # Rows are appended inside the transaction of the write they describe, so they commit or roll
+    # back with it. A follower thread in every server process reads the rows appended by any
+    # process, including command-line tools, and applies them.
+    def __init__(self, connect, poll_interval=0.5, retention=3600.0):
+        # connect opens the follower's own connection; appends use the writer's cursor
+        self.connect = connect
+        self.poll_interval = poll_interval
+        self.retention = retention
+        # Marks this process's rows, so its own invalidations are not applied twice
+        self.origin = uuid.uuid4().hex
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def append(self, cursor, kind, name, payload=None):
+        # Part of the caller's transaction; call notify() once it has committed
+        cursor.execute(
+            "INSERT INTO change_log (kind, name, payload, origin, created_at) VALUES (%s, %s, %s, %s, %s)",
+            (kind, name, payload, self.origin, datetime.now())
+        )
+
+    def notify(self):
+        # Poll now, so this process's own subscribers hear about a commit without waiting
+        self._wake.set()
+
+    def start(self, on_start, on_row):
+        # on_start(last_id) once the current end of the log is known; then
+        # on_row(id, kind, name, payload, own) for every row appended after it.
+        thread = threading.Thread(target=self._follow, args=(on_start, on_row), name="change-log", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        # The follower exits after its current poll
+        self._stopped.set()
+        self._wake.set()
+
+    def _fetch(self, cursor, condition, params):
+        cursor.execute(
+            f"SELECT id, kind, name, payload, origin FROM change_log WHERE {condition} ORDER BY id LIMIT %s",
+            list(params) + [POLL_BATCH_SIZE]
+        )
+        return cursor.fetchall()
+
+    def _follow(self, on_start, on_row):
+        conn = None
+        high = None
+        # id -> when it was first found missing
+        missing = {}
+        last_purge = time.monotonic()
+        while not self._stopped.is_set():
+            rows = []
+            try:
+                if conn is None:
+                    conn = self.connect()
+                cursor = conn.cursor()
+                try:
+                    if high is None:
+                        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM change_log")
+                        high = cursor.fetchone()[0]
+                        on_start(high)
+                    if missing:
+                        rows += self._fetch(cursor, f"id IN ({', '.join(['%s'] * len(missing))})", missing)
+                    rows += self._fetch(cursor, "id > %s", [high])
+                finally:
+                    cursor.close()
+                # End the read transaction so the next poll sees newly committed rows
+                conn.commit()
+
+                now = time.monotonic()
+                for row_id, kind, name, payload, origin in sorted(rows):
+                    missing.pop(row_id, None)
+                    if row_id > high:
+                        for skipped in range(high + 1, min(row_id, high + 1 + MAX_MISSING)):
+                            missing[skipped] = now
+                        high = row_id
+                    try:
+                        on_row(row_id, kind, name, payload, origin == self.origin)
+                    except Exception:
+                        logger.exception("applying change failed", extra={"change_id": row_id})
+                # Rolled back, or a gap in the sequence: stop looking after a while
+                missing = {row_id: since for row_id, since in missing.items() if now - since < SETTLE_SECONDS}
+                if len(missing) > MAX_MISSING:
+                    missing = dict(sorted(missing.items())[-MAX_MISSING:])
+
+                if now - last_purge > PURGE_INTERVAL:
+                    last_purge = now
+                    self.purge(conn)
+            except Exception as e:
+                logger.warning("change log poll failed", extra={"error": str(e)})
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                conn = None
+            # Keep reading without a pause while a backlog is being worked through
+            if not (high is not None and len(rows) >= POLL_BATCH_SIZE):
+                self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        if conn is not None:
+            conn.close()
+
+    def purge(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM change_log WHERE created_at < %s",
+                           (datetime.now() - timedelta(seconds=self.retention),))
+            conn.commit()
+        finally:
+            cursor.close()
@@ -0,0 +1,92 @@
+import zlib
+
+# Response bodies worth compressing; XLSX and Parquet exports are compressed already
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html',
+}
+GZIP_LEVEL = 6
+# Brotli's higher qualities are too slow for responses built per request
+BROTLI_QUALITY = 5
+
+
+def _brotli():
+    # Brotli is optional; without the package only gzip is offered
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def supported_encodings():
+    return ['br', 'gzip'] if _brotli() else ['gzip']
+
+
+class _GzipStream:
+    def __init__(self):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        # A sync flush per chunk so the client can decode each chunk as it arrives
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = _brotli().Compressor(quality=BROTLI_QUALITY)
+
+    def process(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compressor(encoding):
+    return _BrotliStream() if encoding == 'br' else _GzipStream()
+
+
+def compress(encoding, data):
+    stream = compressor(encoding)
+    return stream.process(data) + stream.finish()
+
+
+def _compress_iter(encoding, chunks):
+    stream = compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield stream.process(chunk)
+    yield stream.finish()
+
+
+def compress_response(response, accept_encodings, min_size):
+    # Compresses bodies of at least min_size bytes with the best encoding the client accepts.
+    # Streamed bodies are compressed chunk by chunk whatever their size, since it is not known up front.
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    if not response.is_streamed and response.calculate_content_length() < min_size:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(supported_encodings())
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = _compress_iter(encoding, response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compress(encoding, response.get_data()))
+    response.headers['Content-Encoding'] = encoding
+    # The bytes now differ per encoding, so only a weak validator still holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
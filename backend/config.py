@@ -0,0 +1,113 @@
+import functools
+import json
+import os
+
+# Every backend setting with its default. create_app() reads them, in increasing precedence, from
+# these defaults, a JSON file (FEEDBACK_CONFIG, or load_config's path), the environment variable of
+# the same name, and finally overrides passed in code. Values are converted to the default's type.
+DEFAULTS = {
+    # Database (see storage.from_env)
+    'DB_BACKEND': 'mysql',
+    'DB_HOST': 'localhost',
+    'DB_USER': 'admin',
+    'DB_PASSWORD': 'admin',
+    'DB_NAME': 'genai_tests',
+    'SQLITE_PATH': 'feedback.db',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'SQLITE_BUSY_TIMEOUT': 30.0,
+    'DB_POOL_SIZE': 10,
+    'DB_POOL_TIMEOUT': 5.0,
+    'DB_POOL_MAX_IDLE': 300.0,
+    'DB_POOL_PING_INTERVAL': 5.0,
+    # Connections each server worker opens before it starts accepting requests
+    'DB_POOL_PREFILL': 2,
+
+    # Logging and metrics
+    'LOG_LEVEL': 'INFO',
+    'PAYLOAD_LOG_SAMPLE_RATE': 0.01,
+    'SLOW_QUERY_MS': 200.0,
+
+    # HTTP
+    'CORS_ORIGINS': 'http://localhost:3000',
+    'TRUSTED_PROXIES': 0,
+    'COMPRESS_MIN_SIZE': 1024,
+
+    # Write admission control
+    'WRITE_CONCURRENCY': 8,
+    'WRITE_QUEUE_SIZE': 32,
+    'WRITE_QUEUE_TIMEOUT': 2.0,
+    # Off by default: behind a proxy every client shares the proxy's address (see TRUSTED_PROXIES)
+    'RATE_LIMIT_PER_SECOND': 0.0,
+    'RATE_LIMIT_BURST': 20,
+
+    # Caches
+    'LOOKUP_CACHE_TTL': 300,
+    'ANALYTICS_CACHE_TTL': 0.0,
+
+    # Submissions
+    'SUBMIT_MODE': 'sync',
+    'SUBMIT_BATCH_CHUNK_SIZE': 100,
+    'INGEST_QUEUE_PATH': 'ingest_queue.db',
+    'INGEST_WORKERS': 2,
+    'INGEST_BATCH_SIZE': 50,
+    'IDEMPOTENCY_KEY_TTL': 86400,
+    'IDEMPOTENCY_PURGE_INTERVAL': 3600.0,
+
+    # Export, archive and import
+    'EXPORT_CHUNK_SIZE': 1000,
+    'ARCHIVE_DIR': 'archive',
+    'IMPORT_BATCH_SIZE': 1000,
+
+    # Admin event stream
+    'EVENTS_HISTORY_SIZE': 1000,
+    'EVENTS_BUFFER_SIZE': 256,
+    'EVENTS_MAX_SUBSCRIBERS': 100,
+    'EVENTS_HEARTBEAT_INTERVAL': 15.0,
+    # Session events and cache invalidations reach every server process through the change_log
+    # table: each process reads new rows every CHANGE_LOG_POLL_INTERVAL seconds
+    'CHANGE_LOG_POLL_INTERVAL': 0.5,
+    'CHANGE_LOG_RETENTION': 3600.0,
+
+    # serve.py
+    'HOST': '0.0.0.0',
+    'PORT': 5000,
+    'WORKERS': 2,
+    'LISTEN_BACKLOG': 1024,
+    # Seconds a stopping worker waits for in-flight requests before exiting anyway
+    'GRACEFUL_TIMEOUT': 30.0,
+}
+
+
+def _convert(name, value):
+    default = DEFAULTS[name]
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return str(value)
+
+
+def load_config(path=None, environ=os.environ, overrides=None):
+    config = dict(DEFAULTS)
+    path = path or environ.get('FEEDBACK_CONFIG')
+    if path:
+        with open(path) as handle:
+            config.update(json.load(handle))
+    config.update({name: environ[name] for name in DEFAULTS if name in environ})
+    config.update(overrides or {})
+    # A misspelt setting would otherwise be ignored without a word
+    unknown = sorted(set(config) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+    return {name: _convert(name, value) for name, value in config.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def current():
+    # The process-wide settings without code overrides, read once. Module-level defaults and the
+    # command-line tools (setup_db.py, importer.py, benchmark.py) use these, so they reach the same
+    # database as the server; create_app() applies its own overrides on top.
+    return load_config()
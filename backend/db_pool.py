@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PooledConnection:
+    # Thin proxy around a raw driver connection; close() hands it back to the pool
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.cursor_wrapper is not None:
+            cursor = self._pool.cursor_wrapper(cursor)
+        return cursor
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=10, timeout=5.0, max_idle=300, ping_interval=5.0, cursor_wrapper=None):
+        # connect() opens a new raw connection, e.g. storage.backend.connect
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_interval = ping_interval
+        self.cursor_wrapper = cursor_wrapper
+
+        self._idle = deque()
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._peak_in_use = 0
+        self._created = 0
+        self._evicted = 0
+        self._broken = 0
+
+    def _connect(self):
+        raw = self.connect()
+        with self._cond:
+            self._created += 1
+        return raw
+
+    def _evict_idle(self, now):
+        # Oldest idle connections sit at the left end of the deque
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            raw, _ = self._idle.popleft()
+            self._evicted += 1
+            self._discard(raw)
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        started = time.monotonic()
+        with self._cond:
+            waited = False
+            while not self._idle and self._in_use >= self.size:
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a database connection"
+                    )
+                self._cond.wait(remaining)
+
+            now = time.monotonic()
+            self._evict_idle(now)
+            raw, last_used = self._idle.pop() if self._idle else (None, now)
+            self._in_use += 1
+            self._checkouts += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            wait_time = now - started
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        # Connect and health-check outside the lock so other threads are not blocked
+        try:
+            if raw is not None and now - last_used > self.ping_interval:
+                try:
+                    raw.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self._broken += 1
+                    self._discard(raw)
+                    raw = None
+            if raw is None:
+                raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def release(self, conn):
+        raw = conn._raw
+        healthy = True
+        try:
+            # Never hand out a connection with someone else's open transaction
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._broken += 1
+            self._cond.notify()
+        if not healthy:
+            self._discard(raw)
+
+    def prefill(self, count):
+        # Open up to count idle connections ahead of the first requests that would need them
+        with self._cond:
+            count = min(count, self.size - self._in_use) - len(self._idle)
+        for _ in range(max(0, count)):
+            raw = self._connect()
+            with self._cond:
+                self._idle.append((raw, time.monotonic()))
+                self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                raw, _ = self._idle.popleft()
+                self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "utilization": self._in_use / self.size if self.size else 0.0,
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total": self._wait_time_total,
+                "wait_time_avg": self._wait_time_total / self._checkouts if self._checkouts else 0.0,
+                "wait_time_max": self._wait_time_max,
+                "connections_created": self._created,
+                "connections_evicted": self._evicted,
+                "connections_broken": self._broken,
+            }
@@ -0,0 +1,148 @@
+import threading
+from collections import deque
+
+# Tells a client to reload its list: it missed events (fell behind or resumed too late)
+RESET = 'reset'
+# Milliseconds an EventSource waits before reconnecting after the stream drops
+RETRY_MS = 3000
+
+
+class Subscription:
+    # One connected client: a bounded buffer of events the hub has published to it
+    def __init__(self, hub):
+        self._hub = hub
+        self._events = deque()
+        self._ready = threading.Condition(hub._lock)
+        self.closed = False
+        # Resumed from an id this process has not reached yet: events up to it were already sent
+        self.after = 0
+
+    def _push(self, event):
+        # Called with the hub lock held. A reader this far behind gets one reset instead of
+        # an ever-growing backlog; the reset carries the newest id so a reconnect resumes after it.
+        if event[0] <= self.after:
+            return
+        if len(self._events) >= self._hub.buffer_size:
+            self._events.clear()
+            self._events.append((event[0], RESET, b'{}'))
+            self._hub._overflows += 1
+        else:
+            self._events.append(event)
+        self._ready.notify()
+
+    def get(self, timeout):
+        # Every buffered event, waiting up to timeout seconds for one; [] on timeout or close
+        with self._ready:
+            if not self._events and not self.closed:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class EventHub:
+    # Per-process fan-out of session changes to Server-Sent Events subscribers. Events arrive
+    # through the change log, so every server process publishes the same events under the same
+    # ids (the change_log row ids) and a client can resume from Last-Event-ID on any of them.
+    # The last history_size events are kept for resuming.
+    def __init__(self, history_size=1000, buffer_size=256, max_subscribers=100):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        self._sequence = 0
+        # Events up to this id were published before this process started, or are no longer kept
+        self._floor = 0
+        self._subscribers = set()
+        self._published = 0
+        self._overflows = 0
+
+    def start_at(self, sequence):
+        # The newest change_log id when this process began following it
+        with self._lock:
+            self._sequence = self._floor = sequence
+
+    def publish(self, sequence, event_type, payload):
+        # payload is the event data already encoded as JSON, shared by every subscriber
+        with self._lock:
+            event = (sequence, event_type, payload)
+            if len(self._history) == self._history.maxlen:
+                self._floor = max(self._floor, self._history[0][0])
+            self._history.append(event)
+            self._sequence = max(self._sequence, sequence)
+            self._published += 1
+            for subscription in self._subscribers:
+                subscription._push(event)
+        return self.event_id(sequence)
+
+    def event_id(self, sequence):
+        return str(sequence)
+
+    def _since(self, last_event_id):
+        # Events after last_event_id, or None if some of them are no longer available
+        if not last_event_id:
+            return []
+        if not last_event_id.isdigit():
+            return None
+        sequence = int(last_event_id)
+        if sequence < self._floor:
+            return None
+        return [event for event in self._history if event[0] > sequence]
+
+    def subscribe(self, last_event_id=None):
+        # A new Subscription primed with the events missed since last_event_id; None when full
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self)
+            backlog = self._since(last_event_id)
+            if backlog is None or len(backlog) > self.buffer_size:
+                subscription._events.append((self._sequence, RESET, b'{}'))
+            else:
+                subscription._events.extend(backlog)
+                # The client may have had events from another process that this one has not read yet
+                subscription.after = int(last_event_id) if last_event_id else 0
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            subscription.closed = True
+            subscription._ready.notify()
+
+    def close(self):
+        # Ends every open stream, e.g. so a stopping server is not held up by idle dashboards
+        with self._lock:
+            subscriptions = list(self._subscribers)
+        for subscription in subscriptions:
+            subscription.close()
+
+    def format(self, event):
+        sequence, event_type, payload = event
+        return f"id: {self.event_id(sequence)}\nevent: {event_type}\ndata: ".encode() + payload + b"\n\n"
+
+    def stream(self, subscription, heartbeat):
+        # The response body: buffered events as they arrive, and a comment line every heartbeat
+        # seconds so proxies keep the connection open and a departed client is noticed
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            while not subscription.closed:
+                events = subscription.get(heartbeat)
+                yield b''.join(self.format(event) for event in events) if events else b": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "max_subscribers": self.max_subscribers,
+                "published": self._published,
+                "last_event_id": self.event_id(self._sequence),
+                "history": len(self._history),
+                "overflows": self._overflows,
+            }
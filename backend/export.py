@@ -0,0 +1,147 @@
+import csv
+import io
+import tempfile
+
+import config
+
+EXPORT_CHUNK_SIZE = config.current()['EXPORT_CHUNK_SIZE']
+
+EXPORT_COLUMNS = [
+    'session_id', 'tester_name', 'division_name', 'venue_name', 'session_datetime', 'created_at',
+    'total_score', 'session_accuracy_score', 'session_relevancy_score', 'session_performance_score',
+    'response_id', 'question', 'chatbot_answer',
+    'accuracy_score', 'relevancy_score', 'performance_score', 'additional_comments',
+]
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+EXPORT_QUERY = """
+    SELECT fs.id AS session_id, fs.tester_name, d.name AS division_name, v.name AS venue_name,
+           fs.session_datetime, fs.created_at, fs.total_score,
+           fs.accuracy_score AS session_accuracy_score,
+           fs.relevancy_score AS session_relevancy_score,
+           fs.performance_score AS session_performance_score,
+           fr.id AS response_id, q.question, fr.chatbot_answer,
+           fr.accuracy_score, fr.relevancy_score, fr.performance_score, fr.additional_comments
+    FROM feedback_sessions fs
+    LEFT JOIN divisions d ON fs.division_id = d.id
+    LEFT JOIN venues v ON fs.venue_id = v.id
+    LEFT JOIN feedback_responses fr ON fs.id = fr.session_id
+    LEFT JOIN questions q ON q.id = fr.question_id
+    {where}
+    ORDER BY fs.id, fr.id
+"""
+
+# Bytes read per chunk when streaming a finished XLSX/Parquet file to the client
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def iter_row_chunks(conn, clauses, params, chunk_size=None):
+    # Unbuffered cursor: rows stay on the server until fetchmany pulls the next chunk
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    cursor = conn.cursor(buffered=False)
+    try:
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor.execute(EXPORT_QUERY.format(where=where), params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        conn.close()
+
+
+def stream_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_file(handle):
+    handle.seek(0)
+    try:
+        while True:
+            data = handle.read(FILE_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+    finally:
+        handle.close()
+
+
+def stream_xlsx(chunks):
+    from openpyxl import Workbook
+
+    # Write-only mode flushes rows to a temporary file instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('feedback')
+    sheet.append(EXPORT_COLUMNS)
+    for rows in chunks:
+        for row in rows:
+            sheet.append(row)
+    handle = tempfile.TemporaryFile()
+    workbook.save(handle)
+    yield from stream_file(handle)
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('session_id', pa.int64()), ('tester_name', pa.string()),
+        ('division_name', pa.string()), ('venue_name', pa.string()),
+        ('session_datetime', pa.timestamp('s')), ('created_at', pa.timestamp('s')),
+        ('total_score', pa.float64()), ('session_accuracy_score', pa.float64()),
+        ('session_relevancy_score', pa.float64()), ('session_performance_score', pa.float64()),
+        ('response_id', pa.int64()), ('question', pa.string()), ('chatbot_answer', pa.string()),
+        ('accuracy_score', pa.int32()), ('relevancy_score', pa.int32()),
+        ('performance_score', pa.int32()), ('additional_comments', pa.string()),
+    ])
+
+
+def rows_to_table(rows, schema):
+    # Row tuples (in schema order) to an arrow table
+    import pyarrow as pa
+
+    arrays = []
+    for field, column in zip(schema, zip(*rows)):
+        if field.type == pa.float64():
+            # DECIMAL columns arrive as Decimal, which arrow will not coerce to float
+            column = [None if value is None else float(value) for value in column]
+        arrays.append(pa.array(column, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def stream_parquet(chunks):
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+    handle = tempfile.TemporaryFile()
+    # Each chunk becomes its own row group, so only one chunk is ever held in memory
+    with pq.ParquetWriter(handle, schema, compression='zstd') as writer:
+        for rows in chunks:
+            writer.write_table(rows_to_table(rows, schema))
+    yield from stream_file(handle)
+
+
+def stream_export(fmt, chunks):
+    if fmt == 'csv':
+        return stream_csv(chunks)
+    if fmt == 'xlsx':
+        return stream_xlsx(chunks)
+    return stream_parquet(chunks)
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import config
+import storage
+
+logger = logging.getLogger('feedback.idempotency')
+
+HEADER = 'Idempotency-Key'
+# Batch keys get ":<index>" appended per session, which must still fit the 255-character column
+MAX_KEY_LENGTH = 200
+PURGE_BATCH_SIZE = 1000
+# Seconds a key is remembered; a retry after that is treated as a new submission
+KEY_TTL = config.current()['IDEMPOTENCY_KEY_TTL']
+
+
+def parse_key(value):
+    # The request's Idempotency-Key header value, or None if it sent none
+    if value is None:
+        return None
+    key = value.strip()
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise ValueError(f"{HEADER} must be 1 to {MAX_KEY_LENGTH} printable characters")
+    return key
+
+
+def batch_keys(key, count):
+    # One key per session of a batch, so a retried batch skips exactly the sessions already written
+    if key is None:
+        return [None] * count
+    return [f"{key}:{index}" for index in range(count)]
+
+
+def _cutoff(ttl):
+    return datetime.now() - timedelta(seconds=ttl)
+
+
+def lookup(cursor, keys, ttl=None):
+    # key -> session_id for the unexpired keys whose session has been committed
+    ttl = KEY_TTL if ttl is None else ttl
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return {}
+    placeholders = ', '.join(['%s'] * len(keys))
+    cursor.execute(f"""
+        SELECT idempotency_key, session_id FROM idempotency_keys
+        WHERE idempotency_key IN ({placeholders}) AND created_at >= %s AND session_id IS NOT NULL
+    """, keys + [_cutoff(ttl)])
+    rows = cursor.fetchall()
+    if rows and isinstance(rows[0], dict):
+        return {row['idempotency_key']: row['session_id'] for row in rows}
+    return {row[0]: row[1] for row in rows}
+
+
+def claim(cursor, key, ttl=None):
+    # Reserve the key inside the caller's transaction. False if another request holds it;
+    # on MySQL a concurrent holder makes this wait until that request commits or rolls back.
+    ttl = KEY_TTL if ttl is None else ttl
+    cursor.execute("DELETE FROM idempotency_keys WHERE idempotency_key = %s AND created_at < %s", (key, _cutoff(ttl)))
+    try:
+        cursor.execute(
+            "INSERT INTO idempotency_keys (idempotency_key, created_at) VALUES (%s, %s)",
+            (key, datetime.now())
+        )
+    except storage.backend.IntegrityError:
+        return False
+    return True
+
+
+def record(cursor, key, session_id):
+    cursor.execute("UPDATE idempotency_keys SET session_id = %s WHERE idempotency_key = %s", (session_id, key))
+
+
+def purge(conn, ttl=None, batch_size=PURGE_BATCH_SIZE):
+    # Delete expired keys a batch at a time so no single transaction holds many locks
+    ttl = KEY_TTL if ttl is None else ttl
+    cursor = conn.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute(
+                "SELECT id FROM idempotency_keys WHERE created_at < %s ORDER BY created_at LIMIT %s",
+                (_cutoff(ttl), batch_size)
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                break
+            cursor.execute(f"DELETE FROM idempotency_keys WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            conn.commit()
+            deleted += len(ids)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return deleted
+
+
+def start_purger(connect, ttl, interval):
+    # Background thread removing expired keys every `interval` seconds
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                conn = connect()
+                try:
+                    deleted = purge(conn, ttl)
+                finally:
+                    conn.close()
+                if deleted:
+                    logger.info("purged idempotency keys", extra={"deleted": deleted})
+            except Exception as e:
+                logger.warning("idempotency key purge failed", extra={"error": str(e)})
+
+    thread = threading.Thread(target=run, name="idempotency-purger", daemon=True)
+    thread.start()
+    return thread
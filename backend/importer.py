@@ -0,0 +1,498 @@
+import argparse
+import csv
+import hashlib
+import io
+import os
+import sys
+from datetime import date, datetime, time
+from email.utils import parsedate_to_datetime
+
+import pytz
+
+import change_log
+import config
+import events
+import questions
+import rollups
+import storage
+
+# Bulk import of feedback from CSV or XLSX files laid out like /api/admin/export writes them:
+# one row per response, with the session columns repeated on each of a session's rows.
+IMPORT_FORMATS = ('csv', 'xlsx')
+# Sessions written per transaction; the checkpoint advances with each committed batch
+IMPORT_BATCH_SIZE = config.current()['IMPORT_BATCH_SIZE']
+# Row errors reported per import; any beyond that are only counted
+MAX_REPORTED_ERRORS = 1000
+SCORE_FIELDS = ('accuracy_score', 'relevancy_score', 'performance_score')
+SCORE_RANGE = (1, 5)
+# session_datetime is stored as wall-clock time in the zone submit_feedback converts to
+LOCAL_TZ = pytz.timezone('Asia/Singapore')
+
+REQUIRED_COLUMNS = ('tester_name', 'session_datetime', 'question') + SCORE_FIELDS
+
+SESSION_INSERT = """
+    INSERT INTO feedback_sessions
+    (tester_name, division_id, venue_id, session_datetime, created_at,
+     total_score, accuracy_score, relevancy_score, performance_score)
+    VALUES (%s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP), %s, %s, %s, %s)
+"""
+
+RESPONSE_INSERT = """
+    INSERT INTO feedback_responses
+    (session_id, question_id, chatbot_answer, accuracy_score, relevancy_score, performance_score, additional_comments)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def file_fingerprint(stream, chunk_size=1024 * 1024):
+    # SHA-256 of a seekable binary stream, which is left rewound; the default import id
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def read_csv(stream):
+    # (row number, values) per line of a binary stream; row 1 is the header
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        yield from enumerate(csv.reader(text), 1)
+    finally:
+        # Leave the underlying stream for its owner to close
+        text.detach()
+
+
+def read_xlsx(stream):
+    # The first sheet row by row; read-only mode parses the XML as it goes instead of loading it
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from enumerate(workbook.worksheets[0].iter_rows(values_only=True), 1)
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, fmt):
+    if fmt == 'xlsx':
+        return read_xlsx(stream)
+    return read_csv(stream)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _blank(values):
+    return all(_text(value) == '' for value in values)
+
+
+def parse_header(values):
+    # column name -> position; raises ValueError naming whatever required column is missing
+    columns = {}
+    for position, name in enumerate(values):
+        name = _text(name).lower()
+        if name:
+            columns.setdefault(name, position)
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    for dimension in ('division', 'venue'):
+        if f'{dimension}_name' not in columns and f'{dimension}_id' not in columns:
+            missing.append(f'{dimension}_name')
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return columns
+
+
+def parse_datetime(value):
+    # Naive values are taken as stored wall-clock time; aware ones are converted to it
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime.combine(value, time())
+    else:
+        text = _text(value)
+        try:
+            parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            # The RFC 1123 form the JSON endpoints write
+            try:
+                parsed = parsedate_to_datetime(text)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid datetime: {text!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(LOCAL_TZ).replace(tzinfo=None)
+    return parsed
+
+
+def parse_score(value, name):
+    low, high = SCORE_RANGE
+    try:
+        score = float(_text(value))
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not score.is_integer() or not low <= score <= high:
+        raise ValueError(f"{name} must be a whole number from {low} to {high}")
+    return int(score)
+
+
+def _name_key(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+class NameLookup:
+    # Division or venue name -> id, read once per import. Unknown names are an error unless
+    # create_missing is set, in which case they are added (outside any batch transaction).
+    def __init__(self, cursor, table, create_missing=False):
+        self.table = table
+        self.label = table[:-1]
+        self.create_missing = create_missing
+        self.created = []
+        self._ids = {}
+        cursor.execute(f"SELECT id, name FROM {table} ORDER BY id")
+        for row_id, name in cursor.fetchall():
+            self._ids.setdefault(_name_key(name), row_id)
+        self._known = set(self._ids.values())
+
+    def resolve_id(self, value):
+        try:
+            row_id = int(float(_text(value)))
+        except ValueError:
+            raise ValueError(f"Invalid {self.label}_id: {value!r}")
+        if row_id not in self._known:
+            raise ValueError(f"Unknown {self.label}_id: {row_id}")
+        return row_id
+
+    def resolve(self, conn, cursor, name, dry_run=False):
+        key = _name_key(name)
+        if key in self._ids:
+            return self._ids[key]
+        if not self.create_missing:
+            raise ValueError(f"Unknown {self.label}: {name}")
+        self.created.append(name)
+        if dry_run:
+            # Would be created; later rows naming it resolve without being reported again
+            self._ids[key] = None
+            return None
+        cursor.execute(f"INSERT INTO {self.table} (name) VALUES (%s)", (name,))
+        conn.commit()
+        self._ids[key] = cursor.lastrowid
+        self._known.add(cursor.lastrowid)
+        return cursor.lastrowid
+
+
+def group_sessions(rows, columns, start_after=0):
+    # Consecutive rows sharing a session_id column value (or, without one, the same tester,
+    # division, venue and session_datetime) form one session: (first row, last row, [(row, values)]).
+    # A session's rows must be adjacent; rows up to start_after are skipped.
+    key_columns = [columns['session_id']] if 'session_id' in columns else [
+        columns[name] for name in ('tester_name', 'session_datetime',
+                                   'division_name' if 'division_name' in columns else 'division_id',
+                                   'venue_name' if 'venue_name' in columns else 'venue_id')
+    ]
+    current_key = None
+    group = []
+    for number, values in rows:
+        if number <= start_after or _blank(values):
+            continue
+        key = tuple(_text(values[position]) if position < len(values) else '' for position in key_columns)
+        if group and key != current_key:
+            yield group[0][0], group[-1][0], group
+            group = []
+        current_key = key
+        group.append((number, values))
+    if group:
+        yield group[0][0], group[-1][0], group
+
+
+def build_session(conn, cursor, group, columns, divisions, venues, dry_run=False):
+    # The session and response values of one group of rows, and the per-row errors found in them
+    def value(values, name):
+        position = columns.get(name)
+        return values[position] if position is not None and position < len(values) else None
+
+    errors = []
+    first_row, first = group[0]
+
+    def fail(row, message):
+        errors.append({"row": row, "error": message})
+
+    session = {'tester_name': _text(value(first, 'tester_name'))}
+    if not session['tester_name']:
+        fail(first_row, "tester_name is required")
+    for dimension, lookup in (('division', divisions), ('venue', venues)):
+        try:
+            if _text(value(first, f'{dimension}_name')):
+                session[f'{dimension}_id'] = lookup.resolve(
+                    conn, cursor, _text(value(first, f'{dimension}_name')), dry_run)
+            elif _text(value(first, f'{dimension}_id')):
+                session[f'{dimension}_id'] = lookup.resolve_id(value(first, f'{dimension}_id'))
+            else:
+                fail(first_row, f"{dimension}_name is required")
+        except ValueError as e:
+            fail(first_row, str(e))
+    try:
+        session['session_datetime'] = parse_datetime(value(first, 'session_datetime'))
+    except ValueError as e:
+        fail(first_row, f"session_datetime: {e}")
+    session['created_at'] = None
+    if _text(value(first, 'created_at')):
+        try:
+            session['created_at'] = parse_datetime(value(first, 'created_at'))
+        except ValueError as e:
+            fail(first_row, f"created_at: {e}")
+
+    responses = []
+    for number, values in group:
+        # Exported sessions without responses leave the response columns empty
+        if _blank([value(values, name) for name in ('question',) + SCORE_FIELDS]):
+            continue
+        # Free text is kept exactly as written
+        response = {
+            name: '' if value(values, name) is None else str(value(values, name))
+            for name in ('question', 'chatbot_answer', 'additional_comments')
+        }
+        if not response['question'].strip():
+            fail(number, "question is required")
+        for name in SCORE_FIELDS:
+            try:
+                response[name] = parse_score(value(values, name), name)
+            except ValueError as e:
+                fail(number, str(e))
+        responses.append(response)
+    if not responses and not errors:
+        fail(first_row, "At least one response is required")
+    if errors:
+        return None, errors
+
+    # Session scores as insert_feedback_session computes them
+    for name in SCORE_FIELDS:
+        session[name] = sum(response[name] for response in responses) / len(responses)
+    session['total_score'] = sum(session[name] for name in SCORE_FIELDS) / len(SCORE_FIELDS)
+    session['responses'] = responses
+    return session, []
+
+
+def load_checkpoint(cursor, import_id):
+    # (last source row committed, completed) for the import, or (0, False) if it never ran
+    cursor.execute("SELECT rows_done, completed_at FROM import_checkpoints WHERE import_id = %s", (import_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0, False
+    return row[0], row[1] is not None
+
+
+def reset_checkpoint(conn, import_id):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM import_checkpoints WHERE import_id = %s", (import_id,))
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def save_checkpoint(cursor, import_id, rows_done, counts, completed=False):
+    # Runs inside the batch's transaction, so the checkpoint never gets ahead of the rows it covers
+    now = datetime.now()
+    cursor.execute(
+        storage.backend.insert_or_ignore('import_checkpoints', ('import_id', 'updated_at')),
+        (import_id, now)
+    )
+    cursor.execute("""
+        UPDATE import_checkpoints
+        SET rows_done = %s, sessions_imported = sessions_imported + %s,
+            responses_imported = responses_imported + %s, sessions_failed = sessions_failed + %s,
+            completed_at = %s, updated_at = %s
+        WHERE import_id = %s
+    """, (rows_done, counts['sessions_imported'], counts['responses_imported'], counts['sessions_failed'],
+          now if completed else None, now, import_id))
+
+
+def write_batch(conn, cursor, sessions, catalog):
+    # Inserts the batch's sessions, responses and rollup increments; the caller commits
+    texts = [response['question'] for session in sessions for response in session['responses']]
+    question_ids = iter(catalog.resolve(cursor, texts, conn))
+    response_rows = []
+    for session in sessions:
+        cursor.execute(SESSION_INSERT, (
+            session['tester_name'], session['division_id'], session['venue_id'],
+            session['session_datetime'], session['created_at'], session['total_score'],
+            session['accuracy_score'], session['relevancy_score'], session['performance_score'],
+        ))
+        session_id = cursor.lastrowid
+        for response in session['responses']:
+            response_rows.append((
+                session_id, next(question_ids), response['chatbot_answer'],
+                response['accuracy_score'], response['relevancy_score'], response['performance_score'],
+                response['additional_comments'],
+            ))
+    # One multi-row INSERT for every response of the batch
+    cursor.executemany(RESPONSE_INSERT, response_rows)
+    rollups.apply_sessions(cursor, sessions)
+    return len(response_rows)
+
+
+def _new_counts():
+    return {"sessions_imported": 0, "responses_imported": 0, "sessions_failed": 0, "rows_failed": 0}
+
+
+def import_rows(conn, rows, import_id, dry_run=False, create_missing=False,
+                batch_size=None, catalog=None):
+    # Generator of progress dicts: one per committed batch (or validated batch in a dry run), each
+    # carrying that batch's row errors, then a summary with "done": True. Only one batch of sessions
+    # is held in memory. A rerun with the same import_id resumes after the last committed batch.
+    catalog = catalog or questions.QuestionCatalog()
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    cursor = conn.cursor()
+    totals = {"rows_read": 0, "rows_skipped": 0, **_new_counts()}
+    reported = 0
+    try:
+        rows = iter(rows)
+        header_row = next(rows, None)
+        if header_row is None:
+            raise ValueError("The file is empty")
+        columns = parse_header(header_row[1])
+
+        start_after, completed = (0, False) if dry_run else load_checkpoint(cursor, import_id)
+        divisions = NameLookup(cursor, 'divisions', create_missing)
+        venues = NameLookup(cursor, 'venues', create_missing)
+
+        pending = []
+        counts = _new_counts()
+        errors = []
+        error_count = 0
+        last_row = start_after
+        groups = group_sessions(rows, columns, start_after)
+        while True:
+            group = next(groups, None)
+            if group is not None:
+                _, last_row, group_rows = group
+                totals['rows_read'] += len(group_rows)
+                session, session_errors = build_session(conn, cursor, group_rows, columns,
+                                                        divisions, venues, dry_run)
+                if session is None:
+                    counts['sessions_failed'] += 1
+                    counts['rows_failed'] += len(group_rows)
+                    errors.extend(session_errors)
+                else:
+                    pending.append(session)
+                    counts['sessions_imported'] += 1
+                    counts['responses_imported'] += len(session['responses'])
+                # Failed sessions count towards the batch too, so their errors are not held indefinitely
+                if len(pending) + counts['sessions_failed'] < batch_size:
+                    continue
+            elif completed and not pending and not counts['sessions_failed']:
+                # A finished import rerun: every row was skipped
+                break
+
+            if not dry_run:
+                # End any read snapshot so the warmed question ids can be cached
+                conn.rollback()
+                catalog.lookup(cursor, [response['question'] for session in pending
+                                        for response in session['responses']], conn)
+                try:
+                    if pending:
+                        write_batch(conn, cursor, pending, catalog)
+                    save_checkpoint(cursor, import_id, last_row, counts, completed=group is None)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            if pending or counts['sessions_failed']:
+                for name, count in counts.items():
+                    totals[name] += count
+                error_count += len(errors)
+                kept = errors[:max(0, MAX_REPORTED_ERRORS - reported)]
+                reported += len(kept)
+                yield {"last_row": last_row, **counts, "errors": kept}
+            if group is None:
+                break
+            pending = []
+            counts = _new_counts()
+            errors = []
+
+        # Row 1 is the header
+        totals['rows_skipped'] = max(0, start_after - 1)
+        yield {
+            "done": True,
+            "import_id": import_id,
+            "dry_run": dry_run,
+            "already_completed": completed,
+            **totals,
+            "errors_not_reported": error_count - reported,
+            "created_divisions": divisions.created,
+            "created_venues": venues.created,
+        }
+    finally:
+        cursor.close()
+
+
+def announce(conn, progress, changes=None):
+    # Tells running servers through the change log, committed on the import's own connection:
+    # dashboards reload, lookup caches are cleared
+    changes = changes or change_log.ChangeLog(storage.backend.connect)
+    cursor = conn.cursor()
+    try:
+        if progress['sessions_imported']:
+            changes.append(cursor, change_log.EVENT, events.RESET, '{}')
+        if progress['created_divisions']:
+            changes.append(cursor, change_log.INVALIDATE, 'divisions')
+        if progress['created_venues']:
+            changes.append(cursor, change_log.INVALIDATE, 'venues')
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def run(path, fmt=None, import_id=None, dry_run=False, create_missing=False,
+        batch_size=None, restart=False):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in IMPORT_FORMATS:
+        raise SystemExit(f"format must be one of {', '.join(IMPORT_FORMATS)}")
+    conn = storage.backend.connect()
+    try:
+        with open(path, 'rb') as stream:
+            import_id = import_id or file_fingerprint(stream)
+            if restart and not dry_run:
+                reset_checkpoint(conn, import_id)
+            failed = 0
+            for progress in import_rows(conn, read_rows(stream, fmt), import_id, dry_run,
+                                        create_missing, batch_size):
+                for error in progress.pop('errors', []):
+                    print(f"row {error['row']}: {error['error']}", file=sys.stderr)
+                if progress.get('done'):
+                    failed = progress['sessions_failed']
+                    if not dry_run:
+                        try:
+                            announce(conn, progress)
+                        except storage.backend.Error as e:
+                            print(f"could not notify running servers: {e}", file=sys.stderr)
+                    print(' '.join(f"{name}={value}" for name, value in progress.items()))
+                else:
+                    print(f"through row {progress['last_row']}: {progress['sessions_imported']} sessions, "
+                          f"{progress['responses_imported']} responses, {progress['sessions_failed']} failed")
+            return failed
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import feedback sessions from a CSV or XLSX file")
+    parser.add_argument('path', help="file laid out like /api/admin/export output: one row per response")
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument('--import-id', help="checkpoint name; defaults to the file's SHA-256, "
+                                            "so rerunning the same file resumes or skips it")
+    parser.add_argument('--dry-run', action='store_true', help="validate every row without writing anything")
+    parser.add_argument('--create-missing', action='store_true',
+                        help="add divisions and venues the database does not know yet")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                        help="sessions per transaction (default: IMPORT_BATCH_SIZE)")
+    parser.add_argument('--restart', action='store_true', help="discard the checkpoint and import from the top")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+    raise SystemExit(1 if run(args.path, args.format, args.import_id, args.dry_run, args.create_missing,
+                              args.batch_size, args.restart) else 0)
@@ -0,0 +1,191 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger('feedback.ingest')
+
+
+class IngestQueue:
+    # Durable local queue of validated submissions, stored in SQLite in WAL mode
+    def __init__(self, path, lease_timeout=300, max_attempts=5, retention=86400):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                session_id INTEGER,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                claimed_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions (status, available_at);
+        """)
+        # Queue files created before idempotency keys existed lack the column
+        if not any(row[1] == 'idempotency_key' for row in conn.execute("PRAGMA table_info(submissions)")):
+            conn.execute("ALTER TABLE submissions ADD COLUMN idempotency_key TEXT")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_idempotency ON submissions (idempotency_key)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL still survives a process crash; only an OS crash can lose the last commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, payload, idempotency_key=None):
+        # Returns (submission_id, replayed); a key seen before returns the earlier submission.
+        # Keys are forgotten when their submission is purged, `retention` seconds after it finished.
+        submission_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            if idempotency_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM submissions WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row is not None:
+                    return row[0], True
+            conn.execute(
+                "INSERT INTO submissions (id, payload, created_at, available_at, idempotency_key) VALUES (?, ?, ?, ?, ?)",
+                (submission_id, json.dumps(payload), now, now, idempotency_key)
+            )
+        return submission_id, False
+
+    def status(self, submission_id):
+        row = self._conn().execute(
+            "SELECT status, session_id, error, attempts, created_at, finished_at FROM submissions WHERE id = ?",
+            (submission_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "submission_id": submission_id,
+            "status": row[0],
+            "session_id": row[1],
+            "error": row[2],
+            "attempts": row[3],
+            "queued_at": row[4],
+            "finished_at": row[5],
+        }
+
+    def claim(self, limit):
+        # Pending items, plus items whose worker died mid-batch and let the lease expire
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute("""
+                SELECT id, payload FROM submissions
+                WHERE (status = 'pending' AND available_at <= ?)
+                   OR (status = 'processing' AND claimed_at < ?)
+                ORDER BY created_at
+                LIMIT ?
+            """, (now, now - self.lease_timeout, limit)).fetchall()
+            conn.executemany(
+                "UPDATE submissions SET status = 'processing', claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                [(now, row[0]) for row in rows]
+            )
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def complete(self, results):
+        # results: list of (submission_id, {"session_id": ...} or {"error": ...})
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE submissions SET status = ?, session_id = ?, error = ?, finished_at = ? WHERE id = ?",
+                [
+                    ('done' if 'session_id' in result else 'failed',
+                     result.get('session_id'), result.get('error'), now, submission_id)
+                    for submission_id, result in results
+                ]
+            )
+
+    def retry_later(self, submission_ids, error):
+        # Batch-level failure (e.g. database unreachable): back off, give up after max_attempts
+        now = time.time()
+        with self._transaction() as conn:
+            for submission_id in submission_ids:
+                attempts = conn.execute("SELECT attempts FROM submissions WHERE id = ?", (submission_id,)).fetchone()[0]
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE submissions SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                        (error, now, submission_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE submissions SET status = 'pending', error = ?, available_at = ? WHERE id = ?",
+                        (error, now + 2 ** attempts, submission_id)
+                    )
+
+    def purge_finished(self):
+        self._conn().execute(
+            "DELETE FROM submissions WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - self.retention,)
+        )
+
+    def depth(self):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM submissions WHERE status IN ('pending', 'processing')"
+        ).fetchone()[0]
+
+
+def start_workers(queue, writer, count=2, batch_size=50, poll_interval=0.5):
+    # writer(submission_ids, payloads) -> list of {"session_id": ...} / {"error": ...}, one per payload.
+    # A batch whose completion is not recorded is claimed again after its lease expires, so the
+    # writer must recognise submissions it already wrote (the app keys them by submission id).
+    def run():
+        last_purge = 0
+        while True:
+            try:
+                batch = queue.claim(batch_size)
+                if not batch:
+                    if time.time() - last_purge > 3600:
+                        queue.purge_finished()
+                        last_purge = time.time()
+                    time.sleep(poll_interval)
+                    continue
+
+                ids = [submission_id for submission_id, _ in batch]
+                try:
+                    results = writer(ids, [payload for _, payload in batch])
+                except Exception as e:
+                    logger.error("ingest batch failed", extra={"batch_size": len(batch), "error": str(e)})
+                    queue.retry_later(ids, str(e))
+                    continue
+                queue.complete(list(zip(ids, results)))
+            except Exception as e:
+                # Queue bookkeeping failed, e.g. "database is locked" with several processes on one
+                # queue file. Keep the thread alive; unfinished items come back when their lease expires.
+                logger.warning("ingest queue operation failed", extra={"error": str(e)})
+                time.sleep(poll_interval)
+
+    threads = []
+    for index in range(count):
+        thread = threading.Thread(target=run, name=f"ingest-worker-{index}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
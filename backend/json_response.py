@@ -0,0 +1,63 @@
+import decimal
+import uuid
+from datetime import date, datetime, time, timezone
+
+import orjson
+from flask.json.provider import JSONProvider
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Dates keep Flask's RFC 1123 form, which the admin pages parse and send back on PUT.
+# No OPT_SERIALIZE_NUMPY: it makes orjson import numpy lazily inside the first call that needs
+# it, and several request threads making that call at once crash the process (SIGILL).
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+
+def http_date(value):
+    # werkzeug.http.http_date without the email.utils round trip; naive values are taken as UTC
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+    else:
+        value = datetime.combine(value, time())
+    return (f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT")
+
+
+def _default(value):
+    # Everything orjson does not handle itself, encoded as Flask's default provider does
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    # NumPy scalars and arrays
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+def ndjson(rows):
+    # One JSON document per line, as a single chunk of a streamed response
+    return b''.join([dumps(row) + b'\n' for row in rows])
+
+
+class OrjsonProvider(JSONProvider):
+    # Drop-in for Flask's JSON provider with the same output (sorted keys, compact), built by orjson
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,36 @@
+import hashlib
+import json
+import threading
+import time
+
+
+class TTLCache:
+    # Small in-process cache for lookup tables; each entry keeps its value and an ETag
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] > now:
+                return entry[0], entry[1]
+            generation = self._generations.get(key, 0)
+
+        # Load outside the lock; concurrent misses may both query, which is harmless
+        value = loader()
+        payload = json.dumps(value, sort_keys=True, default=str).encode()
+        etag = hashlib.md5(payload).hexdigest()
+        with self._lock:
+            # Skip storing if the key was invalidated while we were loading
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = (value, etag, now + self.ttl)
+        return value, etag
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
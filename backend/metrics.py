@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+
+from flask import has_request_context, request
+
+# Seconds; shared by every latency histogram
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+slow_query_logger = logging.getLogger('feedback.slow_query')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram('feedback_request_duration_seconds', "Handler time per route")
+REQUESTS = Counter('feedback_requests_total', "Requests per route and status")
+DB_ACQUIRE_DURATION = Histogram('feedback_db_acquire_seconds', "Time to check a connection out of the pool")
+QUERY_DURATION = Histogram('feedback_db_query_seconds', "Time spent executing SQL statements")
+QUERY_ROWS = Histogram('feedback_db_query_rows', "Rows returned or affected per statement", ROW_BUCKETS)
+SLOW_QUERIES = Counter('feedback_db_slow_queries_total', "Statements slower than the slow-query threshold")
+ADMISSION_REJECTED = Counter('feedback_admission_rejected_total', "Write requests answered 429, by reason")
+
+REGISTRY = [REQUEST_DURATION, REQUESTS, DB_ACQUIRE_DURATION, QUERY_DURATION, QUERY_ROWS, SLOW_QUERIES,
+            ADMISSION_REJECTED]
+
+
+def current_route():
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule else 'unmatched'
+    return 'background'
+
+
+class InstrumentedCursor:
+    # Cursor proxy that times each statement and counts the rows it touches
+    slow_query_threshold = 0.2
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._route = current_route()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, method, statement, *args):
+        started = time.perf_counter()
+        try:
+            return method(statement, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            QUERY_DURATION.observe(elapsed, route=self._route)
+            # DML reports affected rows now; SELECT rows are counted as they are fetched
+            if not getattr(self._cursor, 'with_rows', False) and self._cursor.rowcount >= 0:
+                QUERY_ROWS.observe(self._cursor.rowcount, route=self._route)
+            if elapsed >= self.slow_query_threshold:
+                SLOW_QUERIES.inc(route=self._route)
+                slow_query_logger.warning("slow query", extra={
+                    "route": self._route,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "statement": ' '.join(str(statement).split())[:500],
+                })
+
+    def execute(self, statement, params=()):
+        return self._timed(self._cursor.execute, statement, params)
+
+    def executemany(self, statement, seq_params):
+        return self._timed(self._cursor.executemany, statement, seq_params)
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        QUERY_ROWS.observe(len(rows), route=self._route)
+        return rows
+
+    def fetchmany(self, size=1):
+        rows = self._cursor.fetchmany(size)
+        QUERY_ROWS.observe(len(rows), route=self._route)
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            QUERY_ROWS.observe(1, route=self._route)
+        return row
+
+
+def render(extra_gauges=()):
+    # extra_gauges: iterable of (name, help_text, value) rendered as gauges
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, help_text, value in extra_gauges:
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,124 @@
+from datetime import date, datetime
+
+# Monthly RANGE partitions on feedback_sessions.session_datetime (MySQL only).
+# feedback_responses carries the FULLTEXT index, which InnoDB cannot partition;
+# it is kept small by archive.py instead.
+PARTITIONED_TABLE = 'feedback_sessions'
+PARTITION_COLUMN = 'session_datetime'
+FUTURE_PARTITION = 'p_future'
+MONTHS_AHEAD = 3
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_definition(month):
+    # Partition pYYYYMM holds the rows dated in that month
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+
+
+def future_definition():
+    # Catch-all so an insert dated past the last monthly partition never fails
+    return f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)"
+
+
+def list_partitions(cursor):
+    # [(name, exclusive upper bound date, or None for MAXVALUE)]; empty if the table is not partitioned
+    cursor.execute("""
+        SELECT partition_name, partition_description FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    """, (PARTITIONED_TABLE,))
+    result = []
+    for name, bound in cursor.fetchall():
+        bound = bound.decode() if isinstance(bound, bytes) else bound
+        if bound == 'MAXVALUE':
+            result.append((name, None))
+        else:
+            result.append((name, datetime.fromisoformat(bound.strip("'")).date()))
+    return result
+
+
+def _months(first, end):
+    month = first
+    while month < end:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_table(cursor, months_ahead=MONTHS_AHEAD, today=None):
+    # One-off conversion of feedback_sessions; a no-op if it is already partitioned.
+    # MySQL requires every unique key to contain the partitioning column and does not
+    # allow foreign keys on partitioned tables, or referencing them.
+    if list_partitions(cursor):
+        return
+    cursor.execute("""
+        SELECT table_name, constraint_name FROM information_schema.referential_constraints
+        WHERE constraint_schema = DATABASE() AND (table_name = %s OR referenced_table_name = %s)
+    """, (PARTITIONED_TABLE, PARTITIONED_TABLE))
+    for table, constraint in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {table} DROP FOREIGN KEY {constraint}")
+
+    cursor.execute(f"UPDATE {PARTITIONED_TABLE} SET {PARTITION_COLUMN} = created_at WHERE {PARTITION_COLUMN} IS NULL")
+    cursor.execute(f"ALTER TABLE {PARTITIONED_TABLE} MODIFY {PARTITION_COLUMN} DATETIME NOT NULL")
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.key_column_usage
+        WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = 'PRIMARY' AND column_name = %s
+    """, (PARTITIONED_TABLE, PARTITION_COLUMN))
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"ALTER TABLE {PARTITIONED_TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, {PARTITION_COLUMN})")
+
+    cursor.execute(f"SELECT MIN({PARTITION_COLUMN}) FROM {PARTITIONED_TABLE}")
+    current = month_start(today or date.today())
+    oldest = cursor.fetchone()[0]
+    first = min(month_start(oldest), current) if oldest else current
+    definitions = [partition_definition(month) for month in _months(first, add_months(current, months_ahead + 1))]
+    cursor.execute(f"""
+        ALTER TABLE {PARTITIONED_TABLE} PARTITION BY RANGE COLUMNS({PARTITION_COLUMN}) (
+            {', '.join(definitions + [future_definition()])}
+        )
+    """)
+
+
+def add_future_partitions(cursor, months_ahead=MONTHS_AHEAD, today=None):
+    # Split p_future so the next months_ahead months each have their own partition
+    bounds = [bound for _, bound in list_partitions(cursor) if bound is not None]
+    if not bounds:
+        return []
+    target = add_months(month_start(today or date.today()), months_ahead + 1)
+    # The last monthly partition ends at max(bounds), which is where the next one starts
+    months = list(_months(max(bounds), target))
+    if not months:
+        return []
+    definitions = [partition_definition(month) for month in months]
+    cursor.execute(f"""
+        ALTER TABLE {PARTITIONED_TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (
+            {', '.join(definitions + [future_definition()])}
+        )
+    """)
+    return [partition_name(month) for month in months]
+
+
+def drop_empty_partitions(cursor, before):
+    # Drop monthly partitions that end on or before `before` and hold no rows, i.e. months
+    # the archiver has emptied. Non-empty partitions are never dropped.
+    dropped = []
+    for name, bound in list_partitions(cursor):
+        if bound is None or bound > before:
+            continue
+        cursor.execute(f"SELECT 1 FROM {PARTITIONED_TABLE} PARTITION ({name}) LIMIT 1")
+        if cursor.fetchone() is None:
+            dropped.append(name)
+    if dropped:
+        cursor.execute(f"ALTER TABLE {PARTITIONED_TABLE} DROP PARTITION {', '.join(dropped)}")
+    return dropped
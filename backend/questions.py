@@ -0,0 +1,136 @@
+import hashlib
+import threading
+import unicodedata
+
+import storage
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def normalize_question(text):
+    # Questions differing only in whitespace or Unicode composition share one catalog entry
+    return ' '.join(unicodedata.normalize('NFC', str(text)).split())
+
+
+def question_hash(text):
+    return hashlib.sha256(normalize_question(text).encode('utf-8')).hexdigest()
+
+
+class QuestionCatalog:
+    # Resolves question text to questions.id, keeping a process-wide hash -> id cache
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def _select(self, cursor, hashes, lock=False):
+        if not hashes:
+            return {}
+        placeholders = ', '.join(['%s'] * len(hashes))
+        # A locking read sees rows committed after this transaction's snapshot was taken
+        cursor.execute(
+            f"SELECT question_hash, id FROM questions WHERE question_hash IN ({placeholders})"
+            + (" FOR UPDATE" if lock else ""),
+            list(hashes)
+        )
+        rows = cursor.fetchall()
+        # Callers may hand over a dictionary cursor
+        if rows and isinstance(rows[0], dict):
+            return {row['question_hash']: row['id'] for row in rows}
+        return {row[0]: row[1] for row in rows}
+
+    def lookup(self, cursor, texts, conn=None):
+        # hash -> id for the texts already in the catalog. Ids read before conn opened a
+        # transaction are committed rows and get cached; anything read inside one could
+        # still be rolled back, so it is returned but not cached.
+        hashes = {question_hash(text) for text in texts if text is not None}
+        with self._lock:
+            known = {h: self._ids[h] for h in hashes if h in self._ids}
+        missing = hashes - known.keys()
+        if missing:
+            cacheable = conn is not None and not conn.in_transaction
+            found = self._select(cursor, missing)
+            if cacheable and found:
+                with self._lock:
+                    if len(self._ids) + len(found) > self.max_entries:
+                        self._ids.clear()
+                    self._ids.update(found)
+            known.update(found)
+        return known
+
+    def resolve(self, cursor, texts, conn=None):
+        # One questions.id per text (None for None), adding unseen questions to the catalog
+        known = self.lookup(cursor, texts, conn)
+        new = {}
+        for text in texts:
+            if text is not None:
+                new.setdefault(question_hash(text), normalize_question(text))
+        for h in known:
+            new.pop(h, None)
+        if new:
+            cursor.executemany(
+                storage.backend.insert_or_ignore('questions', ('question_hash', 'question')),
+                list(new.items())
+            )
+            known.update(self._select(cursor, new, lock=True))
+        return [None if text is None else known[question_hash(text)] for text in texts]
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+def backfill(cursor, catalog=None, batch_size=BACKFILL_BATCH_SIZE):
+    # Point existing responses at their catalog entry, walking feedback_responses by id
+    catalog = catalog or QuestionCatalog()
+    last_id = 0
+    while True:
+        cursor.execute("""
+            SELECT id, question FROM feedback_responses
+            WHERE id > %s AND question_id IS NULL AND question IS NOT NULL
+            ORDER BY id LIMIT %s
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        ids = catalog.resolve(cursor, [row[1] for row in rows])
+        cursor.executemany(
+            "UPDATE feedback_responses SET question_id = %s WHERE id = %s",
+            [(question_id, row[0]) for question_id, row in zip(ids, rows)]
+        )
+        last_id = rows[-1][0]
+
+
+def question_stats(cursor, question_id, clauses, params):
+    # Overall and per-division / per-venue aggregates for one question; None if it does not exist
+    cursor.execute("SELECT id, question FROM questions WHERE id = %s", (question_id,))
+    question = cursor.fetchone()
+    if question is None:
+        return None
+    where = ' AND '.join(["fr.question_id = %s"] + clauses)
+    aggregates = """
+        COUNT(*) AS response_count, COUNT(DISTINCT fr.session_id) AS session_count,
+        AVG(fr.accuracy_score) AS avg_accuracy_score,
+        AVG(fr.relevancy_score) AS avg_relevancy_score,
+        AVG(fr.performance_score) AS avg_performance_score
+    """
+    cursor.execute(f"""
+        SELECT {aggregates}, MIN(fs.session_datetime) AS first_seen, MAX(fs.session_datetime) AS last_seen
+        FROM feedback_responses fr
+        JOIN feedback_sessions fs ON fs.id = fr.session_id
+        WHERE {where}
+    """, [question_id] + params)
+    stats = dict(question, **cursor.fetchone())
+
+    for dimension, lookup_table in (('division', 'divisions'), ('venue', 'venues')):
+        cursor.execute(f"""
+            SELECT fs.{dimension}_id AS {dimension}_id, l.name AS {dimension}_name, {aggregates}
+            FROM feedback_responses fr
+            JOIN feedback_sessions fs ON fs.id = fr.session_id
+            LEFT JOIN {lookup_table} l ON fs.{dimension}_id = l.id
+            WHERE {where}
+            GROUP BY fs.{dimension}_id, l.name
+            ORDER BY fs.{dimension}_id
+        """, [question_id] + params)
+        stats[f'by_{dimension}'] = cursor.fetchall()
+    return stats
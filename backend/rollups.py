@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+import storage
+
+GRANULARITIES = ('day', 'week', 'month')
+DIMENSIONS = ('division', 'venue')
+
+ROLLUP_KEY = ('granularity', 'bucket_start', 'dimension', 'dimension_id')
+ROLLUP_SUMS = ('session_count', 'sum_total', 'sum_accuracy', 'sum_relevancy', 'sum_performance')
+
+SNAPSHOT_COLUMNS = "division_id, venue_id, session_datetime, total_score, accuracy_score, relevancy_score, performance_score"
+
+
+def bucket_start(value, granularity):
+    # Mirrors the backend's bucket_sql() expressions used by rebuild()
+    day = value.date()
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def snapshot(cursor, session_id, for_update=False):
+    # Current rollup-relevant values of a session, or None if it does not exist
+    lock = " FOR UPDATE" if for_update else ""
+    cursor.execute(f"SELECT {SNAPSHOT_COLUMNS} FROM feedback_sessions WHERE id = %s{lock}", (session_id,))
+    row = cursor.fetchone()
+    if row is None or isinstance(row, dict):
+        return row
+    return dict(zip(cursor.column_names, row))
+
+
+def session_rows(session, sign):
+    # Upsert rows adding (sign=1) or removing (sign=-1) one session in every bucket it falls in
+    if not session or session.get('total_score') is None or session.get('session_datetime') is None:
+        return []
+    rows = []
+    for dimension in DIMENSIONS:
+        dimension_id = session.get(f'{dimension}_id')
+        if dimension_id is None:
+            continue
+        for granularity in GRANULARITIES:
+            rows.append((
+                granularity,
+                bucket_start(session['session_datetime'], granularity),
+                dimension,
+                dimension_id,
+                sign,
+                sign * float(session['total_score']),
+                sign * float(session['accuracy_score'] or 0),
+                sign * float(session['relevancy_score'] or 0),
+                sign * float(session['performance_score'] or 0),
+            ))
+    return rows
+
+
+def apply_session(cursor, session, sign):
+    rows = session_rows(session, sign)
+    if not rows:
+        return
+    cursor.executemany(storage.backend.upsert_increment('score_rollups', ROLLUP_KEY, ROLLUP_SUMS), rows)
+
+
+def apply_sessions(cursor, sessions, sign=1):
+    # Many sessions folded into one increment per bucket, e.g. when re-adding archived sessions
+    totals = {}
+    for session in sessions:
+        for row in session_rows(session, sign):
+            key, sums = row[:len(ROLLUP_KEY)], row[len(ROLLUP_KEY):]
+            current = totals.get(key)
+            totals[key] = sums if current is None else tuple(a + b for a, b in zip(current, sums))
+    if totals:
+        cursor.executemany(
+            storage.backend.upsert_increment('score_rollups', ROLLUP_KEY, ROLLUP_SUMS),
+            [key + sums for key, sums in totals.items()]
+        )
+
+
+def apply_change(cursor, before, after):
+    if before == after:
+        return
+    apply_session(cursor, before, -1)
+    apply_session(cursor, after, 1)
+
+
+def rebuild(cursor):
+    # Recompute every bucket from feedback_sessions; run inside a transaction
+    cursor.execute("DELETE FROM score_rollups")
+    for dimension in DIMENSIONS:
+        for granularity in GRANULARITIES:
+            bucket = storage.backend.bucket_sql(granularity, 'fs.session_datetime')
+            cursor.execute(f"""
+                INSERT INTO score_rollups
+                (granularity, bucket_start, dimension, dimension_id, session_count,
+                 sum_total, sum_accuracy, sum_relevancy, sum_performance)
+                SELECT %s, {bucket}, %s, fs.{dimension}_id, COUNT(*),
+                       SUM(fs.total_score), SUM(COALESCE(fs.accuracy_score, 0)),
+                       SUM(COALESCE(fs.relevancy_score, 0)), SUM(COALESCE(fs.performance_score, 0))
+                FROM feedback_sessions fs
+                WHERE fs.total_score IS NOT NULL AND fs.session_datetime IS NOT NULL
+                  AND fs.{dimension}_id IS NOT NULL
+                GROUP BY {bucket}, fs.{dimension}_id
+            """, (granularity, dimension))
+
+
+def query_stats(cursor, granularity, dimension, dimension_id=None, date_from=None, date_to=None):
+    clauses = ["r.granularity = %s", "r.dimension = %s", "r.session_count > 0"]
+    params = [granularity, dimension]
+    if dimension_id is not None:
+        clauses.append("r.dimension_id = %s")
+        params.append(dimension_id)
+    if date_from is not None:
+        clauses.append("r.bucket_start >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        clauses.append("r.bucket_start < %s")
+        params.append(date_to)
+    lookup_table = 'divisions' if dimension == 'division' else 'venues'
+    cursor.execute(f"""
+        SELECT r.bucket_start, r.dimension_id, l.name AS dimension_name, r.session_count,
+               r.sum_total / r.session_count AS avg_total_score,
+               r.sum_accuracy / r.session_count AS avg_accuracy_score,
+               r.sum_relevancy / r.session_count AS avg_relevancy_score,
+               r.sum_performance / r.session_count AS avg_performance_score
+        FROM score_rollups r
+        LEFT JOIN {lookup_table} l ON r.dimension_id = l.id
+        WHERE {' AND '.join(clauses)}
+        ORDER BY r.bucket_start, r.dimension_id
+    """, params)
+    return cursor.fetchall()
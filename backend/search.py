@@ -0,0 +1,98 @@
+import html
+import re
+
+import storage
+
+SEARCH_INDEX = 'ft_responses_text'
+SEARCH_COLUMNS = ('chatbot_answer', 'additional_comments')
+# Question text is stored once in the questions catalog, which has its own index
+QUESTION_INDEX = 'ft_questions_text'
+QUESTION_COLUMNS = ('question',)
+HIGHLIGHT_FIELDS = ('question', 'chatbot_answer', 'additional_comments')
+SNIPPET_RADIUS = 80
+
+# Boolean-mode operators are stripped when picking out terms to highlight
+_TERM_RE = re.compile(r'\w+')
+
+
+def query_terms(query):
+    return sorted({term.lower() for term in _TERM_RE.findall(query) if len(term) > 1}, key=len, reverse=True)
+
+
+def highlight(text, terms):
+    # Escaped snippet around the first match, with every term wrapped in <mark>
+    if not text or not terms:
+        return None
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    if first is None:
+        return None
+    start = max(0, first.start() - SNIPPET_RADIUS)
+    end = min(len(text), first.end() + SNIPPET_RADIUS)
+    snippet = text[start:end]
+    parts = []
+    last = 0
+    for match in pattern.finditer(snippet):
+        parts.append(html.escape(snippet[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(html.escape(snippet[last:]))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+def fulltext_clause(query, boolean_mode):
+    # (from_clause, match_clause, score_expression, params) for the backend's full-text index
+    return storage.backend.fulltext_search(
+        SEARCH_INDEX, 'feedback_responses', 'fr', SEARCH_COLUMNS, query, boolean_mode
+    )
+
+
+def question_clause(query, boolean_mode):
+    return storage.backend.fulltext_search(
+        QUESTION_INDEX, 'questions', 'q', QUESTION_COLUMNS, query, boolean_mode
+    )
+
+
+def search(cursor, query, boolean_mode, clauses, params, limit, offset):
+    # Ranked full-text hits over responses, joined to their session for filtering and display.
+    # A response matches on its own text or on its question's catalog entry, scoring the sum of both.
+    source, match, score, match_params = fulltext_clause(query, boolean_mode)
+    question_source, question_match, question_score, question_params = question_clause(query, boolean_mode)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor.execute(f"""
+        SELECT fr.id AS response_id, fr.session_id, fs.tester_name, fs.session_datetime,
+               fs.division_id, d.name AS division_name, fs.venue_id, v.name AS venue_name,
+               hits.score AS score,
+               q.question, fr.chatbot_answer, fr.additional_comments
+        FROM (
+            SELECT response_id, SUM(score) AS score FROM (
+                SELECT fr.id AS response_id, {score} AS score FROM {source} WHERE {match}
+                UNION ALL
+                SELECT fr.id AS response_id, matched.score FROM (
+                    SELECT q.id, {question_score} AS score FROM {question_source} WHERE {question_match}
+                ) matched
+                JOIN feedback_responses fr ON fr.question_id = matched.id
+            ) matches
+            GROUP BY response_id
+        ) hits
+        JOIN feedback_responses fr ON fr.id = hits.response_id
+        JOIN feedback_sessions fs ON fs.id = fr.session_id
+        LEFT JOIN questions q ON q.id = fr.question_id
+        LEFT JOIN divisions d ON fs.division_id = d.id
+        LEFT JOIN venues v ON fs.venue_id = v.id
+        {where}
+        ORDER BY score DESC, fr.id DESC
+        LIMIT %s OFFSET %s
+    """, match_params + question_params + params + [limit + 1, offset])
+    rows = cursor.fetchall()
+
+    terms = query_terms(query)
+    hits = []
+    for row in rows[:limit]:
+        row['highlights'] = {
+            field: snippet for field in HIGHLIGHT_FIELDS
+            if (snippet := highlight(row.pop(field), terms)) is not None
+        }
+        hits.append(row)
+    next_offset = offset + limit if len(rows) > limit else None
+    return hits, next_offset
@@ -0,0 +1,178 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+# Imported once in the master so every worker starts with the code already loaded
+import app as feedback
+from app_logging import configure_logging
+from config import load_config
+
+logger = logging.getLogger('feedback.serve')
+
+# Production entry point: a pre-fork server (POSIX only). The master binds the listening socket
+# and forks WORKERS processes. Each worker builds its own app with create_app() (connection
+# pool, caches, background threads) and serves the shared socket with a threaded WSGI server.
+# SIGTERM or SIGINT drains: workers stop accepting, end event streams, give in-flight requests
+# up to GRACEFUL_TIMEOUT seconds to finish and close their connections. Workers that die are replaced.
+
+# A worker that exits sooner than this after starting is restarted only after a pause
+MIN_WORKER_LIFETIME = 5.0
+# Extra seconds the master allows stopping workers before killing them
+KILL_GRACE = 5.0
+
+
+class InFlight:
+    # WSGI middleware counting requests whose response has not been fully sent yet
+    def __init__(self, app):
+        self.app = app
+        self._count = 0
+        self._idle = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        with self._idle:
+            self._count += 1
+        try:
+            body = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        return _TrackedBody(body, self._finished)
+
+    def _finished(self):
+        with self._idle:
+            self._count -= 1
+            if not self._count:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout):
+        # True once no request is in flight, False if timeout seconds pass first
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._count, timeout)
+
+
+class _TrackedBody:
+    # The server calls close() once the body has been sent or the client went away
+    def __init__(self, body, on_close):
+        self._body = body
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._on_close()
+
+
+def run_worker(sock, config):
+    app = feedback.create_app(config)
+    try:
+        feedback.db_pool.prefill(config['DB_POOL_PREFILL'])
+    except Exception as e:
+        # The pool connects on demand anyway; the database may simply not be up yet
+        logger.warning("could not open database connections", extra={"error": str(e)})
+
+    tracked = InFlight(app)
+    server = make_server(config['HOST'], config['PORT'], tracked, threaded=True, fd=sock.fileno())
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() waits for serve_forever() to return, so it cannot run on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("worker started", extra={"pid": os.getpid()})
+    server.serve_forever()
+
+    # No longer accepting; let what was already running finish
+    feedback.event_hub.close()
+    feedback.changes.stop()
+    if not tracked.wait_idle(config['GRACEFUL_TIMEOUT']):
+        logger.warning("requests still running after graceful timeout", extra={"pid": os.getpid()})
+    feedback.db_pool.close_all()
+    logger.info("worker stopped", extra={"pid": os.getpid()})
+
+
+def serve(config):
+    configure_logging(config['LOG_LEVEL'])
+    sock = socket.create_server((config['HOST'], config['PORT']), backlog=config['LISTEN_BACKLOG'])
+    workers = {}
+    state = {"stopping": False, "deadline": None}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                run_worker(sock, config)
+            except BaseException:
+                logger.exception("worker failed")
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        if state["stopping"]:
+            return
+        state["stopping"] = True
+        state["deadline"] = time.monotonic() + config['GRACEFUL_TIMEOUT'] + KILL_GRACE
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(config['WORKERS']):
+        spawn()
+    logger.info("listening", extra={"host": config['HOST'], "port": config['PORT'], "workers": config['WORKERS']})
+
+    while workers:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if state["stopping"] and time.monotonic() > state["deadline"]:
+                for straggler in workers:
+                    os.kill(straggler, signal.SIGKILL)
+                state["deadline"] = float('inf')
+            time.sleep(0.2)
+            continue
+        started = workers.pop(pid, None)
+        if started is None or state["stopping"]:
+            continue
+        logger.warning("worker exited, starting a new one", extra={"pid": pid, "status": status})
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(1)
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the feedback backend with several worker processes")
+    parser.add_argument('--config', help="JSON settings file (default: FEEDBACK_CONFIG)")
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    overrides = {name.upper(): value for name, value in
+                 (('host', args.host), ('port', args.port), ('workers', args.workers)) if value is not None}
+    serve(load_config(args.config, overrides=overrides))
@@ -0,0 +1,88 @@
+from session_filters import encode_cursor
+
+# Each response's fields and the columns they are read from, selected after session_id
+RESPONSE_FIELDS = (
+    'id', 'question', 'chatbot_answer', 'accuracy_score', 'relevancy_score',
+    'performance_score', 'additional_comments',
+)
+RESPONSE_COLUMNS = (
+    'fr.id', 'q.question', 'fr.chatbot_answer', 'fr.accuracy_score', 'fr.relevancy_score',
+    'fr.performance_score', 'fr.additional_comments',
+)
+MAX_DETAIL_IDS = 100
+
+SESSION_QUERY = """
+    SELECT fs.*, d.name AS division_name, v.name AS venue_name
+    FROM feedback_sessions fs
+    LEFT JOIN divisions d ON fs.division_id = d.id
+    LEFT JOIN venues v ON fs.venue_id = v.id
+"""
+
+
+def parse_ids(value):
+    # Comma-separated session ids, duplicates dropped and request order kept
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValueError("ids must be comma-separated integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError("ids must not be empty")
+    if len(ids) > MAX_DETAIL_IDS:
+        raise ValueError(f"At most {MAX_DETAIL_IDS} ids per request")
+    return ids
+
+
+def attach_responses(conn, sessions):
+    # One query for the responses of every session. Each response row becomes its dict directly,
+    # rather than repeating the session columns on every row of a join and regrouping them.
+    by_id = {}
+    for session in sessions:
+        session['responses'] = []
+        by_id[session['id']] = session['responses']
+    if not by_id:
+        return sessions
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT fr.session_id, {', '.join(RESPONSE_COLUMNS)}
+            FROM feedback_responses fr
+            LEFT JOIN questions q ON q.id = fr.question_id
+            WHERE fr.session_id IN ({', '.join(['%s'] * len(by_id))})
+            ORDER BY fr.session_id, fr.id
+        """, list(by_id))
+        for row in cursor.fetchall():
+            by_id[row[0]].append(dict(zip(RESPONSE_FIELDS, row[1:])))
+    finally:
+        cursor.close()
+    return sessions
+
+
+def details_by_ids(conn, ids):
+    # (sessions in the order of ids, ids that were not found)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"{SESSION_QUERY} WHERE fs.id IN ({', '.join(['%s'] * len(ids))})", ids)
+        found = {session['id']: session for session in cursor.fetchall()}
+    finally:
+        cursor.close()
+    sessions = [found[session_id] for session_id in ids if session_id in found]
+    missing = [session_id for session_id in ids if session_id not in found]
+    return attach_responses(conn, sessions), missing
+
+
+def details_page(conn, clauses, params, limit):
+    # A page of the admin list (same filters, order and cursors) with responses included.
+    # Returns (sessions, next_cursor) so a client can fetch the following page ahead of time.
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"{SESSION_QUERY} {where} ORDER BY fs.created_at DESC, fs.id DESC LIMIT %s", params + [limit + 1])
+        sessions = cursor.fetchall()
+    finally:
+        cursor.close()
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        next_cursor = encode_cursor(sessions[-1]['created_at'], sessions[-1]['id'])
+    return attach_responses(conn, sessions), next_cursor
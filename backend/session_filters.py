@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import datetime
+
+# Columns the admin session list may project, mapped to their SQL expressions.
+# Response TEXT columns are deliberately absent so list queries never touch them.
+SESSION_FIELDS = {
+    'id': 'fs.id',
+    'tester_name': 'fs.tester_name',
+    'division_id': 'fs.division_id',
+    'venue_id': 'fs.venue_id',
+    'session_datetime': 'fs.session_datetime',
+    'created_at': 'fs.created_at',
+    'total_score': 'fs.total_score',
+    'accuracy_score': 'fs.accuracy_score',
+    'relevancy_score': 'fs.relevancy_score',
+    'performance_score': 'fs.performance_score',
+    'division_name': 'd.name',
+    'venue_name': 'v.name',
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# NDJSON pages are streamed row by row, so they may be much larger
+MAX_STREAM_PAGE_SIZE = 100000
+
+
+def parse_fields(value):
+    if not value:
+        names = list(SESSION_FIELDS)
+    else:
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in SESSION_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The keyset columns are always selected so the next cursor can be built
+    for required in ('created_at', 'id'):
+        if required not in names:
+            names.append(required)
+    return names
+
+
+def select_list(names):
+    return ', '.join(f"{SESSION_FIELDS[name]} AS {name}" for name in names)
+
+
+def join_list(names):
+    # Only join the lookup tables whose names were actually requested
+    joins = []
+    if 'division_name' in names:
+        joins.append("LEFT JOIN divisions d ON fs.division_id = d.id")
+    if 'venue_name' in names:
+        joins.append("LEFT JOIN venues v ON fs.venue_id = v.id")
+    return '\n'.join(joins)
+
+
+def parse_datetime(value, name):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+
+
+def parse_filter_values(args):
+    # The division/venue/tester/date filters as typed values; absent filters are left out
+    values = {}
+    if args.get('division_id'):
+        values['division_id'] = int(args['division_id'])
+    if args.get('venue_id'):
+        values['venue_id'] = int(args['venue_id'])
+    if args.get('tester'):
+        values['tester'] = args['tester']
+    if args.get('date_from'):
+        values['date_from'] = parse_datetime(args['date_from'], 'date_from')
+    if args.get('date_to'):
+        values['date_to'] = parse_datetime(args['date_to'], 'date_to')
+    return values
+
+
+def session_filter_clauses(values):
+    # Returns (where_clauses, params) for parse_filter_values() output
+    clauses = []
+    params = []
+    if 'division_id' in values:
+        clauses.append("fs.division_id = %s")
+        params.append(values['division_id'])
+    if 'venue_id' in values:
+        clauses.append("fs.venue_id = %s")
+        params.append(values['venue_id'])
+    if 'tester' in values:
+        # Prefix match keeps the predicate sargable
+        # '!' as the escape character reads the same to MySQL and SQLite
+        clauses.append("fs.tester_name LIKE %s ESCAPE '!'")
+        params.append(values['tester'].replace('!', '!!').replace('%', '!%').replace('_', '!_') + '%')
+    if 'date_from' in values:
+        clauses.append("fs.session_datetime >= %s")
+        params.append(values['date_from'])
+    if 'date_to' in values:
+        clauses.append("fs.session_datetime < %s")
+        params.append(values['date_to'])
+    return clauses, params
+
+
+def parse_session_filters(args):
+    # Returns (where_clauses, params) for the division/venue/tester/date filters
+    return session_filter_clauses(parse_filter_values(args))
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if not value:
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, maximum)
+
+
+def encode_cursor(created_at, session_id):
+    payload = json.dumps([created_at.isoformat(), session_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(session_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_clause(cursor):
+    # Rows strictly after the cursor in (created_at DESC, id DESC) order
+    created_at, session_id = decode_cursor(cursor)
+    return (
+        "(fs.created_at < %s OR (fs.created_at = %s AND fs.id < %s))",
+        [created_at, created_at, session_id],
+    )
@@ -1,54 +1,37 @@
-import mysql.connector
-from mysql.connector import errorcode
+import argparse
+import archive
+import idempotency
+import partitions
+import questions
+import rollups
+import search
+import storage
 
-# Database configuration
-db_config = {
-    'host': 'localhost',
-    'user': 'admin',
-    'password': 'admin',
-    'database': 'genai_tests'
-}
+# The database comes from storage.backend: MySQL by default, or embedded SQLite with
+# DB_BACKEND=sqlite, set in the environment or the FEEDBACK_CONFIG file
 
 def create_database():
-    try:
-        conn = mysql.connector.connect(
-            host=db_config['host'],
-            user=db_config['user'],
-            password=db_config['password']
-        )
-        cursor = conn.cursor()
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_config['database']}")
-        print(f"Database {db_config['database']} created successfully.")
-    except mysql.connector.Error as err:
-        if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-            print("Something is wrong with your user name or password")
-        elif err.errno == errorcode.ER_BAD_DB_ERROR:
-            print("Database does not exist")
-        else:
-            print(err)
-    finally:
-        cursor.close()
-        conn.close()
+    storage.backend.create_database()
 
 def create_tables():
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = storage.backend.connect()
         cursor = conn.cursor()
 
         # Create tables
-        cursor.execute("""
+        cursor.execute(storage.backend.ddl("""
             CREATE TABLE IF NOT EXISTS divisions (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 name VARCHAR(255) NOT NULL
             )
-        """)
-        cursor.execute("""
+        """))
+        cursor.execute(storage.backend.ddl("""
             CREATE TABLE IF NOT EXISTS venues (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 name VARCHAR(255) NOT NULL
             )
-        """)
-        cursor.execute("""
+        """))
+        cursor.execute(storage.backend.ddl("""
             CREATE TABLE IF NOT EXISTS feedback_sessions (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 tester_name VARCHAR(255) NOT NULL,
@@ -58,8 +41,8 @@ def create_tables():
                 FOREIGN KEY (division_id) REFERENCES divisions(id),
                 FOREIGN KEY (venue_id) REFERENCES venues(id)
             )
-        """)
-        cursor.execute("""
+        """))
+        cursor.execute(storage.backend.ddl("""
             CREATE TABLE IF NOT EXISTS feedback_responses (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 session_id INT,
@@ -71,14 +54,352 @@ def create_tables():
                 additional_comments TEXT,
                 FOREIGN KEY (session_id) REFERENCES feedback_sessions(id)
             )
-        """)
+        """))
+        conn.commit()
         print("Tables created successfully.")
-    except mysql.connector.Error as err:
+    except storage.backend.Error as err:
+        print(f"Error: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
+def column_exists(cursor, table, column):
+    return storage.backend.column_exists(cursor, table, column)
+
+def index_exists(cursor, table, index):
+    return storage.backend.index_exists(cursor, table, index)
+
+def add_column(cursor, table, column, definition):
+    if not column_exists(cursor, table, column):
+        storage.backend.add_column(cursor, table, column, definition)
+
+def add_index(cursor, table, index, columns, kind=''):
+    if not index_exists(cursor, table, index):
+        cursor.execute(f"CREATE {kind} INDEX {index} ON {table} ({columns})")
+
+def add_fulltext_index(cursor, table, index, columns):
+    if not index_exists(cursor, table, index):
+        storage.backend.add_fulltext_index(cursor, table, index, columns)
+
+def migration_1(cursor):
+    # Columns the app already reads and writes but the original schema lacked
+    add_column(cursor, 'feedback_sessions', 'created_at', "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP")
+    add_column(cursor, 'feedback_sessions', 'total_score', "DECIMAL(6,3)")
+    add_column(cursor, 'feedback_sessions', 'accuracy_score', "DECIMAL(6,3)")
+    add_column(cursor, 'feedback_sessions', 'relevancy_score', "DECIMAL(6,3)")
+    add_column(cursor, 'feedback_sessions', 'performance_score', "DECIMAL(6,3)")
+
+def migration_2(cursor):
+    # Keyset pagination of the admin list and plain date-range scans
+    add_index(cursor, 'feedback_sessions', 'idx_sessions_created', "created_at, id")
+    add_index(cursor, 'feedback_sessions', 'idx_sessions_datetime', "session_datetime")
+    # Per-division / per-venue time-range scans, covering the aggregate score columns
+    add_index(cursor, 'feedback_sessions', 'idx_sessions_division_datetime',
+              "division_id, session_datetime, total_score, accuracy_score, relevancy_score, performance_score")
+    add_index(cursor, 'feedback_sessions', 'idx_sessions_venue_datetime',
+              "venue_id, session_datetime, total_score, accuracy_score, relevancy_score, performance_score")
+    add_index(cursor, 'feedback_responses', 'idx_responses_session', "session_id, id")
+
+def migration_3(cursor):
+    # Per-division / per-venue score sums by day, week and month, maintained by the app
+    cursor.execute(storage.backend.ddl("""
+        CREATE TABLE IF NOT EXISTS score_rollups (
+            granularity ENUM('day', 'week', 'month') NOT NULL,
+            bucket_start DATE NOT NULL,
+            dimension ENUM('division', 'venue') NOT NULL,
+            dimension_id INT NOT NULL,
+            session_count INT NOT NULL DEFAULT 0,
+            sum_total DECIMAL(14,3) NOT NULL DEFAULT 0,
+            sum_accuracy DECIMAL(14,3) NOT NULL DEFAULT 0,
+            sum_relevancy DECIMAL(14,3) NOT NULL DEFAULT 0,
+            sum_performance DECIMAL(14,3) NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, dimension, bucket_start, dimension_id)
+        )
+    """))
+    rollups.rebuild(cursor)
+
+def migration_4(cursor):
+    # Bumped on every edit so concurrent admin edits can be detected without locking
+    add_column(cursor, 'feedback_sessions', 'version', "INT NOT NULL DEFAULT 0")
+
+def migration_5(cursor):
+    # A FULLTEXT index on MySQL, an FTS5 table kept in sync by triggers on SQLite
+    add_fulltext_index(cursor, 'feedback_responses', search.SEARCH_INDEX,
+                       ('question', 'chatbot_answer', 'additional_comments'))
+
+def migration_6(cursor):
+    # Catalog of distinct question texts, so per-question aggregates group by an indexed integer
+    cursor.execute(storage.backend.ddl("""
+        CREATE TABLE IF NOT EXISTS questions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            question_hash CHAR(64) NOT NULL,
+            question TEXT NOT NULL,
+            UNIQUE (question_hash)
+        )
+    """))
+    add_column(cursor, 'feedback_responses', 'question_id', "INT")
+    add_index(cursor, 'feedback_responses', 'idx_responses_question',
+              "question_id, session_id, accuracy_score, relevancy_score, performance_score")
+    questions.backfill(cursor)
+
+def migration_7(cursor):
+    # Monthly RANGE partitions on feedback_sessions.session_datetime; recorded but skipped on SQLite
+    if storage.backend.supports_partitioning:
+        partitions.partition_table(cursor)
+
+def migration_8(cursor):
+    # Client-supplied Idempotency-Key values and the session each one created
+    cursor.execute(storage.backend.ddl("""
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            idempotency_key VARCHAR(255) NOT NULL,
+            session_id INT,
+            created_at DATETIME NOT NULL,
+            UNIQUE (idempotency_key)
+        )
+    """))
+    add_index(cursor, 'idempotency_keys', 'idx_idempotency_created', "created_at")
+
+def migration_9(cursor):
+    # Progress of bulk imports, advanced in the same transaction as each imported batch
+    cursor.execute(storage.backend.ddl("""
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            import_id VARCHAR(255) NOT NULL,
+            rows_done INT NOT NULL DEFAULT 0,
+            sessions_imported INT NOT NULL DEFAULT 0,
+            responses_imported INT NOT NULL DEFAULT 0,
+            sessions_failed INT NOT NULL DEFAULT 0,
+            completed_at DATETIME,
+            updated_at DATETIME NOT NULL,
+            UNIQUE (import_id)
+        )
+    """))
+
+def migration_10(cursor):
+    # Session events and cache invalidations shared by every server process (see change_log.py)
+    cursor.execute(storage.backend.ddl("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(16) NOT NULL,
+            name VARCHAR(64) NOT NULL,
+            payload TEXT,
+            origin VARCHAR(32) NOT NULL,
+            created_at DATETIME NOT NULL
+        )
+    """))
+    add_index(cursor, 'change_log', 'idx_change_log_created', "created_at")
+
+def migration_11(cursor):
+    # Question text is stored once, in the catalog: search gets a full-text index over questions,
+    # and feedback_responses loses its per-row copy along with the index that covered it
+    questions.backfill(cursor)
+    add_fulltext_index(cursor, 'questions', search.QUESTION_INDEX, search.QUESTION_COLUMNS)
+    if column_exists(cursor, 'feedback_responses', 'question'):
+        if index_exists(cursor, 'feedback_responses', search.SEARCH_INDEX):
+            storage.backend.drop_fulltext_index(cursor, 'feedback_responses', search.SEARCH_INDEX)
+        storage.backend.drop_column(cursor, 'feedback_responses', 'question')
+    add_fulltext_index(cursor, 'feedback_responses', search.SEARCH_INDEX, search.SEARCH_COLUMNS)
+
+# Ordered list of (version, description, function); append new migrations at the end
+MIGRATIONS = [
+    (1, "Add created_at and aggregate score columns to feedback_sessions", migration_1),
+    (2, "Add indexes for admin list, date-range and per-division/venue queries", migration_2),
+    (3, "Add score_rollups table", migration_3),
+    (4, "Add version column to feedback_sessions for optimistic concurrency", migration_4),
+    (5, "Add FULLTEXT index over response question, answer and comments", migration_5),
+    (6, "Add questions catalog and backfill feedback_responses.question_id", migration_6),
+    (7, "Partition feedback_sessions by session_datetime month", migration_7),
+    (8, "Add idempotency_keys table", migration_8),
+    (9, "Add import_checkpoints table", migration_9),
+    (10, "Add change_log table", migration_10),
+    (11, "Move response question text to the questions catalog", migration_11),
+]
+
+def migrate():
+    conn = storage.backend.connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(storage.backend.ddl("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.commit()
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for version, description, apply in MIGRATIONS:
+            if version in applied:
+                continue
+            # DDL commits implicitly in MySQL (SQLite keeps it transactional), so each step is written to be re-runnable
+            apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            conn.commit()
+            print(f"Applied migration {version}: {description}")
+        print("Schema is up to date.")
+    except storage.backend.Error as err:
         print(f"Error: {err}")
     finally:
         cursor.close()
         conn.close()
 
+# Full-text search as the admin search endpoint issues it on this backend
+_fulltext_source, _fulltext_match, _, _fulltext_params = search.fulltext_clause('password', False)
+
+# Representative admin queries with the index each one is expected to use
+EXPLAIN_QUERIES = [
+    ("feedback-sessions list", "idx_sessions_created", """
+        SELECT fs.id, fs.tester_name, fs.created_at FROM feedback_sessions fs
+        ORDER BY fs.created_at DESC, fs.id DESC LIMIT 51
+    """, ()),
+    ("feedback-sessions list, next page", "idx_sessions_created", """
+        SELECT fs.id, fs.tester_name, fs.created_at FROM feedback_sessions fs
+        WHERE (fs.created_at < %s OR (fs.created_at = %s AND fs.id < %s))
+        ORDER BY fs.created_at DESC, fs.id DESC LIMIT 51
+    """, ('2100-01-01', '2100-01-01', 2 ** 31 - 1)),
+    ("sessions by date range", "idx_sessions_datetime", """
+        SELECT fs.id FROM feedback_sessions fs
+        WHERE fs.session_datetime >= %s AND fs.session_datetime < %s
+    """, ('2100-01-01', '2100-02-01')),
+    ("division scores by date range", "idx_sessions_division_datetime", """
+        SELECT AVG(fs.total_score), AVG(fs.accuracy_score), AVG(fs.relevancy_score), AVG(fs.performance_score)
+        FROM feedback_sessions fs
+        WHERE fs.division_id = %s AND fs.session_datetime >= %s AND fs.session_datetime < %s
+    """, (1, '2000-01-01', '2100-01-01')),
+    ("venue scores by date range", "idx_sessions_venue_datetime", """
+        SELECT AVG(fs.total_score), AVG(fs.accuracy_score), AVG(fs.relevancy_score), AVG(fs.performance_score)
+        FROM feedback_sessions fs
+        WHERE fs.venue_id = %s AND fs.session_datetime >= %s AND fs.session_datetime < %s
+    """, (1, '2000-01-01', '2100-01-01')),
+    ("response full-text search", search.SEARCH_INDEX, f"""
+        SELECT fr.id FROM {_fulltext_source}
+        WHERE {_fulltext_match}
+    """, tuple(_fulltext_params)),
+    ("session responses", "idx_responses_session", """
+        SELECT fr.id, fr.question_id FROM feedback_responses fr
+        WHERE fr.session_id = %s ORDER BY fr.id
+    """, (1,)),
+    ("question stats", "idx_responses_question", """
+        SELECT COUNT(*), AVG(fr.accuracy_score), AVG(fr.relevancy_score), AVG(fr.performance_score)
+        FROM feedback_responses fr
+        WHERE fr.question_id = %s
+    """, (1,)),
+]
+
+def check_query_plans():
+    conn = storage.backend.connect()
+    failures = 0
+    try:
+        for name, expected_index, query, params in EXPLAIN_QUERIES:
+            used, access = storage.backend.explain(conn, query, params)
+            ok = expected_index in used
+            failures += not ok
+            print(f"[{'OK' if ok else 'MISS'}] {name}: expected {expected_index}, "
+                  f"used {', '.join(sorted(used)) or 'none'} ({access})")
+    finally:
+        conn.close()
+    return failures
+
+def rebuild_rollups():
+    conn = storage.backend.connect()
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        rollups.rebuild(cursor)
+        # Archived sessions are no longer in feedback_sessions but still count towards the rollups
+        rollups.apply_sessions(cursor, archive.iter_sessions())
+        conn.commit()
+        print("Score rollups rebuilt.")
+    except storage.backend.Error as err:
+        conn.rollback()
+        print(f"Error: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
+def maintain_partitions(months_ahead, older_than_months):
+    if not storage.backend.supports_partitioning:
+        print(f"The {storage.backend.name} backend does not support partitioning; nothing to do.")
+        return
+    conn = storage.backend.connect()
+    cursor = conn.cursor()
+    try:
+        if not partitions.list_partitions(cursor):
+            print("feedback_sessions is not partitioned yet; run migrate first.")
+            return
+        added = partitions.add_future_partitions(cursor, months_ahead)
+        print(f"Added partitions: {', '.join(added) or 'none'}")
+        if older_than_months is not None:
+            dropped = partitions.drop_empty_partitions(cursor, archive.archive_cutoff(older_than_months).date())
+            print(f"Dropped empty partitions: {', '.join(dropped) or 'none'}")
+    except storage.backend.Error as err:
+        print(f"Error: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
+def archive_old_sessions(older_than_months, batch_size):
+    conn = storage.backend.connect()
+    try:
+        count = archive.archive_sessions(conn, older_than_months, batch_size)
+        print(f"Archived {count} sessions dated before {archive.archive_cutoff(older_than_months):%Y-%m-%d} "
+              f"to {archive.ARCHIVE_DIR}.")
+    except storage.backend.Error as err:
+        print(f"Error: {err}")
+    finally:
+        conn.close()
+
+def purge_idempotency_keys():
+    conn = storage.backend.connect()
+    try:
+        deleted = idempotency.purge(conn)
+        print(f"Deleted {deleted} idempotency keys older than {idempotency.KEY_TTL} seconds.")
+    except storage.backend.Error as err:
+        print(f"Error: {err}")
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
-    create_database()
-    create_tables() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create and migrate the feedback database")
+    parser.add_argument('command', nargs='?', default='setup',
+                        choices=['setup', 'migrate', 'explain', 'rebuild-rollups', 'partitions', 'archive',
+                                 'purge-idempotency-keys'],
+                        help="setup (default) creates the database and applies migrations; "
+                             "explain checks that admin queries use the expected indexes; "
+                             "rebuild-rollups recomputes score_rollups from feedback_sessions and the archive; "
+                             "partitions adds upcoming monthly partitions and drops emptied old ones; "
+                             "archive moves old sessions to Parquet files under ARCHIVE_DIR; "
+                             "purge-idempotency-keys deletes keys older than IDEMPOTENCY_KEY_TTL")
+    parser.add_argument('--older-than-months', type=int,
+                        help="archive: sessions dated before the start of the month this many months ago "
+                             "(required); partitions: drop empty partitions older than that")
+    parser.add_argument('--months-ahead', type=int, default=partitions.MONTHS_AHEAD,
+                        help="partitions: months after the current one that get their own partition")
+    parser.add_argument('--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE,
+                        help="archive: sessions moved per transaction")
+    args = parser.parse_args()
+
+    if args.command == 'setup':
+        create_database()
+        create_tables()
+        migrate()
+    elif args.command == 'migrate':
+        migrate()
+    elif args.command == 'explain':
+        raise SystemExit(1 if check_query_plans() else 0)
+    elif args.command == 'rebuild-rollups':
+        rebuild_rollups()
+    elif args.command == 'partitions':
+        maintain_partitions(args.months_ahead, args.older_than_months)
+    elif args.command == 'archive':
+        if args.older_than_months is None or args.older_than_months < 1:
+            parser.error("archive requires --older-than-months of at least 1")
+        archive_old_sessions(args.older_than_months, args.batch_size)
+    elif args.command == 'purge-idempotency-keys':
+        purge_idempotency_keys()
@@ -0,0 +1,454 @@
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+import config
+
+
+class MySQLBackend:
+    name = 'mysql'
+    supports_partitioning = True
+
+    def __init__(self, db_config):
+        import mysql.connector
+
+        self.db_config = db_config
+        self.Error = mysql.connector.Error
+        self.IntegrityError = mysql.connector.IntegrityError
+
+    def connect(self):
+        import mysql.connector
+
+        return mysql.connector.connect(**self.db_config)
+
+    def create_database(self):
+        import mysql.connector
+        from mysql.connector import errorcode
+
+        conn = cursor = None
+        try:
+            conn = mysql.connector.connect(
+                host=self.db_config['host'],
+                user=self.db_config['user'],
+                password=self.db_config['password']
+            )
+            cursor = conn.cursor()
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db_config['database']}")
+            print(f"Database {self.db_config['database']} created successfully.")
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                print("Something is wrong with your user name or password")
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                print("Database does not exist")
+            else:
+                print(err)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if conn is not None:
+                conn.close()
+
+    def ddl(self, statement):
+        # The shared schema is written in MySQL's dialect
+        return statement
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """, (table, column))
+        return cursor.fetchone()[0] > 0
+
+    def index_exists(self, cursor, table, index):
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """, (table, index))
+        return cursor.fetchone()[0] > 0
+
+    def add_column(self, cursor, table, column, definition):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def drop_column(self, cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+
+    def add_fulltext_index(self, cursor, table, index, columns):
+        # InnoDB keeps the FULLTEXT index in sync on every insert, update and delete
+        cursor.execute(f"CREATE FULLTEXT INDEX {index} ON {table} ({', '.join(columns)})")
+
+    def drop_fulltext_index(self, cursor, table, index):
+        cursor.execute(f"DROP INDEX {index} ON {table}")
+
+    def fulltext_search(self, index, table, alias, columns, query, boolean_mode):
+        # Returns (from_clause, match_clause, score_expression, params for score then match)
+        mode = "IN BOOLEAN MODE" if boolean_mode else "IN NATURAL LANGUAGE MODE"
+        match = f"MATCH({', '.join(f'{alias}.{column}' for column in columns)}) AGAINST (%s {mode})"
+        return f"{table} {alias}", match, match, [query, query]
+
+    # SQL expressions computing each rollup bucket's start date from a DATETIME column
+    def bucket_sql(self, granularity, column):
+        if granularity == 'week':
+            return f"DATE_SUB(DATE({column}), INTERVAL WEEKDAY({column}) DAY)"
+        if granularity == 'month':
+            return f"DATE_SUB(DATE({column}), INTERVAL DAYOFMONTH({column}) - 1 DAY)"
+        return f"DATE({column})"
+
+    def upsert_increment(self, table, key_columns, increment_columns):
+        # INSERT that adds to the existing row's counters when the key is already present
+        columns = list(key_columns) + list(increment_columns)
+        updates = ', '.join(f"{column} = {column} + VALUES({column})" for column in increment_columns)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE {updates}")
+
+    def insert_or_ignore(self, table, columns):
+        # INSERT that silently skips rows whose unique key already exists
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE id = id")
+
+    def explain(self, conn, query, params):
+        # Returns (index names used, short description of the access path)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"EXPLAIN {query}", params)
+            plan = cursor.fetchall()
+        finally:
+            cursor.close()
+        used = {row['key'] for row in plan if row['key']}
+        return used, f"access type {', '.join(str(row['type']) for row in plan)}"
+
+
+# --- SQLite ------------------------------------------------------------------
+
+# DATETIME/DATE columns are stored as ISO text and converted back on the way out.
+# Aware datetimes are written as their wall-clock time, as mysql-connector does.
+sqlite3.register_adapter(datetime, lambda value: value.replace(tzinfo=None).isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+
+_DDL_REWRITES = [
+    (re.compile(r'\bINT AUTO_INCREMENT PRIMARY KEY\b', re.IGNORECASE), 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'\bENUM\([^)]*\)', re.IGNORECASE), 'TEXT'),
+    # REAL rather than NUMERIC so whole-number scores do not turn into integers and divide as such
+    (re.compile(r'\bDECIMAL\(\d+,\s*\d+\)', re.IGNORECASE), 'REAL'),
+]
+_NON_CONSTANT_DEFAULT_RE = re.compile(r'\bDEFAULT\s+(CURRENT_TIMESTAMP|CURRENT_DATE|CURRENT_TIME|\()', re.IGNORECASE)
+_TABLE_CONSTRAINT_RE = re.compile(r',\s*(FOREIGN KEY|PRIMARY KEY\s*\(|UNIQUE\s*\(|CHECK\s*\(|CONSTRAINT\b)', re.IGNORECASE)
+_FOR_UPDATE_RE = re.compile(r'\s+FOR\s+UPDATE\s*$', re.IGNORECASE)
+_READ_ONLY_RE = re.compile(r'\s*(SELECT|WITH|PRAGMA|EXPLAIN)\b', re.IGNORECASE)
+_FTS_TOKEN_RE = re.compile(r'([+-]?)("[^"]*"|\w+\*?)')
+
+
+@lru_cache(maxsize=1024)
+def _translate(statement):
+    # Returns the statement in SQLite syntax and whether it needs the write lock
+    locking = bool(_FOR_UPDATE_RE.search(statement))
+    statement = _FOR_UPDATE_RE.sub('', statement).replace('%s', '?')
+    return statement, locking or not _READ_ONLY_RE.match(statement)
+
+
+def _dict_row(cursor, row):
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def fts5_query(query, boolean_mode):
+    # Natural-language queries match any term; boolean queries keep MySQL's +required, -excluded and prefix*
+    required, optional, excluded = [], [], []
+    for operator, token in _FTS_TOKEN_RE.findall(query if boolean_mode else query.replace('"', ' ')):
+        prefix = token.endswith('*')
+        phrase = token.rstrip('*').strip('"').replace('"', '')
+        if not phrase.strip():
+            continue
+        term = f'"{phrase}"' + (' *' if prefix and boolean_mode else '')
+        if boolean_mode and operator == '+':
+            required.append(term)
+        elif boolean_mode and operator == '-':
+            excluded.append(term)
+        else:
+            optional.append(term)
+    positive = ' AND '.join(required) if required else ' OR '.join(optional)
+    if not positive:
+        return None
+    return f"({positive})" + ''.join(f" NOT {term}" for term in excluded)
+
+
+class SQLiteCursor:
+    # Accepts the mysql-connector calling conventions used by the route handlers
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self._cursor = connection._raw.cursor()
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def execute(self, statement, params=()):
+        statement, locking = _translate(statement)
+        if locking:
+            self.connection.begin()
+        self._cursor.execute(statement, tuple(params))
+
+    def executemany(self, statement, seq_params):
+        statement, _ = _translate(statement)
+        self.connection.begin()
+        self._cursor.executemany(statement, seq_params)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    # Autocommit at the driver level; a transaction is opened on the first write,
+    # matching MySQL's implicit transactions. BEGIN IMMEDIATE takes the write lock
+    # up front, which is how SELECT ... FOR UPDATE is honoured.
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def begin(self):
+        if not self._raw.in_transaction:
+            self._raw.execute("BEGIN IMMEDIATE")
+
+    def start_transaction(self):
+        self.begin()
+
+    def commit(self):
+        if self._raw.in_transaction:
+            self._raw.execute("COMMIT")
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.execute("ROLLBACK")
+
+    def ping(self, reconnect=False):
+        self._raw.execute("SELECT 1")
+
+    def close(self):
+        self._raw.close()
+
+
+class SQLiteBackend:
+    name = 'sqlite'
+    Error = sqlite3.Error
+    IntegrityError = sqlite3.IntegrityError
+    # SQLite has no table partitioning; old data is bounded by archive.py alone
+    supports_partitioning = False
+
+    def __init__(self, path, synchronous='NORMAL', mmap_size=256 * 1024 * 1024, busy_timeout=30.0,
+                 statement_cache_size=256):
+        self.path = path
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        self.statement_cache_size = statement_cache_size
+
+    def connect(self):
+        # sqlite3 keeps up to statement_cache_size prepared statements per connection
+        raw = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        raw.execute("PRAGMA journal_mode=WAL")
+        raw.execute(f"PRAGMA synchronous={self.synchronous}")
+        raw.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        raw.execute("PRAGMA foreign_keys=ON")
+        return SQLiteConnection(raw)
+
+    def create_database(self):
+        # The database file is created on first connect
+        self.connect().close()
+        print(f"Database {self.path} ready.")
+
+    def ddl(self, statement):
+        for pattern, replacement in _DDL_REWRITES:
+            statement = pattern.sub(replacement, statement)
+        return statement
+
+    def column_exists(self, cursor, table, column):
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+
+    def index_exists(self, cursor, table, index):
+        # Full-text indexes are FTS5 tables, so look them up by name alongside ordinary indexes
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = %s", (index,))
+        return cursor.fetchone()[0] > 0
+
+    def add_column(self, cursor, table, column, definition):
+        definition = self.ddl(definition)
+        if not _NON_CONSTANT_DEFAULT_RE.search(definition):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            return
+        # ALTER TABLE cannot add a column defaulting to CURRENT_TIMESTAMP; rebuild the
+        # table instead, following SQLite's documented copy-and-rename procedure
+        conn = cursor.connection
+        conn.commit()
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        try:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+            create_sql = cursor.fetchone()[0]
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                           "AND tbl_name = %s AND sql IS NOT NULL", (table,))
+            dependents = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"PRAGMA table_info({table})")
+            existing = ', '.join(row[1] for row in cursor.fetchall())
+
+            constraint = _TABLE_CONSTRAINT_RE.search(create_sql)
+            insert_at = constraint.start() if constraint else create_sql.rstrip().rindex(')')
+            create_sql = create_sql[:insert_at] + f", {column} {definition}" + create_sql[insert_at:]
+            rebuilt = f"{table}__rebuild"
+            cursor.execute(re.sub(rf'^CREATE TABLE\s+(IF NOT EXISTS\s+)?"?{table}"?', f"CREATE TABLE {rebuilt}", create_sql, count=1))
+            cursor.execute(f"INSERT INTO {rebuilt} ({existing}) SELECT {existing} FROM {table}")
+            cursor.execute(f"DROP TABLE {table}")
+            cursor.execute(f"ALTER TABLE {rebuilt} RENAME TO {table}")
+            for statement in dependents:
+                cursor.execute(statement)
+            cursor.execute("PRAGMA foreign_key_check")
+            if cursor.fetchall():
+                raise self.Error(f"Rebuilding {table} left foreign key violations")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("PRAGMA foreign_keys=ON")
+
+    def drop_column(self, cursor, table, column):
+        # Needs SQLite 3.35+; the column must not be used by an index or trigger
+        cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+
+    def add_fulltext_index(self, cursor, table, index, columns):
+        # External-content FTS5 table over the source rows, kept in sync by triggers
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f"new.{column}" for column in columns)
+        old_values = ', '.join(f"old.{column}" for column in columns)
+        cursor.execute(f"CREATE VIRTUAL TABLE {index} USING fts5({column_list}, content='{table}', content_rowid='id')")
+        cursor.execute(f"""
+            CREATE TRIGGER {index}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER {index}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER {index}_au AFTER UPDATE ON {table} BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+    def drop_fulltext_index(self, cursor, table, index):
+        for trigger in ('ai', 'ad', 'au'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {index}_{trigger}")
+        cursor.execute(f"DROP TABLE IF EXISTS {index}")
+
+    def fulltext_search(self, index, table, alias, columns, query, boolean_mode):
+        # bm25() is lower-is-better, so negate it to rank like MySQL's relevance score
+        source = f"{index} JOIN {table} {alias} ON {alias}.id = {index}.rowid"
+        match = f"{index} MATCH %s"
+        # An empty expression is a syntax error in FTS5; match nothing instead
+        expression = fts5_query(query, boolean_mode)
+        if expression is None:
+            return source, "1 = 0", "0", []
+        return source, match, f"-bm25({index})", [expression]
+
+    def bucket_sql(self, granularity, column):
+        if granularity == 'week':
+            return f"date({column}, '-' || ((CAST(strftime('%w', {column}) AS INTEGER) + 6) % 7) || ' days')"
+        if granularity == 'month':
+            return f"date({column}, 'start of month')"
+        return f"date({column})"
+
+    def upsert_increment(self, table, key_columns, increment_columns):
+        columns = list(key_columns) + list(increment_columns)
+        updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in increment_columns)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}")
+
+    def insert_or_ignore(self, table, columns):
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON CONFLICT DO NOTHING")
+
+    def explain(self, conn, query, params):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            details = [row[3] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        used = set()
+        for detail in details:
+            used.update(re.findall(r'USING (?:COVERING )?INDEX (\w+)', detail))
+            used.update(re.findall(r'SCAN (\w+) VIRTUAL TABLE', detail))
+        return used, '; '.join(details)
+
+
+def from_env(environ=os.environ):
+    # environ: os.environ or a load_config() mapping, which uses the same names
+    # DB_BACKEND=sqlite runs against an embedded database file instead of a MySQL server
+    if environ.get('DB_BACKEND', 'mysql') == 'sqlite':
+        return SQLiteBackend(
+            environ.get('SQLITE_PATH', 'feedback.db'),
+            synchronous=environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            mmap_size=int(environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            busy_timeout=float(environ.get('SQLITE_BUSY_TIMEOUT', 30)),
+        )
+    return MySQLBackend({
+        'host': environ.get('DB_HOST', 'localhost'),
+        'user': environ.get('DB_USER', 'admin'),
+        'password': environ.get('DB_PASSWORD', 'admin'),
+        'database': environ.get('DB_NAME', 'genai_tests')
+    })
+
+
+# Backend used by the app, migrations and benchmark; chosen from the configuration at import
+# (config.current()), and replaced by create_app() when it is given overrides
+backend = from_env(config.current())
@@ -0,0 +1,127 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The backend modules are imported as top-level modules, as app.py and the CLIs do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests run against a temporary SQLite database. With FEEDBACK_TEST_MYSQL_DB set they run
+# against that MySQL database instead (DB_HOST, DB_USER and DB_PASSWORD as usual); every table
+# in it is emptied before each test, so never point it at real data.
+MYSQL_DB = os.environ.get('FEEDBACK_TEST_MYSQL_DB')
+if MYSQL_DB:
+    os.environ['DB_BACKEND'] = 'mysql'
+    os.environ['DB_NAME'] = MYSQL_DB
+else:
+    os.environ['DB_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='feedback-tests-'), 'feedback.db')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+import app as feedback
+import setup_db
+import storage
+
+# Emptied before each test, children first
+TABLES = ['import_checkpoints', 'idempotency_keys', 'feedback_responses', 'feedback_sessions', 'score_rollups', 'divisions', 'venues']
+DIVISIONS = ['North', 'South']
+VENUES = ['Hall A', 'Hall B']
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'mysql: exercises MySQL-only behaviour; runs only with FEEDBACK_TEST_MYSQL_DB')
+    config.addinivalue_line('markers', 'settings(**overrides): configuration overrides for the test\'s create_app()')
+
+
+def pytest_collection_modifyitems(config, items):
+    if storage.backend.name == 'mysql':
+        return
+    skip = pytest.mark.skip(reason="MySQL only: set FEEDBACK_TEST_MYSQL_DB to run")
+    for item in items:
+        if 'mysql' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def schema():
+    setup_db.create_database()
+    setup_db.create_tables()
+    setup_db.migrate()
+
+
+def clear_tables():
+    conn = storage.backend.connect()
+    cursor = conn.cursor()
+    if storage.backend.name == 'mysql':
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    else:
+        for table in TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+        cursor.execute("DELETE FROM sqlite_sequence")
+    cursor.executemany("INSERT INTO divisions (name) VALUES (%s)", [(name,) for name in DIVISIONS])
+    cursor.executemany("INSERT INTO venues (name) VALUES (%s)", [(name,) for name in VENUES])
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+@pytest.fixture
+def app(schema, request, tmp_path):
+    # A fresh app per test, so no cache outlives the rows it was built from
+    clear_tables()
+    marker = request.node.get_closest_marker('settings')
+    flask_app = feedback.create_app({
+        'RATE_LIMIT_PER_SECOND': 0,
+        'IDEMPOTENCY_PURGE_INTERVAL': 0,
+        'INGEST_QUEUE_PATH': str(tmp_path / 'ingest_queue.db'),
+        **(marker.kwargs if marker else {}),
+    })
+    yield flask_app
+    feedback.changes.stop()
+    feedback.event_hub.close()
+    feedback.db_pool.close_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(app):
+    # A direct connection for checking what was stored
+    conn = storage.backend.connect()
+    yield conn
+    conn.close()
+
+
+def submission(tester_name='tester', session_datetime='2026-10-01T02:00:00Z', responses=2):
+    return {
+        'tester_name': tester_name,
+        'division_id': 1,
+        'venue_id': 1,
+        'session_datetime': session_datetime,
+        'responses': [
+            {
+                'question': f"How do I reset password {n}?",
+                'chatbot_answer': f"Answer {n}",
+                'accuracy_score': 4,
+                'relevancy_score': 3,
+                'performance_score': 5,
+                'additional_comments': '',
+            }
+            for n in range(responses)
+        ],
+    }
+
+
+def count(conn, table):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    value = cursor.fetchone()[0]
+    cursor.close()
+    return value
@@ -0,0 +1,25 @@
+import archive
+import storage
+from conftest import count, submission
+
+
+def test_archiving_bumps_the_version(client, db, tmp_path):
+    client.post('/api/submit-feedback', json=submission('old', '2020-01-15T02:00:00Z'))
+    client.post('/api/submit-feedback', json=submission('recent'))
+    root = str(tmp_path / 'archive')
+    assert archive.version(root) is None
+
+    conn = storage.backend.connect()
+    assert archive.archive_sessions(conn, older_than_months=12, root=root) == 1
+    conn.close()
+    first = archive.version(root)
+    assert first is not None
+    assert count(db, 'feedback_sessions') == 1
+    # The version file is not read as data
+    assert archive.dataset(root).count_rows() == 2
+
+    client.post('/api/submit-feedback', json=submission('old', '2020-02-15T02:00:00Z'))
+    conn = storage.backend.connect()
+    archive.archive_sessions(conn, older_than_months=12, root=root)
+    conn.close()
+    assert archive.version(root) not in (None, first)
@@ -0,0 +1,51 @@
+import json
+import time
+
+import app as feedback
+import change_log
+from conftest import submission
+
+
+def last_change(db):
+    cursor = db.cursor()
+    cursor.execute("SELECT id, kind, name, payload FROM change_log ORDER BY id DESC LIMIT 1")
+    row = cursor.fetchone()
+    cursor.close()
+    db.commit()
+    return row
+
+
+def wait_for_sequence(change_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while int(feedback.event_hub.stats()['last_event_id']) < change_id:
+        assert time.monotonic() < deadline, "change log follower did not catch up"
+        time.sleep(0.02)
+
+
+def test_submit_appends_its_event_in_the_same_transaction(client, db):
+    session_id = client.post('/api/submit-feedback', json=submission()).get_json()['session_id']
+    _, kind, name, payload = last_change(db)
+    assert (kind, name) == (change_log.EVENT, 'created')
+    assert json.loads(payload)['id'] == session_id
+
+
+def test_subscribers_receive_events_under_change_log_ids(client, db):
+    client.post('/api/submit-feedback', json=submission('first'))
+    # Once the follower has reached the first event it is reading every later one
+    wait_for_sequence(last_change(db)[0])
+    subscription = feedback.event_hub.subscribe()
+    try:
+        session_id = client.post('/api/submit-feedback', json=submission('second')).get_json()['session_id']
+        change_id = last_change(db)[0]
+        events = subscription.get(timeout=5.0)
+        assert [(event[0], event[1]) for event in events] == [(change_id, 'created')]
+        assert json.loads(events[0][2])['id'] == session_id
+    finally:
+        subscription.close()
+
+
+def test_delete_appends_its_event(client, db):
+    session_id = client.post('/api/submit-feedback', json=submission()).get_json()['session_id']
+    assert client.delete(f'/api/admin/feedback-session/{session_id}').status_code == 200
+    _, kind, name, payload = last_change(db)
+    assert (kind, name, json.loads(payload)) == (change_log.EVENT, 'deleted', {'id': session_id})
@@ -0,0 +1,50 @@
+import io
+import json
+
+import importer
+import storage
+from conftest import count
+
+HEADER = ('session_id,tester_name,division_name,venue_name,session_datetime,question,chatbot_answer,'
+          'accuracy_score,relevancy_score,performance_score,additional_comments\n')
+
+
+def export_file(sessions):
+    # Laid out like /api/admin/export: two rows per session, session columns repeated
+    lines = [HEADER]
+    for n in range(sessions):
+        for question in ('How do I reset my password?', 'Where is my invoice?'):
+            lines.append(f"{n + 1},tester{n},North,Hall A,2026-10-{n + 1:02d} 10:00:00,{question},An answer,4,3,5,\n")
+    return ''.join(lines).encode()
+
+
+def post_import(client, data, **params):
+    response = client.post('/api/admin/import', query_string=params,
+                           data={'file': (io.BytesIO(data), 'feedback.csv')})
+    assert response.status_code == 200
+    # NDJSON progress lines; the last one is the summary
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_import_resumes_after_last_committed_batch(client, db):
+    data = export_file(5)
+    # An import that stops after its first committed batch of two sessions
+    conn = storage.backend.connect()
+    progress = importer.import_rows(conn, importer.read_rows(io.BytesIO(data), 'csv'), 'resume-test', batch_size=2)
+    assert next(progress)['sessions_imported'] == 2
+    progress.close()
+    conn.close()
+    assert count(db, 'feedback_sessions') == 2
+
+    summary = post_import(client, data, import_id='resume-test', batch_size=2)[-1]
+    assert summary['done'] and not summary['already_completed']
+    assert summary['rows_skipped'] == 4
+    assert summary['sessions_imported'] == 3
+    assert count(db, 'feedback_sessions') == 5
+    assert count(db, 'feedback_responses') == 10
+
+    # Once complete, the same import id writes nothing more
+    summary = post_import(client, data, import_id='resume-test')[-1]
+    assert summary['already_completed']
+    assert summary['sessions_imported'] == 0
+    assert count(db, 'feedback_sessions') == 5
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+import partitions
+
+# Partitioning DDL only exists on MySQL; migration 7 is recorded but skipped on SQLite
+pytestmark = pytest.mark.mysql
+
+
+def partition_names(db):
+    cursor = db.cursor()
+    names = [name for name, _ in partitions.list_partitions(cursor)]
+    cursor.close()
+    return names
+
+
+def test_migration_partitions_sessions_by_month(db):
+    names = partition_names(db)
+    assert names[-1] == partitions.FUTURE_PARTITION
+    upcoming = partitions.add_months(partitions.month_start(date.today()), partitions.MONTHS_AHEAD)
+    assert partitions.partition_name(upcoming) in names
+
+
+def test_future_partitions_split_the_catch_all(db):
+    months_ahead = partitions.MONTHS_AHEAD + 2
+    cursor = db.cursor()
+    partitions.add_future_partitions(cursor, months_ahead)
+    cursor.close()
+    names = partition_names(db)
+    target = partitions.add_months(partitions.month_start(date.today()), months_ahead)
+    assert partitions.partition_name(target) in names
+    assert names[-1] == partitions.FUTURE_PARTITION
+
+
+def test_sessions_land_in_their_month(client, db):
+    payload = {
+        'tester_name': 'tester', 'division_id': 1, 'venue_id': 1,
+        'session_datetime': f"{date.today():%Y-%m}-15T02:00:00Z",
+        'responses': [{'question': 'Q', 'chatbot_answer': 'A', 'accuracy_score': 4,
+                       'relevancy_score': 4, 'performance_score': 4}],
+    }
+    assert client.post('/api/submit-feedback', json=payload).status_code == 200
+    cursor = db.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {partitions.PARTITIONED_TABLE} "
+                   f"PARTITION ({partitions.partition_name(partitions.month_start(date.today()))})")
+    assert cursor.fetchone()[0] == 1
+    cursor.close()
@@ -0,0 +1,16 @@
+from conftest import submission
+
+
+def test_search_ranks_matching_responses(client):
+    matching = submission('match')
+    matching['responses'][0]['chatbot_answer'] = "Open the invoice portal and choose download"
+    session_id = client.post('/api/submit-feedback', json=matching).get_json()['session_id']
+    client.post('/api/submit-feedback', json=submission('other'))
+
+    # MySQL FULLTEXT or SQLite FTS5, depending on the backend under test
+    hits = client.get('/api/admin/search?q=invoice').get_json()['hits']
+    assert [hit['session_id'] for hit in hits] == [session_id]
+
+
+def test_search_requires_query(client):
+    assert client.get('/api/admin/search?q=').status_code == 400
@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import count, submission
+
+
+def submit(client, tester_name='tester', session_datetime='2026-10-01T02:00:00Z'):
+    response = client.post('/api/submit-feedback', json=submission(tester_name, session_datetime))
+    return response.get_json()['session_id']
+
+
+def test_patch_applies_current_version(client):
+    session_id = submit(client)
+    response = client.patch(f'/api/admin/feedback-session/{session_id}',
+                            json={'version': 0, 'tester_name': 'renamed'})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 1
+    assert client.get(f'/api/admin/feedback-session/{session_id}').get_json()['tester_name'] == 'renamed'
+
+
+def test_patch_stale_version_conflicts(client):
+    session_id = submit(client)
+    client.patch(f'/api/admin/feedback-session/{session_id}', json={'version': 0, 'tester_name': 'first'})
+    response = client.patch(f'/api/admin/feedback-session/{session_id}',
+                            json={'version': 0, 'tester_name': 'second'})
+    assert response.status_code == 409
+    assert response.get_json()['version'] == 1
+    assert client.get(f'/api/admin/feedback-session/{session_id}').get_json()['tester_name'] == 'first'
+
+
+@pytest.mark.parametrize('patch', [
+    {'responses': [{'id': 1, 'accuracy_score': True}]},
+    {'responses': [{'id': 1, 'relevancy_score': 0}]},
+    {'responses': [{'id': 1, 'performance_score': 6}]},
+    {'responses': ['not a response']},
+    {'responses': {'id': 1}},
+    {'deleted_responses': 1},
+    {'deleted_responses': ['1']},
+    {'deleted_responses': [True]},
+])
+def test_patch_rejects_invalid_changes(client, patch):
+    session_id = submit(client)
+    response = client.patch(f'/api/admin/feedback-session/{session_id}', json={'version': 0, **patch})
+    assert response.status_code == 400
+    # Nothing was applied, so the version is unchanged
+    assert client.patch(f'/api/admin/feedback-session/{session_id}', json={'version': 0}).status_code == 200
+
+
+def test_patch_unknown_session(client):
+    response = client.patch('/api/admin/feedback-session/999', json={'version': 0, 'tester_name': 'x'})
+    assert response.status_code == 404
+
+
+def test_list_pages_through_every_session(client):
+    created = [submit(client, f'tester{n}', f'2026-10-{n + 1:02d}T02:00:00Z') for n in range(5)]
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/admin/feedback-sessions?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        assert len(page['sessions']) <= 2
+        seen.extend(session['id'] for session in page['sessions'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    # Newest first, each session exactly once
+    assert seen == list(reversed(created))
+
+
+def test_delete_removes_session_and_responses(client, db):
+    session_id = submit(client)
+    kept = submit(client, 'other')
+    response = client.delete(f'/api/admin/feedback-session/{session_id}')
+    assert response.status_code == 200
+    assert client.get(f'/api/admin/feedback-session/{session_id}').status_code == 404
+    assert client.delete(f'/api/admin/feedback-session/{session_id}').status_code == 404
+    assert count(db, 'feedback_sessions') == 1
+    cursor = db.cursor()
+    cursor.execute("SELECT DISTINCT session_id FROM feedback_responses")
+    assert [row[0] for row in cursor.fetchall()] == [kept]
+    cursor.close()
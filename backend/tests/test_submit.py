@@ -0,0 +1,103 @@
+import pytest
+
+import app as feedback
+from conftest import count, submission
+
+
+def test_submit_stores_session_and_responses(client, db):
+    response = client.post('/api/submit-feedback', json=submission(responses=3))
+    assert response.status_code == 200
+    session_id = response.get_json()['session_id']
+
+    stored = client.get(f'/api/admin/feedback-session/{session_id}').get_json()
+    assert stored['tester_name'] == 'tester'
+    assert stored['division_name'] == 'North'
+    assert sorted(r['question'] for r in stored['responses']) == [f"How do I reset password {n}?" for n in range(3)]
+    assert count(db, 'feedback_responses') == 3
+
+
+def test_submit_rejects_missing_responses(client, db):
+    response = client.post('/api/submit-feedback', json=submission(responses=0))
+    assert response.status_code == 400
+    assert count(db, 'feedback_sessions') == 0
+
+
+# (field, value) set on the first response; None removes the field
+INVALID_RESPONSES = [
+    ('question', None),
+    ('accuracy_score', None),
+    ('relevancy_score', '4'),
+    ('performance_score', True),
+    ('accuracy_score', 6),
+]
+
+
+def invalid_submission(field, value):
+    data = submission()
+    if value is None:
+        del data['responses'][0][field]
+    else:
+        data['responses'][0][field] = value
+    return data
+
+
+@pytest.mark.parametrize('field, value', INVALID_RESPONSES)
+def test_submit_rejects_invalid_response(client, db, field, value):
+    response = client.post('/api/submit-feedback', json=invalid_submission(field, value))
+    assert response.status_code == 400
+    assert field in response.get_json()['error']
+    assert count(db, 'feedback_sessions') == 0
+
+
+@pytest.mark.settings(SUBMIT_MODE='write-behind', INGEST_WORKERS=0)
+@pytest.mark.parametrize('field, value', INVALID_RESPONSES)
+def test_write_behind_rejects_invalid_response(client, field, value):
+    # Rejected before it is queued, rather than accepted and failed by the worker
+    response = client.post('/api/submit-feedback', json=invalid_submission(field, value))
+    assert response.status_code == 400
+    assert feedback.ingest_queue.depth() == 0
+
+
+def test_submit_replays_idempotency_key(client, db):
+    headers = {'Idempotency-Key': 'submit-1'}
+    first = client.post('/api/submit-feedback', json=submission(), headers=headers)
+    again = client.post('/api/submit-feedback', json=submission(), headers=headers)
+    assert first.status_code == again.status_code == 200
+    assert again.get_json()['session_id'] == first.get_json()['session_id']
+    assert again.headers.get('Idempotent-Replayed') == 'true'
+    assert count(db, 'feedback_sessions') == 1
+
+
+def test_keyed_submit_caches_catalog_ids(client):
+    # The idempotency key lookup runs first; on MySQL it leaves a transaction open that
+    # would keep catalog hits out of the cache
+    client.post('/api/submit-feedback', json=submission(), headers={'Idempotency-Key': 'warm-1'})
+    feedback.question_catalog.clear()
+    response = client.post('/api/submit-feedback', json=submission(), headers={'Idempotency-Key': 'warm-2'})
+    assert response.status_code == 200
+    # No cursor: answered from the cache alone
+    cached = feedback.question_catalog.lookup(None, [r['question'] for r in submission()['responses']])
+    assert len(cached) == 2
+
+
+def test_batch_reports_each_session(client, db):
+    sessions = [submission('a'), {'tester_name': 'no responses'}, submission('c'),
+                invalid_submission('accuracy_score', 'high')]
+    response = client.post('/api/submit-feedback/batch', json={'sessions': sessions, 'chunk_size': 2})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['succeeded'], body['failed']) == (2, 2)
+    assert [r['index'] for r in body['results']] == [0, 1, 2, 3]
+    assert 'error' in body['results'][1]
+    assert 'accuracy_score' in body['results'][3]['error']
+    assert count(db, 'feedback_sessions') == 2
+
+
+def test_batch_replays_idempotency_key(client, db):
+    headers = {'Idempotency-Key': 'batch-1'}
+    sessions = [submission('a'), submission('b')]
+    first = client.post('/api/submit-feedback/batch', json={'sessions': sessions}, headers=headers).get_json()
+    again = client.post('/api/submit-feedback/batch', json={'sessions': sessions}, headers=headers).get_json()
+    assert [r['session_id'] for r in again['results']] == [r['session_id'] for r in first['results']]
+    assert all(r.get('replayed') for r in again['results'])
+    assert count(db, 'feedback_sessions') == 2
@@ -23,6 +23,7 @@ const EditFeedbackSession = () => {
   const router = useRouter();
   const { id } = router.query;
   const [sessionData, setSessionData] = useState(null);
+  const [originalData, setOriginalData] = useState(null);
   const [divisions, setDivisions] = useState([]);
   const [venues, setVenues] = useState([]);
   const [notification, setNotification] = useState({ open: false, message: '', severity: 'success' });
@@ -42,6 +43,7 @@ const EditFeedbackSession = () => {
         const response = await fetch(`/api/admin/feedback-session/${id}`);
         const data = await response.json();
         setSessionData(data);
+        setOriginalData(data);
       } catch (error) {
         showNotification('Error loading session data', 'error');
       } finally {
@@ -67,18 +69,47 @@ const EditFeedbackSession = () => {
     }
   };
 
+  // Only send the fields and responses that actually changed
+  const buildPatch = () => {
+    const patch = { version: originalData.version };
+    ['tester_name', 'division_id', 'venue_id', 'session_datetime'].forEach(field => {
+      if (sessionData[field] !== originalData[field]) {
+        patch[field] = sessionData[field];
+      }
+    });
+
+    const originalResponses = Object.fromEntries(originalData.responses.map(r => [r.id, r]));
+    const changedResponses = [];
+    sessionData.responses.forEach(response => {
+      const original = originalResponses[response.id];
+      if (!original) {
+        changedResponses.push(response);
+        return;
+      }
+      const changes = Object.keys(response).filter(key => response[key] !== original[key]);
+      if (changes.length > 0) {
+        changedResponses.push({ id: response.id, ...Object.fromEntries(changes.map(key => [key, response[key]])) });
+      }
+    });
+    if (changedResponses.length > 0) {
+      patch.responses = changedResponses;
+    }
+    return patch;
+  };
+
   const handleUpdate = async () => {
-    console.log('Updating session with data:', sessionData);
     try {
       const response = await fetch(`/api/admin/feedback-session/${id}`, {
-        method: 'PUT',
+        method: 'PATCH',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(sessionData),
+        body: JSON.stringify(buildPatch()),
       });
 
       if (response.ok) {
         showNotification('Session updated successfully');
         router.push('/admin/feedback-sessions');
+      } else if (response.status === 409) {
+        showNotification('This session was changed by someone else. Reload to see the latest version.', 'warning');
       } else {
         const errorData = await response.json();
         showNotification(errorData.error || 'Error updating session', 'error');
@@ -2,8 +2,12 @@ import React, { useState, useEffect } from 'react';
 import { Container, Paper, Typography, List, ListItem, ListItemText, Button, Snackbar, Alert } from '@mui/material';
 import { useRouter } from 'next/router';
 
+const LIST_FIELDS = 'id,tester_name,division_name,venue_name,session_datetime';
+const PAGE_SIZE = 50;
+
 const FeedbackSessionsPage = () => {
   const [feedbackSessions, setFeedbackSessions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [notification, setNotification] = useState({ open: false, message: '', severity: 'success' });
   const router = useRouter();
 
@@ -11,11 +15,33 @@ const FeedbackSessionsPage = () => {
     loadFeedbackSessions();
   }, []);
 
-  const loadFeedbackSessions = async () => {
+  // Apply created/updated/deleted events as they happen instead of refetching the list.
+  // EventSource reconnects by itself and resumes after the last event it received.
+  useEffect(() => {
+    const events = new EventSource('/api/admin/events');
+    const parse = handler => event => handler(JSON.parse(event.data));
+    events.addEventListener('created', parse(session => {
+      setFeedbackSessions(prev => (prev.some(s => s.id === session.id) ? prev : [session, ...prev]));
+    }));
+    events.addEventListener('updated', parse(session => {
+      setFeedbackSessions(prev => prev.map(s => (s.id === session.id ? { ...s, ...session } : s)));
+    }));
+    events.addEventListener('deleted', parse(({ id }) => {
+      setFeedbackSessions(prev => prev.filter(s => s.id !== id));
+    }));
+    // Sent when events were missed; only a reload is reliable then
+    events.addEventListener('reset', () => loadFeedbackSessions());
+    return () => events.close();
+  }, []);
+
+  const loadFeedbackSessions = async (cursor = null) => {
     try {
-      const response = await fetch('/api/admin/feedback-sessions');
+      const params = new URLSearchParams({ fields: LIST_FIELDS, limit: PAGE_SIZE });
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`/api/admin/feedback-sessions?${params}`);
       const data = await response.json();
-      setFeedbackSessions(data);
+      setFeedbackSessions(prev => (cursor ? [...prev, ...data.sessions] : data.sessions));
+      setNextCursor(data.next_cursor);
     } catch (error) {
       showNotification('Error loading feedback sessions', 'error');
     }
@@ -29,7 +55,7 @@ const FeedbackSessionsPage = () => {
     try {
       const response = await fetch(`/api/admin/feedback-session/${sessionId}`, { method: 'DELETE' });
       if (response.ok) {
-        loadFeedbackSessions(); // Refresh the list of feedback sessions
+        setFeedbackSessions(prev => prev.filter(s => s.id !== sessionId));
         showNotification('Feedback session deleted successfully');
       } else {
         const errorData = await response.json();
@@ -70,6 +96,11 @@ const FeedbackSessionsPage = () => {
             </ListItem>
           ))}
         </List>
+        {nextCursor && (
+          <Button variant="text" onClick={() => loadFeedbackSessions(nextCursor)}>
+            Load more
+          </Button>
+        )}
       </Paper>
       <Snackbar open={notification.open} autoHideDuration={6000} onClose={handleCloseNotification}>
         <Alert onClose={handleCloseNotification} severity={notification.severity} sx={{ width: '100%' }}>
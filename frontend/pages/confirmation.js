@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { Container, Typography, Button, Box, Snackbar, Alert } from '@mui/material';
 import { useRouter } from 'next/router';
+import { submitFeedback, newIdempotencyKey } from '../utils/api';
 
 const ConfirmationPage = () => {
   const router = useRouter();
@@ -10,25 +11,15 @@ const ConfirmationPage = () => {
   const parsedFormData = formData ? JSON.parse(formData) : null;
 
   const [notification, setNotification] = useState({ open: false, message: '', severity: 'success' });
+  // Kept for the life of this page, so pressing Confirm again after a timeout cannot submit twice
+  const [idempotencyKey] = useState(newIdempotencyKey);
 
   const handleConfirm = async () => {
     try {
-      const response = await fetch('/api/submit-feedback', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(parsedFormData),
-      });
-
-      if (response.ok) {
-        router.push('/');
-      } else {
-        const errorData = await response.json();
-        showNotification(errorData.error || 'Error submitting feedback', 'error');
-      }
+      await submitFeedback(parsedFormData, idempotencyKey);
+      router.push('/');
     } catch (error) {
-      showNotification('Error submitting feedback', 'error');
+      showNotification(error.response?.data?.error || 'Error submitting feedback', 'error');
     }
   };
 
@@ -8,10 +8,58 @@ const api = axios.create({
   }
 });
 
-// Add error handling
+const MAX_RETRIES = 3;
+const BASE_DELAY_MS = 500;
+const MAX_DELAY_MS = 10000;
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Retry-After is either a number of seconds or an HTTP date
+const retryAfterMs = (value) => {
+  if (!value) return null;
+  const seconds = Number(value);
+  if (!Number.isNaN(seconds)) return seconds * 1000;
+  const date = Date.parse(value);
+  return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+};
+
+// One key per logical submission; the server answers a repeated key with the original result
+export const newIdempotencyKey = () => (
+  typeof crypto !== 'undefined' && crypto.randomUUID
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+);
+
+// 429/503 mean the request was turned away before any work was done, so any method can be
+// retried. Timeouts and network errors are only retried for reads and for writes carrying an
+// Idempotency-Key, which are safe to repeat.
+const shouldRetry = (error) => {
+  const config = error.config;
+  if (!config || (config.__retryCount || 0) >= MAX_RETRIES) return false;
+  const status = error.response?.status;
+  if (status === 429 || status === 503) return true;
+  if (error.response) return false;
+  return (config.method || 'get').toLowerCase() === 'get' || Boolean(config.headers?.['Idempotency-Key']);
+};
+
+// Full-jitter exponential backoff, never sooner than the server's Retry-After
+const retryDelayMs = (error, attempt) => {
+  const backoff = Math.min(MAX_DELAY_MS, BASE_DELAY_MS * 2 ** attempt);
+  const jitter = Math.random() * backoff;
+  const serverDelay = retryAfterMs(error.response?.headers?.['retry-after']);
+  return serverDelay === null ? jitter : serverDelay + jitter / 2;
+};
+
+// Add retries and error handling
 api.interceptors.response.use(
   response => response,
-  error => {
+  async error => {
+    if (shouldRetry(error)) {
+      const attempt = error.config.__retryCount || 0;
+      error.config.__retryCount = attempt + 1;
+      await sleep(retryDelayMs(error, attempt));
+      return api.request(error.config);
+    }
     console.error('API Error:', error.response?.data || error.message);
     return Promise.reject(error);
   }
@@ -37,9 +85,11 @@ export const fetchVenues = async () => {
   }
 };
 
-export const submitFeedback = async (data) => {
+export const submitFeedback = async (data, idempotencyKey = newIdempotencyKey()) => {
   try {
-    const response = await api.post('/submit-feedback', data);
+    const response = await api.post('/submit-feedback', data, {
+      headers: { 'Idempotency-Key': idempotencyKey }
+    });
     return response.data;
   } catch (error) {
     console.error('Error submitting feedback:', error);